@@ -0,0 +1,79 @@
+import os
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from visualization.corpus_statistics import (HISTOGRAM_LOWER, HISTOGRAM_UPPER, CorpusStatistics, RunningStatistics,
+                                             get_wach_index, summarize_files)
+
+EXAMPLE_STATIC_PATH = os.path.join(os.path.dirname(__file__), '..', 'example_static.txt')
+EXAMPLE_DYNAMIC_PATH = os.path.join(os.path.dirname(__file__), '..', 'example_dynamic.json')
+
+
+def test_merged_batches_equal_a_single_pass():
+    rng = np.random.default_rng(7)
+    samples = rng.uniform(HISTOGRAM_LOWER, HISTOGRAM_UPPER, size=(500, 20)) + 1000.0  # large offset, small spread
+    samples[:, 0] = 1000.0  # a constant channel has no variance
+
+    single = RunningStatistics()
+    single.update(samples)
+    merged = RunningStatistics()
+    for batch in np.split(samples, [1, 2, 130, 400]):
+        part = RunningStatistics()
+        part.update(batch)
+        merged.merge(part)
+    merged.merge(RunningStatistics())  # empty statistics change nothing
+
+    for statistics in [single, merged]:
+        assert statistics.count == 500
+        assert np.allclose(statistics.mean, samples.mean(axis=0), rtol=0, atol=1e-9)
+        assert np.allclose(statistics.variance, samples.var(axis=0, ddof=1), rtol=1e-9, atol=1e-12)
+        assert np.array_equal(statistics.min, samples.min(axis=0))
+        assert np.array_equal(statistics.max, samples.max(axis=0))
+    assert np.array_equal(single.histogram, merged.histogram)
+    assert single.histogram.sum(axis=1).tolist() == [500] * 20  # values outside the range are counted at the ends
+
+
+def test_statistics_of_few_samples_and_different_bins():
+    statistics = RunningStatistics()
+    assert np.array_equal(statistics.variance, np.zeros(20))
+    statistics.update(np.ones((1, 20)))
+    assert np.array_equal(statistics.std, np.zeros(20))
+    with pytest.raises(ValueError):
+        statistics.merge(RunningStatistics(bins=10))
+    with pytest.raises(ValueError):
+        statistics.get('median')
+
+
+def test_corpus_of_example_files(tmp_path):
+    invalid_path = tmp_path / 'invalid.txt'
+    invalid_path.write_text('horns\nMiddle\n\n')
+    corpus = CorpusStatistics()
+    assert corpus.add_file(EXAMPLE_STATIC_PATH) and corpus.add_file(EXAMPLE_DYNAMIC_PATH)
+    assert not corpus.add_file(str(invalid_path))
+    assert ('horns', 'Left') in corpus.groups
+    assert corpus.total().count == sum(statistics.count for statistics in corpus.groups.values())
+
+    # Same result read by worker processes, saved and loaded
+    parallel = summarize_files([EXAMPLE_STATIC_PATH, EXAMPLE_DYNAMIC_PATH, str(invalid_path)], processes=2)
+    corpus.save(str(tmp_path / 'statistics.json'))
+    loaded = CorpusStatistics.load(str(tmp_path / 'statistics.json'))
+    for other in [parallel, loaded]:
+        assert other.groups.keys() == corpus.groups.keys()
+        for key, statistics in corpus.groups.items():
+            assert other.groups[key].count == statistics.count
+            assert np.allclose(other.groups[key].mean, statistics.mean)
+            assert np.allclose(other.groups[key].m2, statistics.m2)
+            assert np.array_equal(other.groups[key].histogram, statistics.histogram)
+
+    paths = corpus.render_heatmaps(str(tmp_path / 'heatmaps'), 'std', cell_pixels=16)
+    assert len(paths) == len(corpus.groups)
+    with Image.open(paths[0]) as img:
+        assert img.width >= 4 * 16
+
+
+def test_wach_index_of_joint_layout():
+    assert [get_wach_index(finger, 0) for finger in range(5)] == [0, 1, 2, 3, 4]
+    assert [get_wach_index(0, column) for column in range(1, 4)] == [5, 6, 7]
+    assert get_wach_index(4, 3) == 19
@@ -0,0 +1,37 @@
+import json
+import os
+
+import numpy as np
+
+from visualization.frame_transfer import FIELDS, read_frame_arrays, remove_frame_arrays, write_frame_arrays
+
+EXAMPLE_DYNAMIC_PATH = os.path.join(os.path.dirname(__file__), '..', 'example_dynamic.json')
+
+
+def test_frames_round_trip_through_arrays():
+    with open(EXAMPLE_DYNAMIC_PATH, 'r') as f:
+        gesture = json.load(f)[0]
+    descriptor = write_frame_arrays(gesture)
+    try:
+        assert descriptor['start_to_hold'] == len(gesture['startToHold'])
+        assert descriptor['hold_to_end'] == len(gesture['holdToEnd'])
+        assert json.loads(json.dumps(descriptor)) == descriptor  # passed to blender as text
+
+        arrays = read_frame_arrays(descriptor)
+        frames = gesture['startToHold'] + gesture['holdToEnd']
+        for field in FIELDS:
+            assert isinstance(arrays[field], np.memmap) and not arrays[field].flags.writeable
+            assert np.array_equal(arrays[field], np.asarray([frame[field] for frame in frames]))
+        assert arrays['stretch'].shape == (len(frames), 5, 3)
+    finally:
+        remove_frame_arrays(descriptor)
+    assert not os.path.exists(descriptor['directory'])
+    remove_frame_arrays(descriptor)  # removing twice is fine
+
+
+def test_arrays_are_written_into_the_given_folder(tmp_path):
+    frame = {'rotations': [1.0, 0.0, 0.0, 0.0], 'spread': [0.1] * 5, 'stretch': [[0.2] * 3] * 5}
+    descriptor = write_frame_arrays({'startToHold': [frame], 'holdToEnd': []}, str(tmp_path))
+    assert descriptor['directory'] == str(tmp_path)
+    assert sorted(os.listdir(tmp_path)) == sorted(f"{field}.npy" for field in FIELDS)
+    assert read_frame_arrays(descriptor)['spread'].tolist() == [[0.1] * 5]
@@ -0,0 +1,92 @@
+import json
+import os
+import struct
+
+import numpy as np
+import pytest
+
+from visualization import gltf_export, pose
+
+EXAMPLE_DYNAMIC_PATH = os.path.join(os.path.dirname(__file__), '..', 'example_dynamic.json')
+
+
+def load_frames() -> tuple[list[dict], str]:
+    with open(EXAMPLE_DYNAMIC_PATH, 'r') as f:
+        gesture = json.load(f)[0]
+    return gesture['startToHold'] + gesture['holdToEnd'], gesture['hand']
+
+
+def write_glb(glb_path: str, document: dict, binary: bytes) -> None:
+    json_chunk = json.dumps(document).encode('utf-8')
+    json_chunk += b' ' * (-len(json_chunk) % 4)
+    binary += b'\0' * (-len(binary) % 4)
+    with open(glb_path, 'wb') as f:
+        f.write(struct.pack('<III', gltf_export.GLB_MAGIC, gltf_export.GLB_VERSION,
+                            12 + 8 + len(json_chunk) + 8 + len(binary)))
+        f.write(struct.pack('<II', len(json_chunk), gltf_export.CHUNK_TYPE_JSON) + json_chunk)
+        f.write(struct.pack('<II', len(binary), gltf_export.CHUNK_TYPE_BIN) + binary)
+
+
+def read_accessor(document: dict, binary: bytes, accessor_idx: int) -> np.ndarray:
+    accessor = document['accessors'][accessor_idx]
+    view = document['bufferViews'][accessor['bufferView']]
+    width = 1 if accessor['type'] == 'SCALAR' else 4
+    values = np.frombuffer(binary, dtype='<f4', count=accessor['count'] * width, offset=view['byteOffset'])
+    return values.reshape(accessor['count'], width) if width > 1 else values
+
+
+def test_skeleton_animation_matches_frames(tmp_path):
+    frames, hand = load_frames()
+    glb_path = str(tmp_path / 'gesture.glb')
+    assert gltf_export.export_gesture_animation(frames, hand, glb_path, fps=10) == len(frames)
+
+    document, binary = gltf_export.read_glb(glb_path)
+    assert len(binary) == document['buffers'][0]['byteLength'] + (-document['buffers'][0]['byteLength'] % 4)
+    animation = document['animations'][0]
+    bone_names = gltf_export.get_animated_bone_names(hand)
+    assert [document['nodes'][channel['target']['node']]['name'] for channel in animation['channels']] == bone_names
+
+    times = read_accessor(document, binary, animation['samplers'][0]['input'])
+    assert np.allclose(times, np.arange(len(frames)) / 10)
+    assert document['accessors'][animation['samplers'][0]['input']]['max'] == [pytest.approx(times[-1])]
+
+    # Rotations are stored as (x, y, z, w), neighbouring keys in the same hemisphere
+    bone_idx = bone_names.index(pose.get_bone_name('index', 0, hand))
+    rotations = read_accessor(document, binary, animation['samplers'][bone_idx]['output'])
+    w, x, y, z = pose.get_frame_bone_rotations(frames[0], hand)[bone_names[bone_idx]]
+    assert np.allclose(np.abs(rotations[0]), np.abs([x, y, z, w]), atol=1e-6)
+    assert np.allclose(np.linalg.norm(rotations, axis=1), 1.0, atol=1e-6)
+    assert (np.sum(rotations[1:] * rotations[:-1], axis=1) >= 0).all()
+
+
+def test_base_asset_is_kept_and_rest_rotation_applied(tmp_path):
+    frames, hand = load_frames()
+    bone_names = gltf_export.get_animated_bone_names(hand)
+    rest = (0.0, 0.0, 0.7071068, 0.7071068)  # (x, y, z, w), 90 degrees around z
+    base_path = str(tmp_path / 'base.glb')
+    write_glb(base_path, {'asset': {'version': '2.0'}, 'scene': 0, 'scenes': [{'nodes': [0]}],
+                          'nodes': [{'name': name, 'rotation': list(rest)} for name in bone_names],
+                          'buffers': [{'byteLength': 3}]}, b'abc')
+
+    glb_path = str(tmp_path / 'gesture.glb')
+    gltf_export.export_gesture_animation(frames[:2], hand, glb_path, frame_times=[0.0, 0.5], base_asset_path=base_path)
+    document, binary = gltf_export.read_glb(glb_path)
+    assert binary[:3] == b'abc'
+    assert document['bufferViews'][0]['byteOffset'] == 4  # aligned behind the data of the base asset
+
+    sampler = document['animations'][0]['samplers'][0]
+    assert np.allclose(read_accessor(document, binary, sampler['input']), [0.0, 0.5])
+    w, x, y, z = gltf_export.multiply_quaternions((rest[3],) + rest[:3],
+                                                  pose.get_frame_bone_rotations(frames[0], hand)[bone_names[0]])
+    assert np.allclose(np.abs(read_accessor(document, binary, sampler['output'])[0]), np.abs([x, y, z, w]), atol=1e-6)
+
+
+def test_invalid_exports_are_rejected(tmp_path):
+    frames, hand = load_frames()
+    with pytest.raises(ValueError):
+        gltf_export.export_gesture_animation([], hand, str(tmp_path / 'empty.glb'))
+
+    base_path = str(tmp_path / 'base.glb')
+    write_glb(base_path, {'asset': {'version': '2.0'}, 'nodes': [{'name': 'other'}]}, b'')
+    with pytest.raises(ValueError):
+        gltf_export.export_gesture_animation(frames, hand, str(tmp_path / 'gesture.glb'), base_asset_path=base_path)
@@ -0,0 +1,86 @@
+import urllib.error
+import urllib.request
+
+import pytest
+
+from visualization.metrics import CONTENT_TYPE, MetricsRegistry
+
+
+def test_counters_gauges_and_summaries_are_rendered():
+    registry = MetricsRegistry(window_size=100)
+    registry.describe('jobs_total', 'counter', "Jobs by result.")
+    registry.inc('jobs_total', labels={'result': 'ok'})
+    registry.inc('jobs_total', 2, labels={'result': 'ok'})
+    registry.inc('jobs_total', labels={'result': 'failed'})
+    registry.set('queue', 5)
+    registry.add('queue', -2)
+    for value in range(1, 101):
+        registry.observe('seconds', value, labels={'kind': 'static'})
+
+    lines = registry.render().splitlines()
+    assert lines[:4] == ['# HELP jobs_total Jobs by result.', '# TYPE jobs_total counter',
+                         'jobs_total{result="failed"} 1', 'jobs_total{result="ok"} 3']
+    assert '# TYPE queue gauge' in lines and 'queue 3' in lines
+    assert '# TYPE seconds summary' in lines
+    assert 'seconds{kind="static",quantile="0.5"} 51' in lines
+    assert 'seconds{kind="static",quantile="0.99"} 100' in lines
+    assert 'seconds_sum{kind="static"} 5050' in lines and 'seconds_count{kind="static"} 100' in lines
+    assert registry.get('jobs_total', {'result': 'ok'}) == 3 and registry.get('unknown') == 0
+
+
+def test_quantiles_cover_only_the_latest_observations():
+    registry = MetricsRegistry(window_size=10)
+    for value in [100] * 10 + [1] * 10:
+        registry.observe('seconds', value)
+    lines = registry.render().splitlines()
+    assert 'seconds{quantile="0.99"} 1' in lines
+    assert 'seconds_count 20' in lines  # count and sum cover all observations
+
+
+def test_track_and_rates():
+    registry = MetricsRegistry(rate_window_seconds=10)
+    with registry.track('in_flight', 'seconds'):
+        assert registry.get('in_flight') == 1
+    assert registry.get('in_flight') == 0
+    for _ in range(5):
+        registry.mark('per_second')
+    assert 'per_second 0.5' in registry.render().splitlines()
+
+
+def test_collectors_run_before_rendering_and_may_fail():
+    registry = MetricsRegistry()
+
+    def failing(_: MetricsRegistry) -> None:
+        raise RuntimeError("queue is gone")
+
+    def collector(r: MetricsRegistry) -> None:
+        r.set('depth', 7)
+
+    registry.add_collector(failing)
+    registry.add_collector(collector)
+    assert 'depth 7' in registry.render().splitlines()
+    registry.remove_collector(collector)
+    registry.set('depth', 0)
+    assert 'depth 0' in registry.render().splitlines()
+
+
+def test_file_and_http_export(tmp_path):
+    registry = MetricsRegistry()
+    registry.inc('jobs_total')
+    path = tmp_path / 'metrics.prom'
+    registry.write_file(str(path))
+    assert path.read_text() == registry.render()
+    assert not (tmp_path / 'metrics.prom.tmp').exists()
+
+    server = registry.serve(port=0)
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+        with urllib.request.urlopen(f"{url}/metrics") as response:
+            assert response.headers['Content-Type'] == CONTENT_TYPE
+            assert 'jobs_total 1' in response.read().decode('utf-8').splitlines()
+        with pytest.raises(urllib.error.HTTPError) as e:
+            urllib.request.urlopen(f"{url}/other")
+        assert e.value.code == 404
+    finally:
+        server.shutdown()
+        server.server_close()
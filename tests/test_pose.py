@@ -0,0 +1,46 @@
+import os
+from math import cos, pi, sin
+
+import numpy as np
+
+from visualization import pose, readers
+
+EXAMPLE_STATIC_PATH = os.path.join(os.path.dirname(__file__), '..', 'example_static.txt')
+
+
+def multiply(q: tuple, r: tuple) -> tuple:
+    w1, x1, y1, z1 = q
+    w2, x2, y2, z2 = r
+    return (w1 * w2 - x1 * x2 - y1 * y2 - z1 * z2,
+            w1 * x2 + x1 * w2 + y1 * z2 - z1 * y2,
+            w1 * y2 - x1 * z2 + y1 * w2 + z1 * x2,
+            w1 * z2 + x1 * y2 - y1 * x2 + z1 * w2)
+
+
+def test_euler_xyz_is_x_then_y_then_z():
+    x, y, z = 0.3, -1.1, 2.0
+    qx = (cos(x / 2), sin(x / 2), 0.0, 0.0)
+    qy = (cos(y / 2), 0.0, sin(y / 2), 0.0)
+    qz = (cos(z / 2), 0.0, 0.0, sin(z / 2))
+    assert np.allclose(pose.euler_xyz_to_quaternion(x, y, z), multiply(qz, multiply(qy, qx)))
+    assert np.allclose(pose.euler_xyz_to_quaternion(0.0, 0.0, pi), (0.0, 0.0, 0.0, 1.0))
+
+
+def test_bone_rotations_of_a_sample():
+    _, hand, data_samples = readers.read_wach_file(EXAMPLE_STATIC_PATH)
+    rotations = pose.get_bone_rotations(data_samples[0], hand)
+    assert sorted(rotations) == sorted(pose.get_bone_name(finger_name, joint_idx, hand)
+                                       for finger_name in pose.FINGER_NAMES for joint_idx in range(3))
+    assert np.allclose([np.linalg.norm(q) for q in rotations.values()], 1.0)
+    for finger_name in pose.FINGER_NAMES:  # only the first joint is spread, the others only bend around z
+        for joint_idx in [1, 2]:
+            w, x, y, z = rotations[pose.get_bone_name(finger_name, joint_idx, hand)]
+            assert abs(x) < 1e-12 and abs(y) < 1e-12
+
+
+def test_frame_rotations_add_wrist_and_hand():
+    frame = {'rotations': [1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0], 'spread': [0.0] * 5, 'stretch': [[0.0] * 3] * 5}
+    rotations = pose.get_frame_bone_rotations(frame, 'Right')
+    assert rotations['hand_r'] == (1.0, 0.0, 0.0, 0.0)
+    assert rotations[pose.HAND_NAME] == (0.0, 1.0, 0.0, 0.0)
+    assert len(rotations) == 17
@@ -0,0 +1,65 @@
+import os
+
+import pytest
+
+import visualization.constraints as cnstr
+from visualization import readers
+from visualization.pose_cache import PoseCache, quantize_pose
+
+EXAMPLE_STATIC_PATH = os.path.join(os.path.dirname(__file__), '..', 'example_static.txt')
+
+
+def load_sample() -> list[float]:
+    _, _, data_samples = readers.read_wach_file(EXAMPLE_STATIC_PATH)
+    return [float(value) for value in data_samples[0]]
+
+
+def test_poses_in_the_same_grid_cell_share_a_key():
+    sample = load_sample()
+    cache = PoseCache(grid_degrees=5.0)
+    cells = quantize_pose(sample, 5.0)
+    assert len(cells) == 20
+
+    # Move the last value to the middle of its cell, then by less than half a cell (same key) or more than a cell
+    degrees = cnstr.convert_wach_to_degrees(sample)
+    scale = 1.0 / (cnstr.convert_wach_to_degrees([1.0] * 20)[-1] - cnstr.convert_wach_to_degrees([0.0] * 20)[-1])
+    centered = sample[:-1] + [sample[-1] + ((cells[-1] + 0.5) * 5.0 - degrees[-1]) * scale]
+    nearby = centered[:-1] + [centered[-1] + 2.0 * scale]
+    far = centered[:-1] + [centered[-1] + 7.0 * scale]
+    assert cache.get_key('Left', nearby, 'stl') == cache.get_key('Left', centered, 'stl')
+    assert cache.get_key('Left', far, 'stl') != cache.get_key('Left', centered, 'stl')
+    assert cache.get_key('Right', centered, 'stl') != cache.get_key('Left', centered, 'stl')
+    assert cache.get_key('Left', centered, 'png') != cache.get_key('Left', centered, 'stl')
+
+    with pytest.raises(ValueError):
+        quantize_pose(sample, 0)
+    with pytest.raises(ValueError):
+        PoseCache(grid_degrees=-1.0)
+
+
+def test_least_recently_used_results_are_evicted_by_size():
+    cache = PoseCache(max_bytes=10)
+    cache.put('a', b'1234')
+    cache.put('b', b'1234')
+    assert cache.get('a') == b'1234'  # 'b' is now the least recently used
+    cache.put('c', b'1234')
+    assert cache.get('b') is None and cache.get('a') == b'1234' and cache.get('c') == b'1234'
+    assert cache.size_bytes == 8 and len(cache) == 2
+
+    cache.put('a', b'12')  # replacing a result counts its new size only
+    assert cache.size_bytes == 6
+    cache.put('big', b'x' * 11)  # larger than the budget, not cached and nothing evicted
+    assert cache.get('big') is None and len(cache) == 2
+
+    cache.clear()
+    assert len(cache) == 0 and cache.size_bytes == 0 and cache.get('a') is None
+
+
+def test_get_all_counts_one_hit_or_miss():
+    cache = PoseCache()
+    cache.put('stl', b'mesh')
+    cache.put('png', b'image')
+    assert cache.get_all(['stl', 'png']) == [b'mesh', b'image']
+    assert (cache.hits, cache.misses) == (1, 0)
+    assert cache.get_all(['stl', 'lod500_stl']) is None
+    assert (cache.hits, cache.misses) == (1, 1)
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from visualization import readers
+from visualization.pose_index import PoseIndex, collapse_near_duplicates
+
+NUMBER_OF_FEATURES = readers.NUMBER_OF_FEATURES
+
+
+def create_samples(number_of_samples: int, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).uniform(-0.5, 1.0, (number_of_samples, NUMBER_OF_FEATURES))
+
+
+def create_index(samples: np.ndarray, degree_space: bool = False) -> PoseIndex:
+    index = PoseIndex(degree_space, leaf_size=8)
+    for idx, sample in enumerate(samples):
+        index.add(list(sample), {'sample': idx})
+    return index
+
+
+@pytest.mark.parametrize('degree_space', [False, True])
+def test_knn_and_radius_match_brute_force(degree_space):
+    samples = create_samples(500)
+    index = create_index(samples[:450], degree_space)
+    index.rebuild()
+    for idx in range(450, 500):  # indexed in the tree and searched linearly
+        index.add(list(samples[idx]), {'sample': idx})
+    assert 0 < index.tree_size < len(index)
+
+    points = np.array([index.to_point(list(sample)) for sample in samples])
+    for query in create_samples(20, seed=1):
+        distances = np.sqrt(((points - index.to_point(list(query))) ** 2).sum(axis=1))
+        order = np.argsort(distances)
+
+        neighbours = index.knn(list(query), k=5)
+        assert [idx for _, idx, _ in neighbours] == list(order[:5])
+        assert np.allclose([d for d, _, _ in neighbours], distances[order[:5]])
+
+        r = float(distances[order[10]] + distances[order[11]]) / 2  # no sample exactly on the boundary
+        assert sorted(idx for _, idx, _ in index.radius(list(query), r)) == sorted(np.nonzero(distances <= r)[0])
+
+
+def test_save_and_load_keep_samples(tmp_path):
+    samples = create_samples(100)
+    index = create_index(samples, degree_space=True)
+    for path in [tmp_path / 'index', tmp_path / 'index.npz']:
+        index.save(str(path))
+        loaded = PoseIndex.load(str(path))
+        assert loaded.degree_space
+        assert loaded.meta == index.meta
+        assert np.array_equal(loaded.points, index.points)
+        assert loaded.knn(list(samples[7]))[0][1] == 7
+
+
+def test_near_duplicates_map_to_closest_representative():
+    base = create_samples(3)
+    data_samples = [list(base[0]), list(base[1]), list(base[0] + 0.001), list(base[2]), list(base[1] - 0.001)]
+    assert collapse_near_duplicates(data_samples, 0.01) == [0, 1, 0, 3, 1]
+    assert collapse_near_duplicates(data_samples, 0.0) == [0, 1, 2, 3, 4]
@@ -0,0 +1,72 @@
+import math
+
+import numpy as np
+import pytest
+
+from visualization.resampling import resample_frames, resample_gesture, slerp
+
+# Rotation by 90 degrees about z as quaternion (w, x, y, z)
+QUARTER_TURN = [math.cos(math.pi / 4), 0.0, 0.0, math.sin(math.pi / 4)]
+
+
+def create_frame(timestamp, quaternion, spread_value: float) -> dict:
+    return {'timestamp': timestamp, 'rotations': list(quaternion) + [0.0, 0.0, 0.0, 1.0, spread_value],
+            'spread': [spread_value] * 5, 'stretch': [[spread_value] * 3] * 5}
+
+
+def test_slerp_keeps_unit_norm_and_halves_the_angle():
+    q0 = np.array([1.0, 0.0, 0.0, 0.0])
+    q1 = np.array(QUARTER_TURN)
+    t = np.linspace(0.0, 1.0, 11)
+    result = slerp(np.tile(q0, (11, 1)), np.tile(q1, (11, 1)), t)
+    assert np.allclose(np.linalg.norm(result, axis=-1), 1.0)
+    assert np.allclose(result[0], q0) and np.allclose(result[-1], q1)
+    assert np.allclose(result[5], [math.cos(math.pi / 8), 0.0, 0.0, math.sin(math.pi / 8)])
+
+    # q and -q are the same rotation: the short way is taken
+    assert np.allclose(slerp(q0, -q1, np.array(0.5)), result[5])
+    # nearly equal quaternions
+    assert np.allclose(slerp(q0, q0, np.array(0.3)), q0)
+
+
+def test_resampled_frames_keep_endpoints_and_are_evenly_spaced():
+    frames = [create_frame(100, [1.0, 0.0, 0.0, 0.0], 0.0),
+              create_frame(101, QUARTER_TURN, 0.4),
+              create_frame(102, QUARTER_TURN, 0.8)]
+    resampled = resample_frames(frames, 4)
+
+    times = [frame['timestamp'] for frame in resampled]
+    assert len(resampled) == 9
+    assert np.allclose(np.diff(times), 0.25)
+    assert times[0] == 100 and times[-1] == pytest.approx(102)
+    for original, new in [(frames[0], resampled[0]), (frames[-1], resampled[-1])]:
+        assert np.allclose(new['rotations'], original['rotations'])
+        assert np.allclose(new['stretch'], original['stretch'])
+
+    middle = resampled[2]  # halfway between the first two frames
+    assert np.allclose(middle['rotations'][:4], [math.cos(math.pi / 8), 0.0, 0.0, math.sin(math.pi / 8)])
+    assert np.allclose(middle['rotations'][4:], [0.0, 0.0, 0.0, 1.0, 0.2])  # second quaternion and rest value
+    assert np.allclose(middle['spread'], 0.2)
+    assert np.all(np.diff([frame['spread'][0] for frame in resampled]) >= 0)  # no overshoot between frames
+
+
+def test_gesture_phases_are_split_at_the_hold_frame():
+    gesture = {'letter': 'a', 'hand': 'Left',
+               'startToHold': [create_frame(0, QUARTER_TURN, 0.0), create_frame(1, QUARTER_TURN, 0.1)],
+               'holdToEnd': [create_frame(2, QUARTER_TURN, 0.2), create_frame(3, QUARTER_TURN, 0.3)]}
+    resampled = resample_gesture(gesture, 2)
+    assert len(resampled['startToHold']) == 4 and len(resampled['holdToEnd']) == 3
+    assert resampled['holdToEnd'][0]['timestamp'] == pytest.approx(2)
+    assert resampled['letter'] == 'a'
+
+
+def test_invalid_input_is_rejected():
+    frame = create_frame(0, QUARTER_TURN, 0.0)
+    assert resample_frames([], 10) == []
+    with pytest.raises(ValueError):
+        resample_frames([frame], 0)
+    for timestamps in [[1, 0], [0, 'soon'], [0, float('nan')]]:
+        with pytest.raises(ValueError):
+            resample_frames([dict(frame, timestamp=timestamp) for timestamp in timestamps], 10)
+    with pytest.raises(ValueError):
+        resample_frames([frame, {key: value for key, value in frame.items() if key != 'timestamp'}], 10)
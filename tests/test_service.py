@@ -0,0 +1,72 @@
+import io
+import os
+import shutil
+import stat
+import sys
+
+import pytest
+from PIL import Image
+
+from visualization import readers
+from visualization.service import RenderService
+
+EXAMPLE_STATIC_PATH = os.path.join(os.path.dirname(__file__), '..', 'example_static.txt')
+
+# Stands in for blender running blender_script_server.py: writes its process id as result (or an uncropped
+# render for png), 'obj' crashes it
+FAKE_BLENDER = f"""#!{sys.executable}
+import json, os, re, socket, sys
+script = open(sys.argv[-1]).read()
+port = int(re.search(r"PORT = (\\d+)", script).group(1))
+token = re.search(r"TOKEN = '(.*)'", script).group(1)
+stream = socket.create_connection(('127.0.0.1', port)).makefile('rw')
+stream.write(json.dumps({{'token': token}}) + '\\n')
+stream.flush()
+for line in stream:
+    request = json.loads(line)
+    if request['file_type'] == 'obj':
+        sys.exit(1)
+    if request['file_type'] == 'png':
+        from PIL import Image
+        Image.new('RGBA', (1920, 1080)).save(request['path'])
+    else:
+        open(request['path'], 'w').write(f"{{os.getpid()}} {{request['hand']}} {{request['values'][0]}}")
+    stream.write(json.dumps({{'ok': True}}) + '\\n')
+    stream.flush()
+"""
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    blender_path = tmp_path / 'blender'
+    blender_path.write_text(FAKE_BLENDER)
+    blender_path.chmod(blender_path.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setattr(shutil, 'which', lambda name: str(blender_path))
+    service = RenderService(str(tmp_path / 'cache'), pool_size=1)
+    yield service
+    service.close()
+
+
+def test_static_requests_share_one_blender_process(service):
+    _, hand, data_samples = readers.read_wach_file(EXAMPLE_STATIC_PATH)
+    first, status = service.render_static('sample', hand, data_samples[0], 'stl')
+    assert status == 'miss'
+    second, _ = service.render_static('sample', hand, data_samples[1], 'stl')
+    assert first.split()[0] == second.split()[0]  # same process id
+    assert float(second.split()[2]) == float(data_samples[1][0])
+    assert service.render_static('sample', hand, data_samples[0], 'stl') == (first, 'hit')
+
+
+def test_crashed_blender_process_is_started_again(service):
+    _, hand, data_samples = readers.read_wach_file(EXAMPLE_STATIC_PATH)
+    first, _ = service.render_static('sample', hand, data_samples[0], 'stl')
+    with pytest.raises(RuntimeError):
+        service.render_static('sample', hand, data_samples[0], 'obj')
+    second, _ = service.render_static('sample', hand, data_samples[1], 'stl')
+    assert first.split()[0] != second.split()[0]
+
+
+def test_png_is_cropped(service):
+    _, hand, data_samples = readers.read_wach_file(EXAMPLE_STATIC_PATH)
+    data, _ = service.render_static('sample', hand, data_samples[0], 'png')
+    assert Image.open(io.BytesIO(data)).size == (950, 1000)
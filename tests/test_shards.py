@@ -0,0 +1,17 @@
+from visualization.shards import ShardReader, ShardWriter
+
+
+def test_two_writers_use_separate_shards(tmp_path):
+    first = ShardWriter(str(tmp_path), max_shard_bytes=4096)
+    second = ShardWriter(str(tmp_path), max_shard_bytes=4096)  # both see an empty folder
+    try:
+        first.add('a', 'Right', 0, 'stl', b'first')
+        second.add('b', 'Right', 0, 'stl', b'second')
+        assert first.shard_name != second.shard_name
+    finally:
+        first.close()
+        second.close()
+
+    reader = ShardReader(str(tmp_path))
+    assert reader.read('a', 'Right', 0, 'stl') == b'first'
+    assert reader.read('b', 'Right', 0, 'stl') == b'second'
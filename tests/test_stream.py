@@ -0,0 +1,86 @@
+import json
+import os
+import socket
+
+from visualization.stream import GloveStreamReplayer, LatestFrameReceiver, encode_frame
+
+EXAMPLE_DYNAMIC_PATH = os.path.join(os.path.dirname(__file__), '..', 'example_dynamic.json')
+
+
+def create_recording(tmp_path, number_of_frames: int = 20) -> tuple[str, list[dict]]:
+    with open(EXAMPLE_DYNAMIC_PATH, 'r') as f:
+        gesture = json.load(f)[0]
+    frames = gesture['startToHold'][:number_of_frames]
+    json_path = tmp_path / 'recording.json'
+    json_path.write_text(json.dumps([dict(gesture, startToHold=frames, holdToEnd=[])]))
+    return str(json_path), frames
+
+
+def test_replay_keeps_only_newest_frame(tmp_path):
+    json_path, frames = create_recording(tmp_path)
+    receiver = LatestFrameReceiver(port=0)
+    try:
+        replayer = GloveStreamReplayer(json_path, port=receiver.sock.getsockname()[1], speed=1000.0)
+        assert replayer.replay() == len(frames)
+
+        newest = receiver.poll()
+        assert newest['seq'] == len(frames) - 1
+        assert newest['spread'] == frames[-1]['spread']
+        assert receiver.received == len(frames)
+        assert receiver.dropped == len(frames) - 1  # all overtaken by the newest frame
+        assert receiver.poll() is None
+    finally:
+        receiver.close()
+
+
+def test_old_and_malformed_packets_are_dropped(tmp_path):
+    _, frames = create_recording(tmp_path, 1)
+    receiver = LatestFrameReceiver(port=0)
+    address = receiver.sock.getsockname()
+    sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        sender.sendto(encode_frame(frames[0], 10), address)
+        assert receiver.poll()['seq'] == 10
+
+        malformed = [b'not json', b'\xff\xfe', json.dumps([1, 2]).encode('utf-8'),
+                     json.dumps({'seq': 11, 'sent_at': 0.0}).encode('utf-8'),  # no pose
+                     json.dumps(dict(json.loads(encode_frame(frames[0], 12)), spread=[0.0] * 4)).encode('utf-8'),
+                     json.dumps(dict(json.loads(encode_frame(frames[0], 13)), seq='13')).encode('utf-8')]
+        for datagram in malformed:
+            sender.sendto(datagram, address)
+        sender.sendto(encode_frame(frames[0], 9), address)  # older than the frame shown
+        sender.sendto(encode_frame(frames[0], 10), address)  # duplicate
+        assert receiver.poll() is None
+        assert receiver.malformed == len(malformed)
+        assert receiver.dropped == 2
+        assert receiver.last_seq == 10
+
+        sender.sendto(encode_frame(frames[0], 14), address)
+        assert receiver.poll()['seq'] == 14
+    finally:
+        sender.close()
+        receiver.close()
+
+
+def test_restarted_sender_starts_a_new_stream(tmp_path):
+    json_path, frames = create_recording(tmp_path)
+    receiver = LatestFrameReceiver(port=0)
+    address = receiver.sock.getsockname()
+    sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        replayer = GloveStreamReplayer(json_path, port=address[1], speed=1000.0)
+        replayer.replay()
+        assert receiver.poll()['seq'] == len(frames) - 1
+        replayer.replay()  # the replay starts again at seq 0 with a new session
+        assert receiver.poll()['seq'] == len(frames) - 1
+        assert receiver.restarts == 1
+
+        # Senders without a session are detected by a large jump back
+        sender.sendto(encode_frame(frames[0], 1000), address)
+        assert receiver.poll()['seq'] == 1000
+        sender.sendto(encode_frame(frames[0], 0), address)
+        assert receiver.poll()['seq'] == 0
+        assert receiver.restarts == 3
+    finally:
+        sender.close()
+        receiver.close()
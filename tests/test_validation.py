@@ -0,0 +1,86 @@
+import json
+import os
+
+from visualization.validation import validate_dynamic_gestures, validate_wach_file, validate_wach_samples
+
+EXAMPLE_STATIC_PATH = os.path.join(os.path.dirname(__file__), '..', 'example_static.txt')
+EXAMPLE_DYNAMIC_PATH = os.path.join(os.path.dirname(__file__), '..', 'example_dynamic.json')
+
+
+def load_gesture() -> dict:
+    with open(EXAMPLE_DYNAMIC_PATH, 'r') as f:
+        return json.load(f)[0]
+
+
+def with_frame(gesture: dict, **fields) -> dict:
+    return dict(gesture, startToHold=[dict(gesture['startToHold'][0], **fields)] + gesture['startToHold'][1:])
+
+
+def test_examples_are_valid():
+    assert validate_wach_file(EXAMPLE_STATIC_PATH).ok
+    with open(EXAMPLE_DYNAMIC_PATH, 'r') as f:
+        assert validate_dynamic_gestures(json.load(f), require_timestamps=True).ok
+
+
+def test_sample_issues_are_reported():
+    report = validate_wach_samples([['0.5'] * 20, ['0.5'] * 19, ['0.5'] * 19 + ['x'], [0.5] * 19 + [float('nan')],
+                                    [0.5] * 19 + [9.0]], 'Middle')
+    assert [(issue.sample, issue.field) for issue in report.issues] == \
+        [(-1, 'hand'), (1, 'values'), (2, 'values'), (3, 'values'), (4, 'values')]
+
+
+def test_nested_sample_value_is_reported():
+    report = validate_wach_samples([['0.5'] * 19 + [[1, 2]]], 'Left')
+    assert not report.ok
+    assert [(issue.sample, issue.field) for issue in report.issues] == [(0, 'values')]
+    assert 'value [19] is not a single number' in report.issues[0].message
+
+
+def test_nested_spread_value_is_reported():
+    report = validate_dynamic_gestures([with_frame(load_gesture(), spread=[0, 0, 0, 0, [1]])])
+    assert [(issue.sample, issue.field) for issue in report.issues] == [(0, 'spread')]
+    assert 'frame 0, value [4] is not a single number' in report.issues[0].message
+
+
+def test_timestamps_must_be_single_finite_numbers():
+    gesture = load_gesture()
+    for timestamp in [[1, 2], float('nan'), 'soon']:
+        report = validate_dynamic_gestures([with_frame(gesture, timestamp=timestamp)])
+        assert [(issue.sample, issue.field) for issue in report.issues] == [(0, 'timestamp')], timestamp
+
+    frames = gesture['startToHold']
+    report = validate_dynamic_gestures([dict(gesture, startToHold=frames[:1] + [dict(frames[1], timestamp=0)])])
+    assert 'earlier than' in report.issues[0].message
+    del frames[1]['timestamp']
+    assert not validate_dynamic_gestures([gesture]).ok
+
+
+def test_file_layout_issues_are_reported(tmp_path):
+    with open(EXAMPLE_STATIC_PATH, 'r') as f:
+        lines = f.read().splitlines()
+    header_path = tmp_path / 'header.txt'
+    header_path.write_text('\n'.join(lines[1:]) + '\n')  # label missing
+    assert [issue.field for issue in validate_wach_file(str(header_path)).issues] == ['file']
+
+    stray_path = tmp_path / 'stray.txt'
+    stray_path.write_text('\n'.join(lines[:23] + ['0.5'] + lines[23:]) + '\n')  # one line too many in sample 0
+    report = validate_wach_file(str(stray_path))
+    assert [(issue.sample, issue.field) for issue in report.issues] == [(0, 'values')]
+    assert '21 values' in report.issues[0].message
+    assert not validate_wach_file(str(tmp_path / 'missing.txt')).ok
+
+
+def test_values_within_tolerance_are_accepted():
+    report = validate_wach_samples([[0.5] * 19 + [1.2]], 'Left')
+    assert report.ok
+    assert not validate_wach_samples([[0.5] * 19 + [1.2]], 'Left', range_tolerance=0.1).ok
+
+
+def test_gesture_issues_are_reported():
+    gesture = load_gesture()
+    report = validate_dynamic_gestures([dict(gesture, letter='', hand='Middle'), 'a',
+                                        with_frame(gesture, stretch=[[0.5] * 3] * 4),
+                                        with_frame(gesture, rotations=[0.0] * 4)])
+    assert [(issue.sample, issue.field) for issue in report.issues] == \
+        [(0, 'letter'), (0, 'hand'), (1, 'gesture'), (2, 'stretch'), (3, 'rotations')]
+    assert not validate_dynamic_gestures([]).ok
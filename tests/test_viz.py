@@ -0,0 +1,207 @@
+import json
+import os
+import stat
+import sys
+
+import pytest
+from PIL import Image
+
+from visualization.shards import ShardReader, ShardWriter
+from visualization.viz import DynamicDataVisualizer, StaticDataVisualizer
+
+EXAMPLE_STATIC_PATH = os.path.join(os.path.dirname(__file__), '..', 'example_static.txt')
+EXAMPLE_DYNAMIC_PATH = os.path.join(os.path.dirname(__file__), '..', 'example_dynamic.json')
+
+# Stands in for blender: exits without writing anything
+FAILING_BLENDER = f"""#!{sys.executable}
+import sys
+sys.exit(1)
+"""
+
+
+def create_visualizer(tmp_path) -> StaticDataVisualizer:
+    blender_path = tmp_path / 'blender'
+    blender_path.write_text(FAILING_BLENDER)
+    blender_path.chmod(blender_path.stat().st_mode | stat.S_IEXEC)
+    static_viz = StaticDataVisualizer(output_dir=str(tmp_path / 'static'))
+    static_viz.blender_path = str(blender_path)
+    return static_viz
+
+
+def test_pose_export_fails_without_base_asset(tmp_path):
+    static_viz = create_visualizer(tmp_path)
+    with pytest.raises(RuntimeError):
+        static_viz.generate_static_gesture_from_file(EXAMPLE_STATIC_PATH, 'pose')
+    assert not os.path.exists(static_viz.get_output_pose_path('example_static', 'Left'))
+
+
+def test_pose_export_reuses_base_asset(tmp_path):
+    static_viz = create_visualizer(tmp_path)  # would fail if blender was started
+    base_asset_path = static_viz.get_base_asset_path('Left')
+    os.makedirs(os.path.dirname(base_asset_path))
+    open(base_asset_path, 'w').close()
+    static_viz.generate_static_gesture_from_file(EXAMPLE_STATIC_PATH, 'pose')
+
+    with open(static_viz.get_output_pose_path('example_static', 'Left'), 'r') as f:
+        records = [json.loads(line) for line in f]
+    assert [record['sample'] for record in records] == list(range(len(records)))
+    assert all(record['base'] == os.path.join('base', 'Manus-Hand-Left.glb') for record in records)
+    assert len(records[0]['rotations']) == 15
+
+
+def test_pose_records_go_into_the_shards(tmp_path):
+    static_viz = create_visualizer(tmp_path)
+    base_asset_path = static_viz.get_base_asset_path('Left')
+    os.makedirs(os.path.dirname(base_asset_path))
+    open(base_asset_path, 'w').close()
+    with ShardWriter(str(tmp_path / 'shards')) as sink:
+        static_viz.output_sink = sink
+        static_viz.generate_static_gesture_from_file(EXAMPLE_STATIC_PATH, 'pose')
+
+    assert not os.path.exists(static_viz.get_output_pose_path('example_static', 'Left'))
+    reader = ShardReader(str(tmp_path / 'shards'))
+    assert json.loads(reader.read('example_static', 'Left', 1, 'pose'))['sample'] == 1
+
+
+# Stands in for blender rendering a frame range of blender_script_dynamic.py: one image per frame, the frame
+# number as color; the range is appended to a log next to the frames
+RENDERING_BLENDER = f"""#!{sys.executable}
+import os, re, sys
+from PIL import Image
+script = open(sys.argv[-1]).read()
+start = int(re.search(r"RENDER_FRAME_START = (\\d+)", script).group(1))
+end = int(re.search(r"RENDER_FRAME_END = (\\d+)", script).group(1))
+frame_dir = re.search(r"RENDER_PNG_DIR_STR = R'(.*)'", script).group(1)
+for frame in range(start, end + 1):
+    Image.new('RGBA', (1920, 1080), (frame, 0, 0, 255)).save(os.path.join(frame_dir, f"frame_{{frame:04d}}.png"))
+with open(os.path.join(frame_dir, 'ranges.log'), 'a') as f:
+    f.write(f"{{start}} {{end}}\\n")
+"""
+
+
+def test_frame_ranges_are_rendered_and_assembled(tmp_path):
+    with open(EXAMPLE_DYNAMIC_PATH, 'r') as f:
+        gesture = json.load(f)[0]
+    json_path = tmp_path / 'gesture.json'
+    json_path.write_text(json.dumps([dict(gesture, startToHold=gesture['startToHold'][:7],
+                                          holdToEnd=gesture['holdToEnd'][:4])]))
+    blender_path = tmp_path / 'blender'
+    blender_path.write_text(RENDERING_BLENDER)
+    blender_path.chmod(blender_path.stat().st_mode | stat.S_IEXEC)
+    dynamic_viz = DynamicDataVisualizer(str(tmp_path / 'dynamic'))
+    dynamic_viz.blender_path = str(blender_path)
+
+    dynamic_viz.render_dynamic_gesture(str(json_path), 'gif', processes=3, fps=10)
+
+    frame_dir = tmp_path / 'dynamic' / 'frames' / f"dynamic_{gesture['letter']}_{gesture['hand']}_0"
+    ranges = sorted(tuple(map(int, line.split())) for line in (frame_dir / 'ranges.log').read_text().splitlines())
+    assert ranges == [(1, 3), (4, 7), (8, 11)]  # contiguous, one per process
+    with Image.open(frame_dir / 'frame_0001.png') as img:
+        assert img.size == (1920, 1080)  # rendered frames are not cropped in place
+    with Image.open(dynamic_viz.get_output_file_path(gesture['letter'], gesture['hand'], 0, 'gif')) as gif:
+        assert gif.n_frames == 11
+        assert gif.size == (950, 1000)
+
+
+# Stands in for blender running blender_script_static.py: writes the export and each requested decimated mesh;
+# the requested budgets are appended to a log next to the script
+EXPORTING_BLENDER = f"""#!{sys.executable}
+import ast, os, re, sys
+script = open(sys.argv[-1]).read()
+file_type = re.search(r"EXPORT_FILE_TYPE = '(.*)'", script).group(1)
+open(re.search(rf"{{file_type.upper()}}_PATH_STR = R'(.*)'", script).group(1), 'w').close()
+budgets = ast.literal_eval(re.search(r"LOD_TRIANGLE_BUDGETS = (.*)", script).group(1))
+for lod_path in ast.literal_eval(re.search(r"LOD_PATHS_STR = (.*)", script).group(1)):
+    open(lod_path, 'w').close()
+with open(os.path.join(os.path.dirname(sys.argv[0]), 'budgets.log'), 'a') as f:
+    f.write(f"{{budgets}}\\n")
+"""
+
+
+def test_decimated_meshes_are_exported_once_per_pose(tmp_path):
+    blender_path = tmp_path / 'blender'
+    blender_path.write_text(EXPORTING_BLENDER)
+    blender_path.chmod(blender_path.stat().st_mode | stat.S_IEXEC)
+    static_viz = StaticDataVisualizer(output_dir=str(tmp_path / 'static'))
+    static_viz.blender_path = str(blender_path)
+
+    static_viz.generate_static_gesture_from_file(EXAMPLE_STATIC_PATH, 'stl', lod_triangle_budgets=[500, 2000])
+    runs = (tmp_path / 'budgets.log').read_text().splitlines()
+    assert len(runs) > 1 and all(run == '[500, 2000]' for run in runs)
+    for idx in range(len(runs)):
+        for budget in [500, 2000]:
+            assert os.path.exists(static_viz.get_output_lod_path('example_static', 'Left', idx, budget, 'stl'))
+
+    # The same poses again: the cached decimated meshes are copied, blender only exports the full meshes
+    os.remove(static_viz.get_output_lod_path('example_static', 'Left', 0, 500, 'stl'))
+    static_viz.generate_static_gesture_from_file(EXAMPLE_STATIC_PATH, 'stl', lod_triangle_budgets=[500, 2000])
+    second_runs = (tmp_path / 'budgets.log').read_text().splitlines()[len(runs):]
+    assert second_runs == ['[]'] * len(runs)
+    assert os.path.exists(static_viz.get_output_lod_path('example_static', 'Left', 0, 500, 'stl'))
+
+
+def test_decimated_meshes_are_dropped_for_blend_files(tmp_path):
+    blender_path = tmp_path / 'blender'
+    blender_path.write_text(EXPORTING_BLENDER)
+    blender_path.chmod(blender_path.stat().st_mode | stat.S_IEXEC)
+    static_viz = StaticDataVisualizer(output_dir=str(tmp_path / 'static'))
+    static_viz.blender_path = str(blender_path)
+
+    static_viz.generate_static_gesture_from_file(EXAMPLE_STATIC_PATH, 'blend', lod_triangle_budgets=[500])
+    assert set((tmp_path / 'budgets.log').read_text().splitlines()) == {'[]'}
+    assert os.path.exists(static_viz.get_output_file_path('example_static', 'Left', 0, 'blend'))
+    assert not os.path.exists(tmp_path / 'static' / 'lod')
+
+
+# Stands in for blender running blender_script_atlas.py: writes the image and the cell rectangles row by row
+ATLAS_BLENDER = f"""#!{sys.executable}
+import ast, json, re, sys
+from PIL import Image
+script = open(sys.argv[-1]).read()
+samples = ast.literal_eval(re.search(r"^samples = (.*)$", script, re.M).group(1))
+columns = int(re.search(r"COLUMNS = (\\d+)", script).group(1))
+cell_pixels = int(re.search(r"CELL_PIXELS = (\\d+)", script).group(1))
+rows = -(-len(samples) // columns)
+Image.new('RGBA', (columns * cell_pixels, rows * cell_pixels)).save(
+    re.search(r"ATLAS_PNG_STR = R'(.*)'", script).group(1))
+cells = [{{'x': idx % columns * cell_pixels, 'y': idx // columns * cell_pixels,
+           'width': cell_pixels, 'height': cell_pixels}} for idx in range(len(samples))]
+with open(re.search(r"ATLAS_CELLS_STR = R'(.*)'", script).group(1), 'w') as f:
+    json.dump(cells, f)
+"""
+
+
+def test_atlas_cells_list_source_and_sample(tmp_path):
+    blender_path = tmp_path / 'blender'
+    blender_path.write_text(ATLAS_BLENDER)
+    blender_path.chmod(blender_path.stat().st_mode | stat.S_IEXEC)
+    static_viz = StaticDataVisualizer(output_dir=str(tmp_path / 'static'))
+    static_viz.blender_path = str(blender_path)
+    with open(EXAMPLE_STATIC_PATH, 'r') as f:
+        lines = f.read().splitlines()
+    right_path = tmp_path / 'right.txt'
+    right_path.write_text('\n'.join(['fist', 'Right'] + lines[2:]) + '\n')
+    invalid_path = tmp_path / 'invalid.txt'
+    invalid_path.write_text('\n'.join(lines[:3] + ['none'] + lines[4:]) + '\n')  # first value is not a number
+
+    static_viz.generate_static_atlas_from_files([EXAMPLE_STATIC_PATH, str(invalid_path), str(right_path)],
+                                                columns=2, cell_pixels=64)
+
+    with open(tmp_path / 'static' / 'png' / 'atlas_Left_atlas.json', 'r') as f:
+        left_cells = json.load(f)
+    with open(tmp_path / 'static' / 'png' / 'atlas_Right_atlas.json', 'r') as f:
+        right_cells = json.load(f)
+    assert [cell['sample'] for cell in left_cells] == list(range(len(left_cells)))
+    assert all(cell['source'] == os.path.abspath(EXAMPLE_STATIC_PATH) for cell in left_cells)
+    assert {cell['label'] for cell in right_cells} == {'fist'}
+    assert [(cell['x'], cell['y']) for cell in right_cells[:3]] == [(0, 0), (64, 0), (0, 64)]
+    with Image.open(tmp_path / 'static' / 'png' / 'atlas_Left_atlas.png') as img:
+        assert img.size == (128, 64 * -(-len(left_cells) // 2))
+
+
+def test_atlas_of_failed_render_leaves_no_cells(tmp_path):
+    static_viz = create_visualizer(tmp_path)
+    cells_path = tmp_path / 'static' / 'png' / 'atlas_Left_atlas.json'
+    cells_path.write_text('[]')  # from an earlier run
+    static_viz.generate_static_atlas_from_files([EXAMPLE_STATIC_PATH])
+    assert not cells_path.exists()
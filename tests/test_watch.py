@@ -0,0 +1,40 @@
+import os
+import shutil
+
+from visualization.watch import InputWatcher
+from visualization.work_queue import RenderQueue
+
+EXAMPLE_STATIC_PATH = os.path.join(os.path.dirname(__file__), '..', 'example_static.txt')
+
+
+def test_state_file_in_watched_folder_is_not_scanned(tmp_path):
+    input_path = tmp_path / 'example_static.txt'
+    shutil.copyfile(EXAMPLE_STATIC_PATH, input_path)
+    state_path = tmp_path / 'state.json'  # same extension as dynamic input files
+    queue = RenderQueue(str(tmp_path / 'queue.sqlite'))
+    watcher = InputWatcher(queue, [str(tmp_path)], str(state_path), static_output_dir=str(tmp_path / 'static'),
+                           dynamic_output_dir=str(tmp_path / 'dynamic'), settle_seconds=0.0)
+
+    assert watcher.scan()['changed_files'] == 1
+    assert os.path.exists(state_path)
+    assert watcher.scan() == {'changed_files': 0, 'enqueued': 0, 'removed': 0}
+    assert list(watcher.state) == [str(input_path)]
+
+
+def test_pose_outputs_are_tracked_and_state_is_saved_once_per_scan(tmp_path, monkeypatch):
+    input_dir = tmp_path / 'inputs'
+    input_dir.mkdir()
+    for name in ['a.txt', 'b.txt', 'c.txt']:
+        shutil.copyfile(EXAMPLE_STATIC_PATH, input_dir / name)
+    queue = RenderQueue(str(tmp_path / 'queue.sqlite'))
+    watcher = InputWatcher(queue, [str(input_dir)], str(tmp_path / 'state.json'), file_type='pose',
+                           static_output_dir=str(tmp_path / 'static'), dynamic_output_dir=str(tmp_path / 'dynamic'),
+                           settle_seconds=0.0)
+    replaced = []
+    monkeypatch.setattr(os, 'replace', lambda src, dst: replaced.append(dst) or os.rename(src, dst))
+
+    assert watcher.scan()['changed_files'] == 3
+    assert replaced == [str(tmp_path / 'state.json')]
+    assert queue.counts()['pending'] == 3  # one job per file, the samples share one pose file
+    assert watcher.state[str(input_dir / 'a.txt')]['samples'][0]['outputs'] == \
+        [watcher.static_viz.get_output_pose_path('a', 'Left')]
@@ -0,0 +1,97 @@
+import json
+import os
+import shutil
+import stat
+import sys
+
+import pytest
+
+from visualization import readers
+from visualization import work_queue
+from visualization.work_queue import RenderQueue, RenderWorker
+
+EXAMPLE_DYNAMIC_PATH = os.path.join(os.path.dirname(__file__), '..', 'example_dynamic.json')
+EXAMPLE_STATIC_PATH = os.path.join(os.path.dirname(__file__), '..', 'example_static.txt')
+
+# Stands in for blender: writes the blend file that the dynamic script would save
+FAKE_BLENDER = f"""#!{sys.executable}
+import re, sys
+script = open(sys.argv[-1]).read()
+path = re.search(r"BLEND_PATH_STR = R'(.*)'", script).group(1)
+open(path, 'w').write('blend')
+"""
+
+
+def create_worker(tmp_path, queue: RenderQueue) -> RenderWorker:
+    blender_path = tmp_path / 'blender'
+    blender_path.write_text(FAKE_BLENDER)
+    blender_path.chmod(blender_path.stat().st_mode | stat.S_IEXEC)
+    worker = RenderWorker(queue, str(tmp_path / 'static'), str(tmp_path / 'dynamic'), worker_id='test')
+    worker.dynamic_viz.blender_path = str(blender_path)
+    worker.static_viz.blender_path = str(blender_path)
+    return worker
+
+
+def test_invalid_dynamic_job_after_valid_job_fails(tmp_path):
+    valid_path = tmp_path / 'valid.json'
+    invalid_path = tmp_path / 'invalid.json'
+    shutil.copyfile(EXAMPLE_DYNAMIC_PATH, valid_path)
+    shutil.copyfile(EXAMPLE_DYNAMIC_PATH, invalid_path)
+
+    queue = RenderQueue(str(tmp_path / 'queue.sqlite'), max_attempts=1)
+    queue.enqueue_dynamic_file(str(valid_path), gesture_indices=[0])
+    queue.enqueue_dynamic_file(str(invalid_path), gesture_indices=[0])
+
+    # Same label and hand as the valid file, so the outputs of the first job already exist
+    gesture_data = json.loads(invalid_path.read_text())
+    gesture_data[0]['startToHold'][0]['spread'][0] = 'not a number'
+    invalid_path.write_text(json.dumps(gesture_data))
+
+    worker = create_worker(tmp_path, queue)
+    assert worker.run(stop_when_empty=True) == 2
+
+    assert queue.counts() == {work_queue.STATE_PENDING: 0, work_queue.STATE_LEASED: 0,
+                              work_queue.STATE_DONE: 1, work_queue.STATE_FAILED: 1}
+    label, hand = gesture_data[0]['letter'], gesture_data[0]['hand']
+    assert os.listdir(tmp_path / 'dynamic') == [f"dynamic_{label}_{hand}_0.blend"]
+
+
+def test_lease_renewal_keeps_job(tmp_path):
+    queue = RenderQueue(str(tmp_path / 'queue.sqlite'), lease_seconds=0.0)
+    queue.enqueue_dynamic_file(EXAMPLE_DYNAMIC_PATH)
+    job = queue.lease('first')
+    queue.lease_seconds = 60.0
+    assert queue.renew(job['id'], 'first')
+    assert queue.lease('second') is None
+    assert not queue.renew(job['id'], 'second')
+
+
+def test_pose_job_completes_and_unknown_file_type_is_rejected(tmp_path):
+    queue = RenderQueue(str(tmp_path / 'queue.sqlite'), max_attempts=1)
+    with pytest.raises(ValueError):
+        queue.enqueue_static_file(EXAMPLE_STATIC_PATH, 'gif')
+    queue.enqueue_static_file(EXAMPLE_STATIC_PATH, 'pose')
+
+    worker = create_worker(tmp_path, queue)
+    _, hand, _ = readers.read_wach_file(EXAMPLE_STATIC_PATH)
+    base_asset_path = worker.static_viz.get_base_asset_path(hand)  # no blender run needed for the base asset
+    os.makedirs(os.path.dirname(base_asset_path))
+    open(base_asset_path, 'w').close()
+    assert worker.run(stop_when_empty=True) == 1
+
+    assert queue.counts()[work_queue.STATE_DONE] == 1
+    assert os.path.exists(worker.static_viz.get_output_pose_path('example_static', hand))
+
+
+def test_output_of_earlier_run_does_not_count_as_success(tmp_path):
+    queue = RenderQueue(str(tmp_path / 'queue.sqlite'), max_attempts=1)
+    label, hand, data_samples = readers.read_wach_file(EXAMPLE_STATIC_PATH)
+    queue.enqueue_static_sample(label, hand, data_samples[0], 'stl')
+
+    worker = create_worker(tmp_path, queue)  # fails on the static script, nothing is written
+    stale_path = worker.static_viz.get_output_file_path(label, hand, 0, 'stl')
+    open(stale_path, 'w').close()
+    assert worker.run(stop_when_empty=True) == 1
+
+    assert queue.counts()[work_queue.STATE_FAILED] == 1
+    assert not os.path.exists(stale_path)
@@ -0,0 +1,127 @@
+import bpy
+import os
+import json
+from math import radians, ceil
+import mathutils
+from bpy_extras.object_utils import world_to_camera_view
+from visualization import pose
+
+
+"""
+    GLOBAL VARIABLES
+"""
+# These variables will be set in viz.py
+HAND = ''
+samples = []
+COLUMNS = 0
+CELL_PIXELS = 0
+ATLAS_PNG_STR = ''
+ATLAS_CELLS_STR = ''
+
+# Input Paths
+FBX_HAND_LEFT_FILE_PATH = os.path.abspath(
+    os.path.join(os.path.dirname(os.path.realpath(__file__)),
+                 R"resources/Manus-Hand-Left.fbx"))
+FBX_HAND_RIGHT_FILE_PATH = os.path.abspath(
+    os.path.join(os.path.dirname(os.path.realpath(__file__)),
+                 R"resources/Manus-Hand-Right.fbx"))
+
+# Output Paths
+ATLAS_PNG_PATH = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), ATLAS_PNG_STR))
+ATLAS_CELLS_PATH = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), ATLAS_CELLS_STR))
+
+# Layout (world units). The hand is centered like in the static PNG export, where a crop of 950 x 1000 px
+# shows about 0.25 x 0.25 units. In the image, columns go along world +Y and rows along world -X.
+HAND_CENTER = mathutils.Vector((0.09, -0.012574, 0.0))
+CELL_SIZE = 0.25
+CAMERA_DISTANCE = -0.7
+LIGHT_DISTANCE = -5.5
+
+# Convert values to float
+samples = [[float(e) for e in sample] for sample in samples]
+rows = ceil(len(samples) / COLUMNS)
+
+
+def get_cell_offset(idx):
+    return mathutils.Vector((-(idx // COLUMNS) * CELL_SIZE, (idx % COLUMNS) * CELL_SIZE, 0.0))
+
+
+"""
+    SCENE
+"""
+# Clean scene
+while bpy.data.objects:
+    bpy.data.objects.remove(bpy.data.objects[0], do_unlink=True)
+
+# Import FBX for right or left hand once
+fbx_path = FBX_HAND_LEFT_FILE_PATH if HAND == "Left" else FBX_HAND_RIGHT_FILE_PATH
+bpy.ops.import_scene.fbx(filepath=fbx_path, automatic_bone_orientation=True)
+scene = bpy.context.scene
+armature = bpy.data.objects['Armature']
+meshes = [o for o in bpy.data.objects if o.type == 'MESH']
+
+# One linked duplicate (shared armature and mesh data, own pose) per sample
+for idx, sample in enumerate(samples):
+    if idx == 0:
+        arm = armature
+    else:
+        arm = armature.copy()
+        scene.collection.objects.link(arm)
+        for mesh in meshes:
+            mesh_copy = mesh.copy()  # shares the mesh data
+            scene.collection.objects.link(mesh_copy)
+            if mesh.parent == armature:
+                mesh_copy.parent = arm
+            for modifier in mesh_copy.modifiers:
+                if modifier.type == 'ARMATURE':
+                    modifier.object = arm
+        arm.matrix_world = mathutils.Matrix.Translation(get_cell_offset(idx)) @ armature.matrix_world
+
+    for bone_name, rotation in pose.get_bone_rotations(sample, HAND).items():
+        pose_bone = arm.pose.bones[bone_name]
+        pose_bone.rotation_mode = 'QUATERNION'
+        pose_bone.rotation_quaternion = mathutils.Quaternion(rotation)  # (w, x, y, z)
+
+
+"""
+    RENDER
+"""
+# Orthographic camera over the whole grid (same orientation as the static PNG export)
+grid_center = HAND_CENTER + (get_cell_offset((rows - 1) * COLUMNS) + get_cell_offset(COLUMNS - 1)) / 2
+camera_obj = bpy.data.objects.new('Camera', bpy.data.cameras.new('Camera'))
+scene.collection.objects.link(camera_obj)
+camera_obj.data.type = 'ORTHO'
+camera_obj.data.ortho_scale = max(COLUMNS, rows) * CELL_SIZE
+camera_obj.location = mathutils.Vector((grid_center.x, grid_center.y, CAMERA_DISTANCE))
+camera_obj.rotation_euler = mathutils.Euler((radians(180.0), radians(0.0), radians(90.0)), 'XYZ')
+scene.camera = camera_obj
+
+# Light
+light_data = bpy.data.lights.new('Light', type='SUN')
+light_obj = bpy.data.objects.new('Light', light_data)
+scene.collection.objects.link(light_obj)
+light_obj.location = mathutils.Vector((grid_center.x, grid_center.y, LIGHT_DISTANCE))
+light_obj.rotation_euler = mathutils.Euler((radians(180.0), radians(0.0), radians(90.0)), 'XYZ')
+
+# Render all hands at once
+width, height = COLUMNS * CELL_PIXELS, rows * CELL_PIXELS
+scene.render.resolution_x = width
+scene.render.resolution_y = height
+scene.render.resolution_percentage = 100
+scene.render.film_transparent = True  # make render image transparent
+scene.render.image_settings.file_format = 'PNG'
+scene.render.filepath = ATLAS_PNG_PATH
+bpy.context.view_layer.update()
+bpy.ops.render.render(write_still=True)
+
+# Pixel rectangle of each cell (origin top left)
+cells = []
+for idx in range(len(samples)):
+    center = HAND_CENTER + get_cell_offset(idx)
+    corners = [world_to_camera_view(scene, camera_obj, center + mathutils.Vector((dx, dy, 0.0)))
+               for dx in (-CELL_SIZE / 2, CELL_SIZE / 2) for dy in (-CELL_SIZE / 2, CELL_SIZE / 2)]
+    x0, x1 = min(c.x for c in corners) * width, max(c.x for c in corners) * width
+    y0, y1 = (1 - max(c.y for c in corners)) * height, (1 - min(c.y for c in corners)) * height
+    cells.append({'x': round(x0), 'y': round(y0), 'width': round(x1 - x0), 'height': round(y1 - y0)})
+with open(ATLAS_CELLS_PATH, 'w') as f:
+    json.dump(cells, f)
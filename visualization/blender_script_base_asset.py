@@ -0,0 +1,37 @@
+import bpy
+import os
+
+
+"""
+    GLOBAL VARIABLES
+"""
+# These variables will be set in viz.py
+HAND = ''
+GLB_PATH_STR = ''
+
+# Input Paths
+FBX_HAND_LEFT_FILE_PATH = os.path.abspath(
+    os.path.join(os.path.dirname(os.path.realpath(__file__)),
+                 R"resources/Manus-Hand-Left.fbx"))
+FBX_HAND_RIGHT_FILE_PATH = os.path.abspath(
+    os.path.join(os.path.dirname(os.path.realpath(__file__)),
+                 R"resources/Manus-Hand-Right.fbx"))
+
+# Output Paths
+GLB_FILE_PATH = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), GLB_PATH_STR))
+
+
+"""
+    EXPORT
+"""
+# Clean scene
+while bpy.data.objects:
+    bpy.data.objects.remove(bpy.data.objects[0], do_unlink=True)
+
+# Import FBX for right or left hand
+fbx_path = FBX_HAND_LEFT_FILE_PATH if HAND == "Left" else FBX_HAND_RIGHT_FILE_PATH
+bpy.ops.import_scene.fbx(filepath=fbx_path, automatic_bone_orientation=True)
+
+# Export the skinned hand in rest pose (mesh, skeleton and skin weights)
+bpy.ops.export_scene.gltf(filepath=GLB_FILE_PATH, export_format='GLB', export_skins=True,
+                          export_animations=False)
@@ -3,6 +3,7 @@ import os
 from math import radians
 import mathutils
 import visualization.constraints as cnstr
+from visualization.frame_transfer import read_frame_arrays
 
 
 """
@@ -14,7 +15,11 @@ EXPORT_FILE_TYPE = ''
 BLEND_PATH_STR = ''
 LABEL = ''
 HAND = ''
-gesture_data = {}
+frames_descriptor = {}  # paths of the frame arrays (see frame_transfer.py)
+FPS = 0  # frame rate of the scene (0 keeps the blender default), set when the frames were resampled
+RENDER_FRAME_START = 0
+RENDER_FRAME_END = 0
+RENDER_PNG_DIR_STR = ''
 
 # Input Paths
 FBX_HAND_LEFT_FILE_PATH = os.path.abspath(
@@ -26,6 +31,7 @@ FBX_HAND_RIGHT_FILE_PATH = os.path.abspath(
 
 # Output Paths
 BLEND_FILE_PATH = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), BLEND_PATH_STR))
+RENDER_PNG_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), RENDER_PNG_DIR_STR))
 
 # Global variables
 WRIST_NAME = "hand"  # wrist object name in blender
@@ -40,11 +46,7 @@ QUAT_HAND_IDX_PROCESSED_DATA_END = 7
 """
     HELPER FUNCTION
 """
-def create_keyframe_for_data_sample(idx, data_sample):
-    rotation_data = data_sample['rotations']
-    spread_data = data_sample['spread']
-    stretch_data = data_sample['stretch']
-
+def create_keyframe_for_data_sample(idx, rotation_data, spread_data, stretch_data):
     # Rotate wrist and hand with rotation quaternions (for hand orientation)
     for name in [WRIST_NAME, HAND_NAME]:
         pose_bone_name = f"{name}_{HAND[0].lower()}" if name == WRIST_NAME else HAND_NAME
@@ -200,15 +202,19 @@ obj = bpy.data.objects['Armature']
 bpy.context.view_layer.objects.active = obj
 bpy.ops.object.mode_set(mode='POSE')  # pose mode for changing joint values
 
-# Process start_to_hold (dynamic part of the gesture)
-start_to_hold_data = gesture_data['startToHold']
-for idx, data_sample in enumerate(start_to_hold_data):
-    create_keyframe_for_data_sample(idx, data_sample)
+# Map the frame arrays (rows: start_to_hold, the dynamic part, followed by hold_to_end, the holding part)
+frame_arrays = read_frame_arrays(frames_descriptor)
+number_of_frames = frames_descriptor['start_to_hold'] + frames_descriptor['hold_to_end']
+for idx in range(number_of_frames):
+    create_keyframe_for_data_sample(idx, frame_arrays['rotations'][idx], frame_arrays['spread'][idx],
+                                    frame_arrays['stretch'][idx])
 
-# Process hold_to_end (holding part of the gesture)
-hold_to_end_data = gesture_data['holdToEnd']
-for idx, data_sample in enumerate(hold_to_end_data):
-    create_keyframe_for_data_sample(idx+len(start_to_hold_data), data_sample)
+# Play the keyframes at the rate they were resampled to
+if FPS > 0:
+    bpy.context.scene.render.fps = max(1, round(FPS))
+    bpy.context.scene.render.fps_base = bpy.context.scene.render.fps / FPS  # for rates like 29.97
+bpy.context.scene.frame_start = 1
+bpy.context.scene.frame_end = number_of_frames
 
 
 """
@@ -221,3 +227,32 @@ obj.hide_set(True)
 if EXPORT:
     if EXPORT_FILE_TYPE == "blend":
         bpy.ops.wm.save_mainfile(filepath=BLEND_FILE_PATH)
+
+# Render frame range as PNG images when set (same camera framing as blender_script_static.py)
+if RENDER_FRAME_END > 0:
+    scene = bpy.context.scene
+
+    # Camera
+    camera_obj = bpy.data.objects.new('Camera', bpy.data.cameras.new('Camera'))
+    scene.collection.objects.link(camera_obj)
+    camera_distance = -0.7
+    camera_obj.location = mathutils.Vector((0.09, -0.012574, camera_distance))
+    camera_obj.rotation_euler = mathutils.Euler((radians(180.155), radians(0.448426), radians(90.0183)), 'XYZ')
+    scene.camera = camera_obj
+
+    # Light
+    light_data = bpy.data.lights.new('Light', type='POINT')
+    light_data.energy = 1000.0
+    light_obj = bpy.data.objects.new('Light', light_data)
+    scene.collection.objects.link(light_obj)
+    light_distance = -5.5
+    light_obj.location = mathutils.Vector((0.091267, -0.002574, light_distance))
+    light_obj.rotation_euler = mathutils.Euler((radians(180.155), radians(0.448426), radians(90.0183)), 'XYZ')
+
+    # Render the frames of this process (keyframes start at frame 1)
+    scene.frame_start = RENDER_FRAME_START
+    scene.frame_end = RENDER_FRAME_END
+    scene.render.film_transparent = True  # make render image transparent
+    scene.render.image_settings.file_format = 'PNG'
+    scene.render.filepath = os.path.join(RENDER_PNG_DIR, 'frame_')  # blender appends the frame number
+    bpy.ops.render.render(animation=True)
@@ -0,0 +1,125 @@
+import bpy
+import json
+import os
+import socket
+from math import radians
+import mathutils
+from visualization import pose
+
+
+"""
+    GLOBAL VARIABLES
+"""
+# These variables will be set in service.py
+HOST = ''
+PORT = 0
+TOKEN = ''
+
+# Input Paths
+FBX_HAND_LEFT_FILE_PATH = os.path.abspath(
+    os.path.join(os.path.dirname(os.path.realpath(__file__)),
+                 R"resources/Manus-Hand-Left.fbx"))
+FBX_HAND_RIGHT_FILE_PATH = os.path.abspath(
+    os.path.join(os.path.dirname(os.path.realpath(__file__)),
+                 R"resources/Manus-Hand-Right.fbx"))
+
+# Camera and light for PNG renders (same as blender_script_static.py)
+CAMERA_LOCATION = (0.09, -0.012574, -0.7)
+LIGHT_LOCATION = (0.091267, -0.002574, -5.5)
+CAMERA_LIGHT_ROTATION = (radians(180.155), radians(0.448426), radians(90.0183))
+
+
+"""
+    HELPER FUNCTIONS
+"""
+def load_hand(hand):
+    # Remove the hand of an earlier request, camera and light are kept for PNG renders
+    if bpy.context.object is not None and bpy.context.object.mode != 'OBJECT':
+        bpy.ops.object.mode_set(mode='OBJECT')
+    for obj in list(bpy.data.objects):
+        if obj.type not in ['CAMERA', 'LIGHT']:
+            bpy.data.objects.remove(obj, do_unlink=True)
+
+    # Import FBX for right or left hand
+    fbx_path = FBX_HAND_LEFT_FILE_PATH if hand == "Left" else FBX_HAND_RIGHT_FILE_PATH
+    bpy.ops.import_scene.fbx(filepath=fbx_path, automatic_bone_orientation=True)
+
+    # Select Hand Models Armature as Active
+    armature = next(obj for obj in bpy.data.objects if obj.type == 'ARMATURE')
+    bpy.context.view_layer.objects.active = armature
+    bpy.ops.object.mode_set(mode='POSE')  # pose mode for changing joint values
+    for pose_bone in armature.pose.bones:
+        pose_bone.rotation_mode = 'QUATERNION'
+    return armature
+
+
+def apply_sample(armature, hand, sample_values):
+    # Same rotations as blender_script_static.py, computed by pose.py
+    for bone_name, rotation in pose.get_bone_rotations(sample_values, hand).items():
+        armature.pose.bones[bone_name].rotation_quaternion = mathutils.Quaternion(rotation)  # (w, x, y, z)
+    bpy.context.view_layer.update()
+
+
+def export(file_type, path):
+    if file_type == "stl":
+        bpy.ops.export_mesh.stl(filepath=path)  # STL file
+    elif file_type == "obj":
+        bpy.ops.export_scene.obj(filepath=path)  # obj file
+    elif file_type == "blend":
+        # Camera and light are only part of the scene for PNG renders
+        extras = [(obj, list(obj.users_collection)) for obj in bpy.data.objects if obj.type in ['CAMERA', 'LIGHT']]
+        for obj, collections in extras:
+            for collection in collections:
+                collection.objects.unlink(obj)
+        try:
+            bpy.ops.wm.save_as_mainfile(filepath=path, copy=True)  # blend file
+        finally:
+            for obj, collections in extras:
+                for collection in collections:
+                    collection.objects.link(obj)
+    elif file_type == "png":
+        bpy.context.scene.render.filepath = path
+        bpy.ops.render.render(write_still=True)
+    else:
+        raise ValueError(f"File type for export not supported: {file_type}")
+
+
+"""
+    SERVER
+"""
+# Clean scene of the default cube
+if 'Cube' in bpy.data.objects:
+    bpy.data.objects.remove(bpy.data.objects['Cube'], do_unlink=True)
+
+# Camera and light are placed once
+camera_obj = bpy.data.objects['Camera']
+camera_obj.location = mathutils.Vector(CAMERA_LOCATION)
+camera_obj.rotation_euler = mathutils.Euler(CAMERA_LIGHT_ROTATION, 'XYZ')
+light_obj = bpy.data.objects['Light']
+light_obj.location = mathutils.Vector(LIGHT_LOCATION)
+light_obj.rotation_euler = mathutils.Euler(CAMERA_LIGHT_ROTATION, 'XYZ')
+bpy.context.scene.render.film_transparent = True  # make render image transparent
+bpy.context.scene.render.image_settings.file_format = 'PNG'
+
+# One request per json line: {"hand", "values", "file_type", "path"}, answered with {"ok"[, "error"]}
+connection = socket.create_connection((HOST, PORT))
+stream = connection.makefile('rw', encoding='utf-8')
+stream.write(json.dumps({'token': TOKEN}) + '\n')
+stream.flush()
+
+loaded_hand = None
+armature = None
+for line in stream:  # ends when the service closes the connection
+    try:
+        request = json.loads(line)
+        if request['hand'] != loaded_hand:
+            armature = load_hand(request['hand'])
+            loaded_hand = request['hand']
+        apply_sample(armature, request['hand'], [float(v) for v in request['values']])
+        export(request['file_type'], request['path'])
+        reply = {'ok': True}
+    except Exception as e:  # the process keeps serving, the service fails this request
+        reply = {'ok': False, 'error': repr(e)}
+    stream.write(json.dumps(reply) + '\n')
+    stream.flush()
+connection.close()
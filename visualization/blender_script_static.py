@@ -45,6 +45,8 @@ HAND = ''
 sample_values = []
 EXPORT_PNG = False
 EXPORT_PNG_STR = ''
+LOD_TRIANGLE_BUDGETS = []
+LOD_PATHS_STR = []
 
 
 # Input Paths
@@ -239,6 +241,23 @@ elif EXPORT_FILE_TYPE == "blend":
 elif EXPORT_FILE_TYPE == "obj":
     bpy.ops.export_scene.obj(filepath=OBJ_FILE_PATH)  # obj file
 
+# Export decimated meshes (level of detail) for each triangle budget
+if LOD_TRIANGLE_BUDGETS:
+    mesh_objs = [o for o in bpy.data.objects if o.type == 'MESH']
+    number_of_triangles = sum(len(p.vertices) - 2 for o in mesh_objs for p in o.data.polygons)
+    for triangle_budget, lod_path in zip(LOD_TRIANGLE_BUDGETS, LOD_PATHS_STR):
+        # Decimate the posed mesh (modifier after the armature modifier) by edge collapse
+        for mesh_obj in mesh_objs:
+            modifier = mesh_obj.modifiers.new(name='LOD', type='DECIMATE')
+            modifier.decimate_type = 'COLLAPSE'
+            modifier.ratio = min(1.0, triangle_budget / number_of_triangles)
+        if EXPORT_FILE_TYPE == "obj":
+            bpy.ops.export_scene.obj(filepath=lod_path)  # obj file
+        else:
+            bpy.ops.export_mesh.stl(filepath=lod_path)  # STL file
+        for mesh_obj in mesh_objs:
+            mesh_obj.modifiers.remove(mesh_obj.modifiers['LOD'])
+
 # Render and export PNG
 if EXPORT_PNG:  # Set camera and light positions when exporting as png
     # Camera
@@ -0,0 +1,118 @@
+import bpy
+import os
+import time
+from math import radians
+import mathutils
+import visualization.constraints as cnstr
+from visualization.stream import LatestFrameReceiver
+
+
+"""
+    GLOBAL VARIABLES
+"""
+# These variables will be set in viz.py
+HAND = ''
+HOST = ''
+PORT = 0
+DISPLAY_RATE = 0
+
+# Input Paths
+FBX_HAND_LEFT_FILE_PATH = os.path.abspath(
+    os.path.join(os.path.dirname(os.path.realpath(__file__)),
+                 R"resources/Manus-Hand-Left.fbx"))
+FBX_HAND_RIGHT_FILE_PATH = os.path.abspath(
+    os.path.join(os.path.dirname(os.path.realpath(__file__)),
+                 R"resources/Manus-Hand-Right.fbx"))
+
+# Global variables
+WRIST_NAME = "hand"  # wrist object name in blender
+HAND_NAME = "SK_Hand"  # hand object name in blender
+FINGER_NAMES = ["thumb", "index", "middle", "ring", "pinky"]  # finger object names in blender
+QUAT_WRIST_IDX_PROCESSED_DATA_START = 0  # Indices for w,x,y,z quat values in the processed data format in 'rotations'
+QUAT_WRIST_IDX_PROCESSED_DATA_END = 3
+QUAT_HAND_IDX_PROCESSED_DATA_START = 4
+QUAT_HAND_IDX_PROCESSED_DATA_END = 7
+METRICS_INTERVAL = 5.0  # seconds between latency reports
+
+# Conversion of (stretch, spread) into degrees per joint; the spread only applies to the first joint
+STRETCH_CONVERSIONS = {
+    "thumb": [cnstr.get_stretch_thumb_cmc_constraint_degree,
+              cnstr.get_stretch_thumb_mcp_constraint_degree,
+              cnstr.get_stretch_thumb_ip_constraint_degree],
+    "finger": [cnstr.get_stretch_finger_mcp_rest_constraint_degree,
+               cnstr.get_stretch_finger_pip_constraint_degree,
+               cnstr.get_stretch_finger_dip_constraint_degree]
+}
+
+
+"""
+    HELPER FUNCTION
+"""
+def apply_frame(frame):
+    rotation_data = frame['rotations']
+    spread_data = frame['spread']
+    stretch_data = frame['stretch']
+
+    # Rotate wrist and hand with rotation quaternions (for hand orientation)
+    for name in [WRIST_NAME, HAND_NAME]:
+        pose_bone_name = f"{name}_{HAND[0].lower()}" if name == WRIST_NAME else HAND_NAME
+        start_idx = QUAT_WRIST_IDX_PROCESSED_DATA_START if name == WRIST_NAME else QUAT_HAND_IDX_PROCESSED_DATA_START
+        end_idx = QUAT_WRIST_IDX_PROCESSED_DATA_END if name == WRIST_NAME else QUAT_HAND_IDX_PROCESSED_DATA_END
+        pose_bones[pose_bone_name].rotation_quaternion = mathutils.Quaternion(
+            tuple(rotation_data[start_idx:end_idx + 1]))  # (w, x, y, z)
+
+    # Traverse all fingers and apply joint value rotations to all joints
+    for finger_name_idx, finger_name in enumerate(FINGER_NAMES):
+        conversions = STRETCH_CONVERSIONS["thumb" if finger_name == "thumb" else "finger"]
+        for joint_idx in range(3):  # model indices (1,2,3): cmc, mcp, ip (thumb) or mcp, pip, dip (finger)
+            stretch_value_degree = conversions[joint_idx](stretch_data[finger_name_idx][joint_idx])
+            spread_value_degree = 0.0
+            if joint_idx == 0:
+                spread_value = spread_data[finger_name_idx]
+                spread_value_degree = cnstr.get_spread_thumb_cmc_constraint_degree(spread_value) \
+                    if finger_name == "thumb" else cnstr.get_spread_finger_constraint_degree(spread_value)
+
+            # EULER: (X, Y, Z) ==> (axis_spread, 0.0, -1*axis_stretch)
+            rot_eul = mathutils.Euler(
+                (radians(spread_value_degree), radians(0.0), radians(-1 * stretch_value_degree)), 'XYZ')
+            pose_bones[f"{finger_name}_0{joint_idx + 1}_{HAND[0].lower()}"].rotation_quaternion = \
+                rot_eul.to_quaternion()
+
+
+def update_pose():
+    # Only the newest frame is applied, older ones are dropped by the receiver
+    frame = receiver.poll()
+    if frame is not None:
+        apply_frame(frame)
+        receiver.mark_displayed(frame)
+
+    global last_report
+    if time.time() - last_report > METRICS_INTERVAL:
+        print("Stream metrics:", receiver.get_latency_metrics())
+        last_report = time.time()
+    return 1.0 / DISPLAY_RATE  # seconds until next call
+
+
+"""
+    STREAM
+"""
+# Clean scene
+while bpy.data.objects:
+    bpy.data.objects.remove(bpy.data.objects[0], do_unlink=True)
+
+# Import FBX for right or left hand
+fbx_path = FBX_HAND_LEFT_FILE_PATH if HAND == "Left" else FBX_HAND_RIGHT_FILE_PATH
+bpy.ops.import_scene.fbx(filepath=fbx_path, automatic_bone_orientation=True)
+
+# Select Hand Models Armature as Active
+obj = bpy.data.objects['Armature']
+bpy.context.view_layer.objects.active = obj
+bpy.ops.object.mode_set(mode='POSE')  # pose mode for changing joint values
+pose_bones = obj.pose.bones
+for pose_bone in pose_bones:
+    pose_bone.rotation_mode = 'QUATERNION'
+
+# Poll the socket at display rate while the blender UI is open
+receiver = LatestFrameReceiver(HOST, PORT)
+last_report = time.time()
+bpy.app.timers.register(update_pose, first_interval=0.0, persistent=True)
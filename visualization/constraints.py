@@ -113,3 +113,32 @@ def get_stretch_finger_mcp_rest_constraint_degree(norm_value: float) -> float:
     to_upper_bound = STRETCH_FINGER_MCP_REST_CONSTRAINT_DEGR[1]
     return scale_range_for_value(from_lower_bound, from_upper_bound,
                                  to_lower_bound, to_upper_bound, norm_value)
+
+
+"""
+Conversion of whole samples in WACH format.
+"""
+# Conversion function for each index of a sample in WACH format
+WACH_DEGREE_CONVERSIONS = [
+    get_spread_thumb_cmc_constraint_degree,  # thumb spread
+    get_spread_finger_constraint_degree,  # index spread
+    get_spread_finger_constraint_degree,  # middle spread
+    get_spread_finger_constraint_degree,  # ring spread
+    get_spread_finger_constraint_degree,  # pinky spread
+    get_stretch_thumb_cmc_constraint_degree,  # thumb stretch cmc
+    get_stretch_thumb_mcp_constraint_degree,  # thumb stretch mcp
+    get_stretch_thumb_ip_constraint_degree,  # thumb stretch ip
+] + [
+    get_stretch_finger_mcp_rest_constraint_degree,  # finger stretch mcp
+    get_stretch_finger_pip_constraint_degree,  # finger stretch pip
+    get_stretch_finger_dip_constraint_degree  # finger stretch dip
+] * 4  # index, middle, ring, pinky
+
+
+def convert_wach_to_degrees(sample_values: list[float]) -> list[float]:
+    """
+    Transforms all normalized values of a sample in WACH format into degrees.
+    :param sample_values: Data sample in WACH format (20 values).
+    :return: Values in degree in the same order.
+    """
+    return [convert(float(value)) for convert, value in zip(WACH_DEGREE_CONVERSIONS, sample_values)]
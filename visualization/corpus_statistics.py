@@ -0,0 +1,305 @@
+import json
+import os
+from multiprocessing import Pool
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from visualization import pose
+from visualization import readers
+from visualization import validation
+
+NUMBER_OF_FEATURES = readers.NUMBER_OF_FEATURES
+FINGER_NAMES = pose.FINGER_NAMES
+JOINT_COLUMN_NAMES = ["spread", "cmc/mcp", "mcp/pip", "ip/dip"]  # thumb joints / finger joints
+STATISTICS = ['mean', 'variance', 'std', 'min', 'max']
+
+# Histogram range of each channel: its normalized range plus the tolerance of the validation
+HISTOGRAM_LOWER = validation.WACH_LOWER_BOUNDS - validation.DEFAULT_RANGE_TOLERANCE
+HISTOGRAM_UPPER = validation.WACH_UPPER_BOUNDS + validation.DEFAULT_RANGE_TOLERANCE
+
+
+def get_wach_index(finger_idx: int, column_idx: int) -> int:
+    """
+    Index in a sample in WACH format of a cell of the joint layout (one row per finger, columns spread and the
+    stretch of the three joints, as in blender_script_static.py).
+    :param finger_idx: Row, 0 (thumb) to 4 (pinky).
+    :param column_idx: 0 for spread, 1 to 3 for the stretch of the joints from the palm outwards.
+    :return: Index in the sample.
+    """
+    if column_idx == 0:
+        return finger_idx
+    return len(FINGER_NAMES) + 3 * finger_idx + column_idx - 1
+
+
+class RunningStatistics:
+    """
+    Count, mean, variance, minimum, maximum and histogram of each of the 20 WACH channels, updated in one pass
+    (Welford/Chan). Two instances can be merged, e.g. the results of several worker processes.
+    """
+
+    def __init__(self, bins: int = 20) -> None:
+        self.bins = bins
+        self.count = 0
+        self.mean = np.zeros(NUMBER_OF_FEATURES)
+        self.m2 = np.zeros(NUMBER_OF_FEATURES)  # sum of squared differences from the mean
+        self.min = np.full(NUMBER_OF_FEATURES, np.inf)
+        self.max = np.full(NUMBER_OF_FEATURES, -np.inf)
+        self.histogram = np.zeros((NUMBER_OF_FEATURES, bins), dtype=np.int64)
+
+    def __combine(self, count: int, mean: np.ndarray, m2: np.ndarray) -> None:
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean = self.mean + delta * (count / total)
+        self.m2 = self.m2 + m2 + delta ** 2 * (self.count * count / total)
+        self.count = total
+
+    def update(self, samples: np.ndarray) -> None:
+        """
+        Adds a batch of samples.
+        :param samples: Array of shape (n, 20) in WACH format.
+        :return: None
+        """
+        samples = np.asarray(samples, dtype=np.float64).reshape(-1, NUMBER_OF_FEATURES)
+        if not len(samples):
+            return
+        batch_mean = samples.mean(axis=0)
+        self.__combine(len(samples), batch_mean, ((samples - batch_mean) ** 2).sum(axis=0))
+        self.min = np.minimum(self.min, samples.min(axis=0))
+        self.max = np.maximum(self.max, samples.max(axis=0))
+
+        # Bin of each value (values outside the range are counted in the first or last bin)
+        positions = (samples - HISTOGRAM_LOWER) / (HISTOGRAM_UPPER - HISTOGRAM_LOWER)
+        bin_indices = np.clip((positions * self.bins).astype(np.int64), 0, self.bins - 1)
+        for channel in range(NUMBER_OF_FEATURES):
+            self.histogram[channel] += np.bincount(bin_indices[:, channel], minlength=self.bins)
+
+    def merge(self, other: 'RunningStatistics') -> None:
+        """
+        Adds the samples summarized by another instance with the same number of bins.
+        :param other: Statistics to add.
+        :return: None
+        """
+        if other.bins != self.bins:
+            raise ValueError("Statistics with different numbers of bins cannot be merged!")
+        if not other.count:
+            return
+        self.__combine(other.count, other.mean, other.m2)
+        self.min = np.minimum(self.min, other.min)
+        self.max = np.maximum(self.max, other.max)
+        self.histogram += other.histogram
+
+    @property
+    def variance(self) -> np.ndarray:
+        return self.m2 / (self.count - 1) if self.count > 1 else np.zeros(NUMBER_OF_FEATURES)
+
+    @property
+    def std(self) -> np.ndarray:
+        return np.sqrt(self.variance)
+
+    def get(self, statistic: str) -> np.ndarray:
+        """
+        :param statistic: One of STATISTICS.
+        :return: Value of each channel.
+        """
+        if statistic not in STATISTICS:
+            raise ValueError(f"Statistic must be one of {STATISTICS}!")
+        return getattr(self, statistic)
+
+    def to_dict(self) -> dict:
+        return {'bins': self.bins, 'count': self.count, 'mean': self.mean.tolist(), 'm2': self.m2.tolist(),
+                'min': self.min.tolist(), 'max': self.max.tolist(), 'histogram': self.histogram.tolist()}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'RunningStatistics':
+        statistics = cls(data['bins'])
+        statistics.count = data['count']
+        for name in ['mean', 'm2', 'min', 'max']:
+            setattr(statistics, name, np.asarray(data[name], dtype=np.float64))
+        statistics.histogram = np.asarray(data['histogram'], dtype=np.int64)
+        return statistics
+
+
+class CorpusStatistics:
+    """
+    RunningStatistics per label and hand of a corpus of WACH files and processed json files. Dynamic gestures are
+    summarized frame by frame in the same layout (spread followed by the stretch of each finger).
+    """
+
+    def __init__(self, bins: int = 20) -> None:
+        self.bins = bins
+        self.groups = {}  # (label, hand) -> RunningStatistics
+
+    def add_samples(self, label: str, hand: str, samples: np.ndarray) -> None:
+        """
+        Adds samples in WACH format of a label and hand.
+        :param label: Name of the performed gesture.
+        :param hand: 'Left' or 'Right' hand.
+        :param samples: Array of shape (n, 20).
+        :return: None
+        """
+        self.groups.setdefault((label, hand), RunningStatistics(self.bins)).update(samples)
+
+    def add_file(self, file_path: str) -> bool:
+        """
+        Adds all samples of a WACH file (.txt) or all frames of a processed json file (.json).
+        :param file_path: Path of the file.
+        :return: False if the file was skipped because it is not valid.
+        """
+        if file_path.endswith('.json'):
+            gesture_data = readers.read_dynamic_file(file_path)
+            report = validation.validate_dynamic_gestures(gesture_data, file_path)
+            if not report.ok:
+                print(report)
+                return False
+            for gesture in gesture_data:
+                frames = gesture['startToHold'] + gesture['holdToEnd']
+                spread = np.asarray([frame['spread'] for frame in frames], dtype=np.float64)
+                stretch = np.asarray([frame['stretch'] for frame in frames], dtype=np.float64).reshape(len(frames), -1)
+                self.add_samples(str(gesture['letter']), gesture['hand'], np.hstack([spread, stretch]))
+        else:
+            report = validation.validate_wach_file(file_path)
+            if not report.ok:
+                print(report)
+                return False
+            label, hand, data_samples = readers.read_wach_file(file_path)
+            self.add_samples(label, hand, np.asarray(data_samples, dtype=np.float64))
+        return True
+
+    def merge(self, other: 'CorpusStatistics') -> None:
+        """
+        Adds the groups of another instance.
+        :param other: Statistics to add.
+        :return: None
+        """
+        for key, statistics in other.groups.items():
+            self.groups.setdefault(key, RunningStatistics(self.bins)).merge(statistics)
+
+    def total(self, hand: str = None) -> RunningStatistics:
+        """
+        Statistics over all labels (of one hand or of both hands).
+        :param hand: 'Left', 'Right' or None for both.
+        :return: Merged statistics.
+        """
+        total = RunningStatistics(self.bins)
+        for (_, group_hand), statistics in self.groups.items():
+            if hand is None or group_hand == hand:
+                total.merge(statistics)
+        return total
+
+    def save(self, path: str) -> None:
+        """
+        Saves the statistics as json file.
+        :param path: File path.
+        :return: None
+        """
+        with open(path, 'w') as f:
+            json.dump({'bins': self.bins,
+                       'groups': [{'label': label, 'hand': hand, **statistics.to_dict()}
+                                  for (label, hand), statistics in sorted(self.groups.items())]}, f)
+
+    @classmethod
+    def load(cls, path: str) -> 'CorpusStatistics':
+        """
+        Loads statistics saved with save().
+        :param path: File path.
+        :return: The statistics.
+        """
+        with open(path, 'r') as f:
+            data = json.load(f)
+        corpus = cls(data['bins'])
+        for group in data['groups']:
+            corpus.groups[(group['label'], group['hand'])] = RunningStatistics.from_dict(group)
+        return corpus
+
+    def render_heatmaps(self, output_dir: str, statistic: str = 'mean', cell_pixels: int = 64) -> list[str]:
+        """
+        Renders one heatmap per label and hand (see render_heatmap).
+        :param output_dir: Folder of the images ({label}_{hand}_{statistic}_heatmap.png).
+        :param statistic: One of STATISTICS.
+        :param cell_pixels: Size of a cell in pixels.
+        :return: Paths of the written images.
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        paths = []
+        for (label, hand), statistics in sorted(self.groups.items()):
+            path = os.path.join(output_dir, f"{label}_{hand}_{statistic}_heatmap.png")
+            render_heatmap(statistics.get(statistic), path, f"{label} {hand} {statistic} (n={statistics.count})",
+                           cell_pixels)
+            paths.append(path)
+        return paths
+
+
+def _summarize_file(args: tuple[str, int]) -> CorpusStatistics:
+    file_path, bins = args
+    corpus = CorpusStatistics(bins)
+    corpus.add_file(file_path)
+    return corpus
+
+
+def summarize_files(file_paths: list[str], processes: int = None, bins: int = 20) -> CorpusStatistics:
+    """
+    Summarizes WACH and processed json files in one pass. The files are read by several processes, each file
+    at once, so only the files being read have to fit into memory; the per file statistics are merged.
+    :param file_paths: Paths of .txt and .json files.
+    :param processes: Number of worker processes (default: number of cores, 1 reads in this process).
+    :param bins: Number of histogram bins per channel.
+    :return: Statistics per label and hand.
+    """
+    corpus = CorpusStatistics(bins)
+    if processes == 1:
+        for file_path in file_paths:
+            corpus.add_file(file_path)
+        return corpus
+    with Pool(processes) as pool:
+        for file_corpus in pool.imap_unordered(_summarize_file, [(path, bins) for path in file_paths], chunksize=4):
+            corpus.merge(file_corpus)
+    return corpus
+
+
+def _get_color(position: float) -> tuple[int, int, int]:
+    # Blue (low) over white to red (high)
+    position = min(1.0, max(0.0, position))
+    if position < 0.5:
+        t = position * 2
+        return int(59 + (255 - 59) * t), int(76 + (255 - 76) * t), int(192 + (255 - 192) * t)
+    t = (position - 0.5) * 2
+    return int(255 - (255 - 180) * t), int(255 - 255 * t), int(255 - (255 - 38) * t)
+
+
+def render_heatmap(values: np.ndarray, png_path: str, title: str = '', cell_pixels: int = 64,
+                   value_range: tuple[float, float] = None) -> None:
+    """
+    Draws the 20 values of a sample in WACH format (e.g. a mean or variance) as heatmap over the joint layout:
+    one row per finger, columns spread and the stretch of the three joints.
+    :param values: 20 values.
+    :param png_path: Output PNG path.
+    :param title: Text above the grid.
+    :param cell_pixels: Size of a cell in pixels.
+    :param value_range: Values mapped to the ends of the color scale (default: minimum and maximum of the values).
+    :return: None
+    """
+    values = np.asarray(values, dtype=np.float64)
+    low, high = value_range if value_range else (float(np.nanmin(values)), float(np.nanmax(values)))
+    scale = high - low if high > low else 1.0
+
+    label_width, header_height = 2 * cell_pixels, cell_pixels // 2
+    title_height = cell_pixels // 2 if title else 0
+    img = Image.new('RGB', (label_width + len(JOINT_COLUMN_NAMES) * cell_pixels,
+                            title_height + header_height + len(FINGER_NAMES) * cell_pixels), 'white')
+    draw = ImageDraw.Draw(img)
+    if title:
+        draw.text((4, 4), title, fill='black')
+    for column_idx, column_name in enumerate(JOINT_COLUMN_NAMES):
+        draw.text((label_width + column_idx * cell_pixels + 4, title_height + 4), column_name, fill='black')
+
+    for finger_idx, finger_name in enumerate(FINGER_NAMES):
+        top = title_height + header_height + finger_idx * cell_pixels
+        draw.text((4, top + cell_pixels // 2 - 6), finger_name, fill='black')
+        for column_idx in range(len(JOINT_COLUMN_NAMES)):
+            value = values[get_wach_index(finger_idx, column_idx)]
+            left = label_width + column_idx * cell_pixels
+            draw.rectangle((left, top, left + cell_pixels - 1, top + cell_pixels - 1),
+                           fill=_get_color((value - low) / scale), outline='gray')
+            draw.text((left + 4, top + cell_pixels // 2 - 6), f"{value:.3f}", fill='black')
+    img.save(png_path)
@@ -0,0 +1,45 @@
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+FIELDS = ['rotations', 'spread', 'stretch']
+
+
+def write_frame_arrays(gesture: dict, directory: str = None) -> dict:
+    """
+    Writes the frames of a gesture as one .npy file per field, so that blender can map them into memory instead of
+    parsing them from a python literal in its script.
+    :param gesture: Gesture with 'startToHold' and 'holdToEnd' frames.
+    :param directory: Folder for the files (default: a new temporary folder).
+    :return: Descriptor with the number of frames per phase, the folder and the path of each field.
+    """
+    directory = directory if directory else tempfile.mkdtemp(prefix='frames_')
+    frames = gesture['startToHold'] + gesture['holdToEnd']
+    descriptor = {'start_to_hold': len(gesture['startToHold']),
+                  'hold_to_end': len(gesture['holdToEnd']),
+                  'directory': os.path.abspath(directory)}
+    for field in FIELDS:
+        path = os.path.join(descriptor['directory'], f"{field}.npy")
+        np.save(path, np.asarray([frame[field] for frame in frames], dtype=np.float64))
+        descriptor[field] = path
+    return descriptor
+
+
+def read_frame_arrays(descriptor: dict) -> dict[str, np.ndarray]:
+    """
+    Maps the arrays written by write_frame_arrays into memory (read-only, without copying).
+    :param descriptor: Descriptor returned by write_frame_arrays.
+    :return: Array per field, one row per frame (startToHold followed by holdToEnd).
+    """
+    return {field: np.load(descriptor[field], mmap_mode='r') for field in FIELDS}
+
+
+def remove_frame_arrays(descriptor: dict) -> None:
+    """
+    Removes the folder of the arrays once blender is done.
+    :param descriptor: Descriptor returned by write_frame_arrays.
+    :return: None
+    """
+    shutil.rmtree(descriptor['directory'], ignore_errors=True)
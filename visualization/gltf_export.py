@@ -0,0 +1,202 @@
+import json
+import os
+import shutil
+import struct
+import tempfile
+from typing import Iterable
+
+from visualization import pose
+
+GLB_MAGIC = 0x46546C67  # 'glTF'
+GLB_VERSION = 2
+CHUNK_TYPE_JSON = 0x4E4F534A  # 'JSON'
+CHUNK_TYPE_BIN = 0x004E4942  # 'BIN\0'
+COMPONENT_TYPE_FLOAT = 5126
+DEFAULT_FPS = 24  # default frame rate of a blender scene
+
+
+def get_animated_bone_names(hand: str) -> list[str]:
+    """
+    Bones that are animated for a dynamic gesture: wrist, hand and the three joints of each finger.
+    :param hand: 'Left' or 'Right' hand.
+    :return: Bone names.
+    """
+    return [f"{pose.WRIST_NAME}_{hand[0].lower()}", pose.HAND_NAME] + \
+        [pose.get_bone_name(finger_name, joint_idx, hand) for finger_name in pose.FINGER_NAMES for joint_idx in range(3)]
+
+
+def read_glb(glb_path: str) -> tuple[dict, bytes]:
+    """
+    Reads a binary glTF file.
+    :param glb_path: File path.
+    :return: The json document and the binary chunk.
+    """
+    with open(glb_path, 'rb') as f:
+        magic, version, length = struct.unpack('<III', f.read(12))
+        if magic != GLB_MAGIC or version != GLB_VERSION:
+            raise ValueError(f"{glb_path} is not a glTF 2.0 binary file!")
+        document, binary = None, b''
+        while f.tell() < length:
+            chunk_length, chunk_type = struct.unpack('<II', f.read(8))
+            chunk = f.read(chunk_length)
+            if chunk_type == CHUNK_TYPE_JSON:
+                document = json.loads(chunk)
+            elif chunk_type == CHUNK_TYPE_BIN:
+                binary = chunk
+    return document, binary
+
+
+def multiply_quaternions(a: tuple, b: tuple) -> tuple[float, float, float, float]:
+    """
+    Hamilton product a * b of two quaternions given as (w, x, y, z).
+    """
+    aw, ax, ay, az = a
+    bw, bx, by, bz = b
+    return (aw * bw - ax * bx - ay * by - az * bz,
+            aw * bx + ax * bw + ay * bz - az * by,
+            aw * by - ax * bz + ay * bw + az * bx,
+            aw * bz + ax * by - ay * bx + az * bw)
+
+
+def _create_skeleton(document: dict, bone_names: list[str]) -> dict[str, int]:
+    """
+    Adds a node hierarchy armature -> wrist -> hand -> finger joints for files without base asset.
+    """
+    nodes = document.setdefault('nodes', [])
+    node_indices = {}
+
+    def add_node(name: str, parent: int = None) -> int:
+        nodes.append({'name': name})
+        if parent is not None:
+            nodes[parent].setdefault('children', []).append(len(nodes) - 1)
+        return len(nodes) - 1
+
+    root = add_node('Armature')
+    node_indices[bone_names[0]] = add_node(bone_names[0], root)
+    node_indices[bone_names[1]] = add_node(bone_names[1], node_indices[bone_names[0]])
+    for finger_name in pose.FINGER_NAMES:
+        parent = node_indices[bone_names[1]]
+        for joint_idx in range(3):
+            bone_name = [name for name in bone_names if name.startswith(f"{finger_name}_0{joint_idx + 1}_")][0]
+            parent = node_indices[bone_name] = add_node(bone_name, parent)
+    document.setdefault('scenes', [{'nodes': []}])
+    document['scenes'][document.get('scene', 0)]['nodes'].append(root)
+    document['scene'] = document.get('scene', 0)
+    return node_indices
+
+
+def export_gesture_animation(frames: Iterable[dict],
+                             hand: str,
+                             glb_path: str,
+                             name: str = 'gesture',
+                             fps: float = DEFAULT_FPS,
+                             frame_times: Iterable[float] = None,
+                             base_asset_path: str = None) -> int:
+    """
+    Writes the frames of a dynamic gesture as glTF animation (GLB) without blender. The rotation samplers are
+    streamed into temporary files frame by frame, so long recordings do not have to fit into memory twice.
+    :param frames: Frames with 'rotations', 'spread' and 'stretch' (e.g. startToHold followed by holdToEnd).
+    :param hand: 'Left' or 'Right' hand.
+    :param glb_path: Output file path.
+    :param name: Name of the animation.
+    :param fps: Frame rate used when no frame times are given (one frame per sample, like the blend export).
+    :param frame_times: Time in seconds of each frame (optional).
+    :param base_asset_path: Skinned hand model (see StaticDataVisualizer.get_base_asset_path). If given, the mesh is
+    included and the bone rotations are applied on top of the rest pose of its nodes. Otherwise only a skeleton is
+    written, whose node names match the base asset.
+    :return: Number of written frames.
+    """
+    bone_names = get_animated_bone_names(hand)
+    document, binary = read_glb(base_asset_path) if base_asset_path else ({}, b'')
+    document.setdefault('asset', {'version': '2.0'})
+
+    # Nodes that are animated and their rest rotation (glTF order x, y, z, w)
+    if base_asset_path:
+        node_indices = {node.get('name'): idx for idx, node in enumerate(document.get('nodes', []))}
+        missing = [bone_name for bone_name in bone_names if bone_name not in node_indices]
+        if missing:
+            raise ValueError(f"Bones {missing} not found in {base_asset_path}!")
+        node_indices = {bone_name: node_indices[bone_name] for bone_name in bone_names}
+    else:
+        node_indices = _create_skeleton(document, bone_names)
+    rest_rotations = {}
+    for bone_name, node_idx in node_indices.items():
+        x, y, z, w = document['nodes'][node_idx].get('rotation', [0.0, 0.0, 0.0, 1.0])
+        rest_rotations[bone_name] = (w, x, y, z)
+
+    # Stream times and rotations into one temporary file per sampler buffer
+    tmp_dir = tempfile.mkdtemp(prefix='gltf_')
+    try:
+        times_file = open(os.path.join(tmp_dir, 'times.bin'), 'wb')
+        rotation_files = [open(os.path.join(tmp_dir, f"{idx}.bin"), 'wb') for idx in range(len(bone_names))]
+        previous = [None] * len(bone_names)
+        times = iter(frame_times) if frame_times is not None else None
+        frame_count, t = 0, 0.0
+        t_min = t_max = None
+        try:
+            for frame in frames:
+                t = float(next(times)) if times is not None else frame_count / fps
+                t_min = t if t_min is None else min(t_min, t)
+                t_max = t if t_max is None else max(t_max, t)
+                times_file.write(struct.pack('<f', t))
+
+                rotations = pose.get_frame_bone_rotations(frame, hand)
+                for idx, bone_name in enumerate(bone_names):
+                    w, x, y, z = multiply_quaternions(rest_rotations[bone_name], rotations[bone_name])
+                    # Keep neighbouring keys in the same hemisphere so that they interpolate the short way
+                    if previous[idx] is not None and sum(a * b for a, b in zip(previous[idx], (w, x, y, z))) < 0:
+                        w, x, y, z = -w, -x, -y, -z
+                    previous[idx] = (w, x, y, z)
+                    rotation_files[idx].write(struct.pack('<ffff', x, y, z, w))
+                frame_count += 1
+        finally:
+            times_file.close()
+            for f in rotation_files:
+                f.close()
+        if frame_count == 0:
+            raise ValueError("A gesture needs at least one frame!")
+
+        # Buffer views and accessors behind the data of the base asset
+        buffer_parts = [os.path.join(tmp_dir, 'times.bin')] + \
+                       [os.path.join(tmp_dir, f"{idx}.bin") for idx in range(len(bone_names))]
+        offset = len(binary) + (-len(binary) % 4)
+        buffer_views = document.setdefault('bufferViews', [])
+        accessors = document.setdefault('accessors', [])
+        accessor_indices = []
+        for part_idx, part in enumerate(buffer_parts):
+            size = os.path.getsize(part)
+            buffer_views.append({'buffer': 0, 'byteOffset': offset, 'byteLength': size})
+            accessor = {'bufferView': len(buffer_views) - 1, 'componentType': COMPONENT_TYPE_FLOAT,
+                        'count': frame_count, 'type': 'SCALAR' if part_idx == 0 else 'VEC4'}
+            if part_idx == 0:
+                accessor.update({'min': [t_min], 'max': [t_max]})  # required for animation input
+            accessors.append(accessor)
+            accessor_indices.append(len(accessors) - 1)
+            offset += size
+        document['buffers'] = [{'byteLength': offset}]
+
+        samplers, channels = [], []
+        for idx, bone_name in enumerate(bone_names):
+            samplers.append({'input': accessor_indices[0], 'output': accessor_indices[idx + 1],
+                             'interpolation': 'LINEAR'})
+            channels.append({'sampler': idx, 'target': {'node': node_indices[bone_name], 'path': 'rotation'}})
+        document.setdefault('animations', []).append({'name': name, 'samplers': samplers, 'channels': channels})
+
+        # Write GLB: header, json chunk and binary chunk (copied from the temporary files)
+        json_chunk = json.dumps(document, separators=(',', ':')).encode('utf-8')
+        json_chunk += b' ' * (-len(json_chunk) % 4)
+        bin_length = offset + (-offset % 4)
+        total_length = 12 + 8 + len(json_chunk) + 8 + bin_length
+        with open(glb_path, 'wb') as out:
+            out.write(struct.pack('<III', GLB_MAGIC, GLB_VERSION, total_length))
+            out.write(struct.pack('<II', len(json_chunk), CHUNK_TYPE_JSON))
+            out.write(json_chunk)
+            out.write(struct.pack('<II', bin_length, CHUNK_TYPE_BIN))
+            out.write(binary + b'\0' * (-len(binary) % 4))
+            for part in buffer_parts:
+                with open(part, 'rb') as f:
+                    shutil.copyfileobj(f, out)
+            out.write(b'\0' * (-offset % 4))
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return frame_count
@@ -0,0 +1,286 @@
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Iterator
+
+QUANTILES = [0.5, 0.95, 0.99]
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'  # Prometheus text format
+
+# Metrics of the visualizers (label 'kind': static, dynamic, render, atlas or base_asset)
+BLENDER_PROCESSES = 'visualizer_blender_processes'
+BLENDER_SECONDS = 'visualizer_blender_seconds'
+SAMPLES_TOTAL = 'visualizer_samples_total'
+SAMPLES_PER_SECOND = 'visualizer_samples_per_second'
+
+# Metrics of the work queue and its workers
+QUEUE_JOBS = 'render_queue_jobs'
+JOBS_IN_FLIGHT = 'render_worker_jobs_in_flight'
+JOB_SECONDS = 'render_worker_job_seconds'
+JOBS_TOTAL = 'render_worker_jobs_total'
+JOBS_PER_SECOND = 'render_worker_jobs_per_second'
+
+# Metrics of the render service
+SERVICE_REQUESTS_TOTAL = 'render_service_requests_total'
+SERVICE_RENDERS_IN_FLIGHT = 'render_service_renders_in_flight'
+SERVICE_RENDER_SECONDS = 'render_service_render_seconds'
+SERVICE_CACHE_HIT_RATIO = 'render_service_cache_hit_ratio'
+
+# Metrics of the quantized pose cache
+POSE_CACHE_REQUESTS_TOTAL = 'pose_cache_requests_total'
+POSE_CACHE_BYTES = 'pose_cache_bytes'
+
+
+def _format_labels(labels: tuple) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{value}"' for key, value in labels) + '}'
+
+
+class MetricsRegistry:
+    """
+    Thread safe counters, gauges, latency summaries and event rates, written in the Prometheus text format.
+    Latency quantiles and rates are computed over a sliding window, so they show the current state of a long
+    running batch instead of its average since the start.
+    """
+
+    def __init__(self, window_size: int = 4096, rate_window_seconds: float = 60.0) -> None:
+        """
+        :param window_size: Number of latest observations per summary used for the quantiles.
+        :param rate_window_seconds: Time span over which event rates are computed.
+        """
+        self.window_size = window_size
+        self.rate_window_seconds = rate_window_seconds
+        self.__lock = threading.Lock()
+        self.__types = {}  # name -> (type, help)
+        self.__values = {}  # (name, labels) -> value of counters and gauges
+        self.__summaries = {}  # (name, labels) -> [count, sum, deque of latest observations]
+        self.__events = {}  # (name, labels) -> deque of event times
+        self.__collectors = []  # called before rendering, e.g. to read the depth of a queue
+
+    def __declare(self, name: str, metric_type: str) -> None:
+        if name not in self.__types:
+            self.__types[name] = (metric_type, '')
+
+    def describe(self, name: str, metric_type: str, help_text: str) -> None:
+        """
+        Sets type and description of a metric before it is used.
+        :param name: Metric name.
+        :param metric_type: 'counter', 'gauge' or 'summary'.
+        :param help_text: Description.
+        :return: None
+        """
+        with self.__lock:
+            self.__types[name] = (metric_type, help_text)
+
+    def inc(self, name: str, value: float = 1.0, labels: dict = None) -> None:
+        """
+        Increases a counter.
+        :param name: Metric name (should end with _total).
+        :param value: Increment.
+        :param labels: Label names and values.
+        :return: None
+        """
+        key = (name, tuple(sorted(labels.items())) if labels else ())
+        with self.__lock:
+            self.__declare(name, 'counter')
+            self.__values[key] = self.__values.get(key, 0.0) + value
+
+    def set(self, name: str, value: float, labels: dict = None) -> None:
+        """
+        Sets a gauge.
+        """
+        key = (name, tuple(sorted(labels.items())) if labels else ())
+        with self.__lock:
+            self.__declare(name, 'gauge')
+            self.__values[key] = float(value)
+
+    def add(self, name: str, value: float, labels: dict = None) -> None:
+        """
+        Changes a gauge by the given value (e.g. +1 / -1 for work in flight).
+        """
+        key = (name, tuple(sorted(labels.items())) if labels else ())
+        with self.__lock:
+            self.__declare(name, 'gauge')
+            self.__values[key] = self.__values.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, labels: dict = None) -> None:
+        """
+        Adds an observation (e.g. a latency in seconds) to a summary.
+        """
+        key = (name, tuple(sorted(labels.items())) if labels else ())
+        with self.__lock:
+            self.__declare(name, 'summary')
+            summary = self.__summaries.setdefault(key, [0, 0.0, deque(maxlen=self.window_size)])
+            summary[0] += 1
+            summary[1] += value
+            summary[2].append(value)
+
+    def mark(self, name: str, labels: dict = None) -> None:
+        """
+        Records an event whose rate per second over the rate window is exported as gauge.
+        """
+        key = (name, tuple(sorted(labels.items())) if labels else ())
+        with self.__lock:
+            self.__declare(name, 'gauge')
+            events = self.__events.setdefault(key, deque())
+            events.append(time.time())
+            while events[0] < events[-1] - self.rate_window_seconds:  # keep only the rate window
+                events.popleft()
+
+    @contextmanager
+    def track(self, in_flight_name: str, latency_name: str, labels: dict = None) -> Iterator[None]:
+        """
+        Counts the enclosed block as in flight and observes its duration.
+        :param in_flight_name: Gauge of the blocks currently running.
+        :param latency_name: Summary of the durations in seconds.
+        :param labels: Label names and values of both metrics.
+        """
+        self.add(in_flight_name, 1, labels)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(in_flight_name, -1, labels)
+            self.observe(latency_name, time.perf_counter() - start, labels)
+
+    def add_collector(self, collector: Callable[['MetricsRegistry'], None]) -> None:
+        """
+        Registers a function that updates gauges right before the metrics are rendered.
+        """
+        with self.__lock:
+            self.__collectors.append(collector)
+
+    def remove_collector(self, collector: Callable[['MetricsRegistry'], None]) -> None:
+        with self.__lock:
+            if collector in self.__collectors:
+                self.__collectors.remove(collector)
+
+    def get(self, name: str, labels: dict = None) -> float:
+        """
+        Current value of a counter or gauge (0 if it was never set).
+        """
+        with self.__lock:
+            return self.__values.get((name, tuple(sorted(labels.items())) if labels else ()), 0.0)
+
+    def render(self) -> str:
+        """
+        Returns all metrics in the Prometheus text format.
+        :return: Text.
+        """
+        with self.__lock:
+            collectors = list(self.__collectors)
+        for collector in collectors:
+            try:
+                collector(self)
+            except Exception as e:  # a failing collector must not take the other metrics down
+                print(f"Metrics collector failed: {e!r}")
+
+        now = time.time()
+        lines = []
+        with self.__lock:
+            for name, (metric_type, help_text) in sorted(self.__types.items()):
+                if help_text:
+                    lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {metric_type}")
+                for (metric_name, labels), value in sorted(self.__values.items()):
+                    if metric_name == name:
+                        lines.append(f"{name}{_format_labels(labels)} {value:g}")
+                for (metric_name, labels), events in sorted(self.__events.items()):
+                    if metric_name == name:
+                        while events and events[0] < now - self.rate_window_seconds:
+                            events.popleft()
+                        lines.append(f"{name}{_format_labels(labels)} {len(events) / self.rate_window_seconds:g}")
+                for (metric_name, labels), (count, total, window) in sorted(self.__summaries.items()):
+                    if metric_name != name:
+                        continue
+                    ordered = sorted(window)
+                    for q in QUANTILES:
+                        value = ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else float('nan')
+                        lines.append(f"{name}{_format_labels(labels + (('quantile', q),))} {value:g}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {total:g}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {count}")
+        return '\n'.join(lines) + '\n'
+
+    def write_file(self, path: str) -> None:
+        """
+        Writes the metrics to a file (e.g. for the textfile collector of the Prometheus node exporter). The file is
+        replaced atomically, so a reader never sees a partial file.
+        :param path: File path (should end with .prom).
+        :return: None
+        """
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+    def start_file_exporter(self, path: str, interval: float = 10.0) -> threading.Event:
+        """
+        Rewrites the metrics file periodically in a background thread.
+        :param path: File path.
+        :param interval: Seconds between two writes.
+        :return: Event that stops the thread when set (the file is written once more).
+        """
+        stop = threading.Event()
+
+        def export() -> None:
+            while not stop.wait(interval):
+                self.write_file(path)
+            self.write_file(path)
+
+        self.write_file(path)
+        threading.Thread(target=export, name='metrics-file-exporter', daemon=True).start()
+        return stop
+
+    def serve(self, host: str = '127.0.0.1', port: int = 9100) -> ThreadingHTTPServer:
+        """
+        Serves the metrics on GET /metrics in a background thread.
+        :param host: Interface to listen on.
+        :param port: Port to listen on.
+        :return: The server (call shutdown() to stop it).
+        """
+        server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        server.registry = self
+        threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True).start()
+        return server
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self) -> None:
+        if self.path.split('?')[0] != '/metrics':
+            self.send_response(404)
+            self.end_headers()
+            return
+        body = self.server.registry.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        pass  # do not print a line per scrape
+
+
+# Registry used by the visualizers, the work queue and the render service
+REGISTRY = MetricsRegistry()
+for _name, _type, _help in [
+        (BLENDER_PROCESSES, 'gauge', "Blender processes currently running."),
+        (BLENDER_SECONDS, 'summary', "Run time of blender processes in seconds."),
+        (SAMPLES_TOTAL, 'counter', "Samples and gestures processed by the visualizers, by result."),
+        (SAMPLES_PER_SECOND, 'gauge', "Samples and gestures completed per second over the last minute."),
+        (QUEUE_JOBS, 'gauge', "Jobs in the work queue by state."),
+        (JOBS_IN_FLIGHT, 'gauge', "Jobs currently processed by the workers of this process."),
+        (JOB_SECONDS, 'summary', "Processing time of queue jobs in seconds."),
+        (JOBS_TOTAL, 'counter', "Queue jobs processed by the workers of this process, by result."),
+        (JOBS_PER_SECOND, 'gauge', "Queue jobs completed per second over the last minute."),
+        (SERVICE_REQUESTS_TOTAL, 'counter', "Requests of the render service by cache status."),
+        (SERVICE_RENDERS_IN_FLIGHT, 'gauge', "Renders of the render service currently running."),
+        (SERVICE_RENDER_SECONDS, 'summary', "Render time of the render service in seconds (cache misses)."),
+        (SERVICE_CACHE_HIT_RATIO, 'gauge', "Share of requests served without a new render (hit or coalesced)."),
+        (POSE_CACHE_REQUESTS_TOTAL, 'counter', "Lookups in the quantized pose cache, by result (hit or miss)."),
+        (POSE_CACHE_BYTES, 'gauge', "Size of the results in the quantized pose cache in bytes.")]:
+    REGISTRY.describe(_name, _type, _help)
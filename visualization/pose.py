@@ -0,0 +1,77 @@
+from math import radians, sin, cos
+import visualization.constraints as cnstr
+
+WRIST_NAME = "hand"  # wrist object name in blender
+HAND_NAME = "SK_Hand"  # hand object name in blender
+FINGER_NAMES = ["thumb", "index", "middle", "ring", "pinky"]  # finger object names in blender
+NUMBER_OF_SPREAD_VALUES = 5  # the first values of a sample in WACH format are the spread values of each finger
+
+
+"""
+    Pose computation without blender (same rotations as blender_script_static.py)
+"""
+def euler_xyz_to_quaternion(x: float, y: float, z: float) -> tuple[float, float, float, float]:
+    """
+    Converts euler angles into a quaternion like mathutils.Euler((x, y, z), 'XYZ').to_quaternion().
+    :param x: Rotation around x in radians.
+    :param y: Rotation around y in radians.
+    :param z: Rotation around z in radians.
+    :return: Quaternion as (w, x, y, z).
+    """
+    cx, sx = cos(x / 2), sin(x / 2)
+    cy, sy = cos(y / 2), sin(y / 2)
+    cz, sz = cos(z / 2), sin(z / 2)
+    return (cx * cy * cz + sx * sy * sz,
+            sx * cy * cz - cx * sy * sz,
+            cx * sy * cz + sx * cy * sz,
+            cx * cy * sz - sx * sy * cz)
+
+
+def get_bone_name(finger_name: str, joint_idx: int, hand: str) -> str:
+    """
+    Name of a finger bone of the hand model.
+    :param finger_name: One of FINGER_NAMES.
+    :param joint_idx: 0, 1, 2 for cmc, mcp, ip (thumb) or mcp, pip, dip (finger).
+    :param hand: 'Left' or 'Right' hand.
+    :return: Bone name.
+    """
+    return f"{finger_name}_0{joint_idx + 1}_{hand[0].lower()}"
+
+
+def get_bone_rotations(sample_values: list, hand: str) -> dict[str, tuple[float, float, float, float]]:
+    """
+    Computes the rotation of each finger bone for a sample in WACH format.
+    The rotations are relative to the rest pose of the bone (blender pose bone rotation).
+    :param sample_values: Data sample in WACH format.
+    :param hand: 'Left' or 'Right' hand.
+    :return: Dict with bone name as key and quaternion (w, x, y, z) as value.
+    """
+    degrees = cnstr.convert_wach_to_degrees(sample_values)
+    rotations = {}
+    for finger_idx, finger_name in enumerate(FINGER_NAMES):
+        for joint_idx in range(3):
+            stretch_value_degree = degrees[NUMBER_OF_SPREAD_VALUES + 3 * finger_idx + joint_idx]
+            spread_value_degree = degrees[finger_idx] if joint_idx == 0 else 0.0  # spread only on first joint
+
+            # EULER: (X, Y, Z) ==> (axis_spread, 0.0, -1*axis_stretch)
+            rotations[get_bone_name(finger_name, joint_idx, hand)] = euler_xyz_to_quaternion(
+                radians(spread_value_degree), radians(0.0), radians(-1 * stretch_value_degree))
+    return rotations
+
+
+def get_frame_bone_rotations(data_sample: dict, hand: str) -> dict[str, tuple[float, float, float, float]]:
+    """
+    Computes the rotation of the wrist, the hand and each finger bone for a frame of a dynamic gesture
+    (same mapping as blender_script_dynamic.py).
+    :param data_sample: Frame with 'rotations', 'spread' and 'stretch'.
+    :param hand: 'Left' or 'Right' hand.
+    :return: Dict with bone name as key and quaternion (w, x, y, z) as value.
+    """
+    rotation_data = data_sample['rotations']
+    rotations = {f"{WRIST_NAME}_{hand[0].lower()}": tuple(rotation_data[0:4]),  # (w, x, y, z)
+                 HAND_NAME: tuple(rotation_data[4:8])}
+
+    # The spread values followed by the stretch values of each finger are a sample in WACH format
+    sample_values = list(data_sample['spread']) + [v for finger in data_sample['stretch'] for v in finger]
+    rotations.update(get_bone_rotations(sample_values, hand))
+    return rotations
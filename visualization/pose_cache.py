@@ -0,0 +1,124 @@
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+
+import visualization.constraints as cnstr
+from visualization import metrics
+
+
+def quantize_pose(sample_values: list, grid_degrees: float) -> tuple[int, ...]:
+    """
+    Snaps the joint angles of a sample to a grid in degree space (see constraints.py), so that poses which differ
+    only by glove noise get the same key.
+    :param sample_values: Data sample in WACH format.
+    :param grid_degrees: Size of a grid cell in degree.
+    :return: Grid cell of each value.
+    """
+    if grid_degrees <= 0:
+        raise ValueError("Grid size must be positive!")
+    degrees = np.asarray(cnstr.convert_wach_to_degrees(sample_values), dtype=np.float64)
+    return tuple(int(cell) for cell in np.floor(degrees / grid_degrees))
+
+
+class PoseCache:
+    """
+    In-memory LRU cache of rendered results (file contents) keyed by quantized poses. Two samples in the same grid
+    cell share one result, so each joint angle of a cached result differs by less than grid_degrees from the
+    requested one. The least recently used results are removed once their size exceeds the byte budget.
+    """
+
+    def __init__(self, grid_degrees: float = 1.0, max_bytes: int = 256 * 1024 * 1024) -> None:
+        """
+        :param grid_degrees: Size of a grid cell in degree (the maximum error per joint angle).
+        :param max_bytes: Maximum size of all cached results.
+        """
+        if grid_degrees <= 0:
+            raise ValueError("Grid size must be positive!")
+        self.grid_degrees = grid_degrees
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.__lock = threading.Lock()
+        self.__entries = OrderedDict()  # key -> content, least recently used first
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def get_key(self, hand: str, sample_values: list, variant: str) -> str:
+        """
+        Returns the cache key of a sample.
+        :param hand: 'Left' or 'Right' hand.
+        :param sample_values: Data sample in WACH format.
+        :param variant: Kind of result, e.g. the file type ('stl', 'png', 'lod500_stl').
+        :return: Key.
+        """
+        cells = quantize_pose(sample_values, self.grid_degrees)
+        return f"{hand}:{variant}:{','.join(str(cell) for cell in cells)}"
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Returns a cached result and marks it as recently used.
+        :param key: Key from get_key().
+        :return: Content or None if it is not cached.
+        """
+        with self.__lock:
+            data = self.__entries.get(key)
+            if data is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.__entries.move_to_end(key)
+        metrics.REGISTRY.inc(metrics.POSE_CACHE_REQUESTS_TOTAL, labels={'status': 'miss' if data is None else 'hit'})
+        return data
+
+    def get_all(self, keys: list[str]) -> Optional[list[bytes]]:
+        """
+        Returns the cached results of several keys (e.g. all files of one sample), only if all of them are cached.
+        Counts as one hit or one miss.
+        :param keys: Keys from get_key().
+        :return: Contents in the order of the keys or None if any of them is not cached.
+        """
+        with self.__lock:
+            if all(key in self.__entries for key in keys):
+                self.hits += 1
+                contents = []
+                for key in keys:
+                    self.__entries.move_to_end(key)
+                    contents.append(self.__entries[key])
+            else:
+                self.misses += 1
+                contents = None
+        metrics.REGISTRY.inc(metrics.POSE_CACHE_REQUESTS_TOTAL,
+                             labels={'status': 'miss' if contents is None else 'hit'})
+        return contents
+
+    def put(self, key: str, data: bytes) -> None:
+        """
+        Adds a result and removes the least recently used ones that exceed the byte budget. Results larger than the
+        budget are not cached.
+        :param key: Key from get_key().
+        :param data: Content.
+        :return: None
+        """
+        if len(data) > self.max_bytes:
+            return
+        with self.__lock:
+            old = self.__entries.pop(key, None)
+            if old is not None:
+                self.size_bytes -= len(old)
+            self.__entries[key] = data
+            self.size_bytes += len(data)
+            while self.size_bytes > self.max_bytes:
+                _, evicted = self.__entries.popitem(last=False)
+                self.size_bytes -= len(evicted)
+            size_bytes = self.size_bytes
+        metrics.REGISTRY.set(metrics.POSE_CACHE_BYTES, size_bytes)
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__entries.clear()
+            self.size_bytes = 0
+        metrics.REGISTRY.set(metrics.POSE_CACHE_BYTES, 0)
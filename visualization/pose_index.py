@@ -0,0 +1,244 @@
+import heapq
+import json
+import os
+
+import numpy as np
+
+import visualization.constraints as cnstr
+from visualization import readers
+
+NUMBER_OF_FEATURES = readers.NUMBER_OF_FEATURES
+INDEX_FILE_EXTENSION = '.npz'
+
+
+def _get_index_path(path: str) -> str:
+    # np.savez appends the extension if it is missing, load() must find the same file
+    return path if path.endswith(INDEX_FILE_EXTENSION) else path + INDEX_FILE_EXTENSION
+
+
+class PoseIndex:
+    """
+    Nearest neighbour index (KD-tree) over samples in WACH format. Samples can be added at any time: new samples are
+    searched linearly until there are enough of them to rebuild the tree.
+    Distances are euclidean, either over the normalized values or (degree_space) over the joint angles in degree.
+    """
+
+    def __init__(self, degree_space: bool = False, leaf_size: int = 64, rebuild_ratio: float = 0.25) -> None:
+        """
+        :param degree_space: Compare poses by joint angles in degree (see constraints.py) instead of normalized values.
+        :param leaf_size: Maximum number of samples in a leaf of the tree.
+        :param rebuild_ratio: Rebuild the tree once the unindexed samples exceed this share of the indexed ones.
+        """
+        self.degree_space = degree_space
+        self.leaf_size = leaf_size
+        self.rebuild_ratio = rebuild_ratio
+        self.meta = []  # one dict per sample, e.g. source file, hand, label and sample number
+        self.tree_size = 0  # samples [0, tree_size) are in the tree, the rest is searched linearly
+        self.__order = np.empty(0, dtype=np.int64)  # sample indices ordered by leaf
+        self.__nodes = []  # (split_dim, split_value, left, right, start, end); leaves have split_dim -1
+        self.__bounds = []  # (lower, upper) corner of the bounding box of each node
+        self.__buffer = np.empty((64, NUMBER_OF_FEATURES))  # grows by doubling, rows [0, len) are used
+
+    def __len__(self) -> int:
+        return len(self.meta)
+
+    @property
+    def points(self) -> np.ndarray:
+        return self.__buffer[:len(self.meta)]
+
+    def __append(self, points: np.ndarray, meta: list[dict]) -> None:
+        size = len(self.meta)
+        if size + len(points) > len(self.__buffer):
+            buffer = np.empty((max(2 * len(self.__buffer), size + len(points)), NUMBER_OF_FEATURES))
+            buffer[:size] = self.__buffer[:size]
+            self.__buffer = buffer
+        self.__buffer[size:size + len(points)] = points
+        self.meta += meta
+        if len(self.meta) - self.tree_size > max(self.leaf_size, self.rebuild_ratio * self.tree_size):
+            self.rebuild()
+
+    def to_point(self, sample_values: list) -> np.ndarray:
+        """
+        Converts a sample in WACH format into the space the index compares in.
+        :param sample_values: Data sample in WACH format.
+        :return: Point as array.
+        """
+        values = [float(v) for v in sample_values]
+        if self.degree_space:
+            values = cnstr.convert_wach_to_degrees(values)
+        return np.asarray(values, dtype=np.float64)
+
+    def add(self, sample_values: list, meta: dict = None) -> int:
+        """
+        Adds a sample to the index.
+        :param sample_values: Data sample in WACH format.
+        :param meta: Information returned with the sample by queries.
+        :return: Index of the sample.
+        """
+        self.__append(self.to_point(sample_values)[np.newaxis], [meta if meta is not None else {}])
+        return len(self.meta) - 1
+
+    def add_file(self, file_path: str) -> int:
+        """
+        Adds all samples of a WACH file.
+        :param file_path: Path of the WACH file.
+        :return: Number of added samples.
+        """
+        label, hand, data_samples = readers.read_wach_file(file_path)
+        source = os.path.abspath(file_path)
+        points = np.array([self.to_point(sample) for sample in data_samples]).reshape(-1, NUMBER_OF_FEATURES)
+        self.__append(points, [{'source': source, 'label': label, 'hand': hand, 'sample': idx}
+                               for idx in range(len(data_samples))])
+        return len(data_samples)
+
+    def rebuild(self) -> None:
+        """
+        Builds the tree over all samples.
+        :return: None
+        """
+        self.__nodes = []
+        self.__bounds = []
+        self.__order = np.arange(len(self.meta))
+        if len(self.meta):
+            self.__build(0, len(self.meta))
+        self.tree_size = len(self.meta)
+
+    def __build(self, start: int, end: int) -> int:
+        node_idx = len(self.__nodes)
+        indices = self.__order[start:end]
+        points = self.points[indices]
+        self.__nodes.append(None)
+        self.__bounds.append((points.min(axis=0), points.max(axis=0)))
+        if end - start <= self.leaf_size:
+            self.__nodes[node_idx] = (-1, 0.0, -1, -1, start, end)
+            return node_idx
+
+        # Split at the median of the dimension with the largest spread
+        split_dim = int(np.argmax(points.max(axis=0) - points.min(axis=0)))
+        mid = (end - start) // 2
+        partition = np.argpartition(points[:, split_dim], mid)
+        self.__order[start:end] = indices[partition]
+        split_value = float(self.points[self.__order[start + mid], split_dim])
+
+        left = self.__build(start, start + mid)
+        right = self.__build(start + mid, end)
+        self.__nodes[node_idx] = (split_dim, split_value, left, right, start, end)
+        return node_idx
+
+    def __box_distance(self, node_idx: int, query: np.ndarray) -> float:
+        lower, upper = self.__bounds[node_idx]
+        return float(np.sqrt((np.maximum(0.0, np.maximum(lower - query, query - upper)) ** 2).sum()))
+
+    def knn(self, sample_values: list, k: int = 1) -> list[tuple[float, int, dict]]:
+        """
+        Finds the k samples closest to the given sample.
+        :param sample_values: Data sample in WACH format.
+        :param k: Number of neighbours.
+        :return: List of (distance, index, meta) sorted by distance.
+        """
+        query = self.to_point(sample_values)
+        heap = []  # max heap of the k best as (-distance, index)
+
+        def visit_candidates(indices: np.ndarray) -> None:
+            distances = np.sqrt(((self.points[indices] - query) ** 2).sum(axis=1))
+            if len(heap) == k:  # only candidates closer than the current k-th neighbour matter
+                closer = distances < -heap[0][0]
+                distances, indices = distances[closer], indices[closer]
+            for distance, idx in zip(distances, indices):
+                if len(heap) < k:
+                    heapq.heappush(heap, (-distance, int(idx)))
+                elif distance < -heap[0][0]:
+                    heapq.heapreplace(heap, (-distance, int(idx)))
+
+        def search(node_idx: int) -> None:
+            split_dim, split_value, left, right, start, end = self.__nodes[node_idx]
+            if split_dim < 0:
+                visit_candidates(self.__order[start:end])
+                return
+            diff = query[split_dim] - split_value
+            near, far = (left, right) if diff < 0 else (right, left)
+            search(near)
+            if len(heap) < k or (abs(diff) < -heap[0][0] and self.__box_distance(far, query) < -heap[0][0]):
+                search(far)
+
+        if self.__nodes:
+            search(0)
+        if self.tree_size < len(self.meta):
+            visit_candidates(np.arange(self.tree_size, len(self.meta)))
+        return [(float(-d), idx, self.meta[idx]) for d, idx in sorted(heap, reverse=True)]
+
+    def radius(self, sample_values: list, r: float) -> list[tuple[float, int, dict]]:
+        """
+        Finds all samples within a distance of the given sample.
+        :param sample_values: Data sample in WACH format.
+        :param r: Maximum distance (inclusive).
+        :return: List of (distance, index, meta) sorted by distance.
+        """
+        query = self.to_point(sample_values)
+        found = []
+
+        def visit_candidates(indices: np.ndarray) -> None:
+            distances = np.sqrt(((self.points[indices] - query) ** 2).sum(axis=1))
+            found.extend((float(d), int(idx)) for d, idx in zip(distances, indices) if d <= r)
+
+        def search(node_idx: int) -> None:
+            split_dim, split_value, left, right, start, end = self.__nodes[node_idx]
+            if split_dim < 0:
+                visit_candidates(self.__order[start:end])
+                return
+            diff = query[split_dim] - split_value
+            near, far = (left, right) if diff < 0 else (right, left)
+            search(near)
+            if abs(diff) <= r and self.__box_distance(far, query) <= r:
+                search(far)
+
+        if self.__nodes:
+            search(0)
+        if self.tree_size < len(self.meta):
+            visit_candidates(np.arange(self.tree_size, len(self.meta)))
+        return [(d, idx, self.meta[idx]) for d, idx in sorted(found)]
+
+    def save(self, path: str) -> None:
+        """
+        Saves the index as .npz file.
+        :param path: File path (.npz is appended if missing).
+        :return: None
+        """
+        np.savez(_get_index_path(path), points=self.points, meta=np.array(json.dumps(self.meta)),
+                 degree_space=np.array(self.degree_space))
+
+    @classmethod
+    def load(cls, path: str, leaf_size: int = 64, rebuild_ratio: float = 0.25) -> 'PoseIndex':
+        """
+        Loads an index saved with save().
+        :param path: File path as passed to save() (.npz is appended if missing).
+        :param leaf_size: Maximum number of samples in a leaf of the tree.
+        :param rebuild_ratio: Rebuild the tree once the unindexed samples exceed this share of the indexed ones.
+        :return: The index.
+        """
+        with np.load(_get_index_path(path)) as data:
+            index = cls(bool(data['degree_space']), leaf_size, rebuild_ratio)
+            index.__append(data['points'], json.loads(str(data['meta'])))
+        index.rebuild()
+        return index
+
+
+def collapse_near_duplicates(data_samples: list[list], tolerance: float, degree_space: bool = False) -> list[int]:
+    """
+    Maps each sample to the closest earlier representative (a sample that is rendered) within the tolerance, so that
+    only the representatives have to be rendered. Samples without a representative within the tolerance become one.
+    :param data_samples: Data samples in WACH format.
+    :param tolerance: Maximum distance for two samples to count as duplicates.
+    :param degree_space: Measure the distance in degree instead of normalized values.
+    :return: For each sample, the index of the sample that represents it (its own index if it is rendered).
+    """
+    index = PoseIndex(degree_space)
+    representatives = []
+    for idx, sample in enumerate(data_samples):
+        neighbours = index.radius(sample, tolerance)
+        if neighbours:
+            representatives.append(neighbours[0][2]['sample'])
+        else:
+            index.add(sample, {'sample': idx})
+            representatives.append(idx)
+    return representatives
@@ -0,0 +1,39 @@
+import json
+
+NUMBER_OF_FEATURES = 20  # length of a data sample in WACH format
+
+
+def read_wach_file(file_path: str) -> tuple[str, str, list[list[str]]]:
+    """
+    Reads a file that contains one or more samples in WACH format for a gesture.
+    :param file_path: File Path. (E.g.:
+    https://github.com/serious-games-darmstadt/dataglove_manus-prime-x_handshapes/blob/main/wach_format/1/a_20220503.txt)
+    :return: Label, hand type and the data samples (each a list of value strings).
+    """
+    with open(file_path, 'r') as f:
+        content = f.readlines()
+        while content[-1] == '\n':  # Remove trailing new lines
+            del content[-1]
+
+    # Extract label and hand type from file
+    label = content[0].rstrip('\n')
+    hand = content[1].rstrip('\n')
+
+    # Extract all data samples from file
+    data_samples = []
+    start_idx = 3  # skip label, hand type and first newline
+    while start_idx < len(content):
+        end_idx = start_idx + NUMBER_OF_FEATURES
+        data_samples.append([line.rstrip('\n') for line in content[start_idx:end_idx]])
+        start_idx = end_idx + 1
+    return label, hand, data_samples
+
+
+def read_dynamic_file(json_path: str) -> list[dict]:
+    """
+    Reads a processed json file with one or more dynamic gestures.
+    :param json_path: File path.
+    :return: List of gestures with 'letter', 'hand', 'startToHold' and 'holdToEnd'.
+    """
+    with open(json_path, 'r') as f:
+        return json.load(f)
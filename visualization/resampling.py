@@ -0,0 +1,113 @@
+import numpy as np
+
+from visualization.stream import get_frame_times
+
+
+def _lerp(a: np.ndarray, b: np.ndarray, t: np.ndarray) -> np.ndarray:
+    t = t.reshape((-1,) + (1,) * (a.ndim - 1))
+    return a + (b - a) * t
+
+
+def slerp(q0: np.ndarray, q1: np.ndarray, t: np.ndarray) -> np.ndarray:
+    """
+    Spherical linear interpolation between quaternions, for many pairs at once.
+    :param q0: Start quaternions (w, x, y, z) with shape (..., 4).
+    :param q1: End quaternions with the same shape.
+    :param t: Interpolation factor in [0, 1], broadcastable to q0.shape[:-1].
+    :return: Normalized interpolated quaternions with shape (..., 4).
+    """
+    q0 = q0 / np.linalg.norm(q0, axis=-1, keepdims=True)
+    q1 = q1 / np.linalg.norm(q1, axis=-1, keepdims=True)
+    t = np.broadcast_to(t, q0.shape[:-1])[..., np.newaxis]
+
+    # Interpolate the short way: q and -q are the same rotation
+    dot = (q0 * q1).sum(axis=-1, keepdims=True)
+    q1 = np.where(dot < 0.0, -q1, q1)
+    dot = np.abs(dot)
+
+    # Nearly equal quaternions: linear interpolation avoids the division by sin(theta) ~ 0
+    linear = dot > 0.9995
+    theta = np.arccos(np.clip(dot, -1.0, 1.0))
+    sin_theta = np.where(linear, 1.0, np.sin(theta))
+    w0 = np.where(linear, 1.0 - t, np.sin((1.0 - t) * theta) / sin_theta)
+    w1 = np.where(linear, t, np.sin(t * theta) / sin_theta)
+    result = w0 * q0 + w1 * q1
+    return result / np.linalg.norm(result, axis=-1, keepdims=True)
+
+
+def _check_timestamps(frames: list[dict]) -> None:
+    previous = None
+    for idx, frame in enumerate(frames):
+        if 'timestamp' not in frame:
+            raise ValueError(f"Frame {idx} has no timestamp!")
+        try:
+            timestamp = float(frame['timestamp'])
+        except (ValueError, TypeError):
+            raise ValueError(f"Timestamp of frame {idx} is not a number: {frame['timestamp']!r}") from None
+        if not np.isfinite(timestamp) or (previous is not None and timestamp < previous):
+            raise ValueError(f"Timestamp of frame {idx} ({timestamp}) is not finite or earlier than the frame before!")
+        previous = timestamp
+
+
+def resample_frames(frames: list[dict], fps: float) -> list[dict]:
+    """
+    Resamples the frames of a recording to a fixed frame rate. The time of each frame is taken from its timestamp
+    (see stream.get_frame_times), quaternions in 'rotations' are interpolated with slerp, 'spread' and 'stretch'
+    linearly.
+    :param frames: Frames with 'timestamp', 'rotations', 'spread' and 'stretch'.
+    :param fps: Target frame rate.
+    :return: New frames, one every 1 / fps seconds from the first to the last frame.
+    :raises ValueError: If the frame rate is not positive or a timestamp is missing, not a number or decreasing.
+    """
+    if fps <= 0:
+        raise ValueError("Frame rate must be positive!")
+    if not frames:
+        return []
+    _check_timestamps(frames)
+    times = np.asarray(get_frame_times(frames))
+    target_times = np.arange(0.0, times[-1] + 1e-9, 1.0 / fps)
+
+    # Frames before and after each target time and the position between them
+    before = np.clip(np.searchsorted(times, target_times, side='right') - 1, 0, len(frames) - 1)
+    after = np.minimum(before + 1, len(frames) - 1)
+    interval = times[after] - times[before]
+    t = np.where(interval > 0, (target_times - times[before]) / np.where(interval > 0, interval, 1.0), 0.0)
+
+    rotations = np.asarray([frame['rotations'] for frame in frames], dtype=np.float64)
+    spread = np.asarray([frame['spread'] for frame in frames], dtype=np.float64)
+    stretch = np.asarray([frame['stretch'] for frame in frames], dtype=np.float64)
+
+    # 'rotations' holds consecutive quaternions (w, x, y, z); values that do not fill a quaternion are lerped
+    number_of_quaternion_values = rotations.shape[1] - rotations.shape[1] % 4
+    quaternions = rotations[:, :number_of_quaternion_values].reshape(len(frames), -1, 4)
+    new_rotations = np.concatenate(
+        [slerp(quaternions[before], quaternions[after], t[:, np.newaxis]).reshape(len(target_times), -1),
+         _lerp(rotations[before, number_of_quaternion_values:], rotations[after, number_of_quaternion_values:], t)],
+        axis=1)
+    new_spread = _lerp(spread[before], spread[after], t)
+    new_stretch = _lerp(stretch[before], stretch[after], t)
+
+    start = float(frames[0]['timestamp'])
+    return [{'timestamp': start + float(target_time),
+             'rotations': new_rotations[idx].tolist(),
+             'spread': new_spread[idx].tolist(),
+             'stretch': new_stretch[idx].tolist()} for idx, target_time in enumerate(target_times)]
+
+
+def resample_gesture(gesture: dict, fps: float) -> dict:
+    """
+    Resamples both phases of a dynamic gesture to a fixed frame rate. Both phases are resampled as one recording,
+    so the transition between them is interpolated as well; frames before the first 'holdToEnd' frame belong
+    to 'startToHold'.
+    :param gesture: Gesture with 'letter', 'hand', 'startToHold' and 'holdToEnd'.
+    :param fps: Target frame rate.
+    :return: Copy of the gesture with resampled frames.
+    """
+    frames = gesture['startToHold'] + gesture['holdToEnd']
+    resampled = resample_frames(frames, fps)
+    if gesture['holdToEnd']:
+        hold_time = get_frame_times(frames)[len(gesture['startToHold'])]
+        split_idx = int(np.searchsorted(np.arange(len(resampled)) / fps, hold_time - 1e-9))
+    else:
+        split_idx = len(resampled)
+    return dict(gesture, startToHold=resampled[:split_idx], holdToEnd=resampled[split_idx:])
@@ -0,0 +1,405 @@
+import fileinput
+import hashlib
+import json
+import os
+import queue
+import re
+import secrets
+import shutil
+import socket
+import subprocess
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable
+from urllib.parse import urlparse, parse_qs
+
+from PIL import Image
+
+from visualization import metrics
+from visualization import validation
+from visualization import viz
+from visualization.pose_cache import PoseCache
+
+SUPPORTED_STATIC_FORMATS = ['stl', 'obj', 'blend', 'png']
+SUPPORTED_DYNAMIC_FORMATS = ['blend']
+CONTENT_TYPES = {'stl': 'model/stl', 'obj': 'model/obj', 'blend': 'application/octet-stream', 'png': 'image/png'}
+LABEL_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")  # labels end up in blender scripts and file names
+HANDS = ['Left', 'Right']
+SERVER_SCRIPT_PATH = os.path.join(viz.PARENT_DIR, R"./blender_script_server.py")
+RENDERER_STARTUP_SECONDS = 120.0  # time blender may take to start and load the hand model
+RENDERER_TIMEOUT_SECONDS = 300.0  # time a single render may take before the process is restarted
+
+
+class _Renderer:
+    """
+    One slot of the renderer pool. Keeps a blender process running (blender_script_server.py) that loads the hand
+    model once and then renders static samples sent over a local socket, so a request does not wait for blender to
+    start. Dynamic gestures are still exported by one blender process per request, with a private copy of the
+    dynamic script and a working folder per slot, so that several slots can render at the same time.
+    """
+
+    def __init__(self, work_dir: str) -> None:
+        self.work_dir = work_dir
+        self.server_script_path = viz.create_private_blender_script(SERVER_SCRIPT_PATH)
+        self.dynamic_script_path = viz.create_private_blender_script(
+            os.path.join(viz.PARENT_DIR, R"./blender_script_dynamic.py"))
+        self.dynamic_viz = viz.DynamicDataVisualizer(os.path.join(work_dir, 'dynamic'), self.dynamic_script_path)
+        self.blender_path = self.dynamic_viz.blender_path
+        self.process = None  # started with the first static request
+        self.__connection = None
+        self.__stream = None
+        os.makedirs(os.path.join(work_dir, 'static'), exist_ok=True)
+
+    def render_static(self, hand: str, values: list[float], file_format: str) -> str:
+        """
+        Renders a sample with the running blender process (started first if needed).
+        :param hand: 'Left' or 'Right' hand.
+        :param values: Data sample in WACH format.
+        :param file_format: One of SUPPORTED_STATIC_FORMATS.
+        :return: Path of the result file.
+        """
+        output_path = os.path.join(self.work_dir, 'static', f"result.{file_format}")
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        if self.process is None or self.process.poll() is not None:
+            self.__stop()
+            self.__start()
+
+        try:
+            self.__stream.write(json.dumps({'hand': hand, 'values': values, 'file_type': file_format,
+                                            'path': output_path}) + '\n')
+            self.__stream.flush()
+            reply = json.loads(self.__stream.readline())  # empty line (ValueError) if the process died
+        except (OSError, ValueError) as e:
+            self.__stop()  # a crashed or hanging process is started again with the next request
+            raise RuntimeError(f"Blender renderer failed: {e!r}") from None
+        if not reply.get('ok'):
+            raise RuntimeError(f"Blender could not render the sample: {reply.get('error')}")
+
+        viz.record_sample('static', os.path.exists(output_path))
+        if file_format == 'png' and os.path.exists(output_path):
+            with Image.open(output_path) as img:
+                cropped = img.crop(viz.PNG_CROP_BOX)
+            cropped.save(output_path)
+        return output_path
+
+    def __start(self) -> None:
+        if self.blender_path is None:
+            raise RuntimeError("Blender must be installed and in path!")
+        listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        try:
+            listener.bind(('127.0.0.1', 0))
+            listener.listen(1)
+            listener.settimeout(1.0)
+
+            # Only the process started here knows the token, other local connections are refused
+            token = secrets.token_hex(16)
+            shutil.copyfile(SERVER_SCRIPT_PATH, self.server_script_path)
+            for old, new in {"HOST = ''": "HOST = '127.0.0.1'",
+                             "PORT = 0": f"PORT = {listener.getsockname()[1]}",
+                             "TOKEN = ''": f"TOKEN = '{token}'"}.items():
+                for line in fileinput.input(self.server_script_path, inplace=True):
+                    print(line.replace(old, new).rstrip())
+            self.process = subprocess.Popen([self.blender_path, "--background", "--python", self.server_script_path])
+
+            deadline = time.monotonic() + RENDERER_STARTUP_SECONDS
+            while True:
+                try:
+                    connection, _ = listener.accept()
+                except socket.timeout:
+                    if self.process.poll() is not None or time.monotonic() > deadline:
+                        raise RuntimeError("Blender renderer did not start!") from None
+                    continue
+                connection.settimeout(RENDERER_TIMEOUT_SECONDS)
+                stream = connection.makefile('rw', encoding='utf-8')
+                try:
+                    hello = json.loads(stream.readline())
+                except (OSError, ValueError):
+                    hello = None
+                if isinstance(hello, dict) and hello.get('token') == token:
+                    self.__connection, self.__stream = connection, stream
+                    return
+                stream.close()
+                connection.close()
+        except Exception:
+            self.__stop()
+            raise
+        finally:
+            listener.close()
+
+    def __stop(self) -> None:
+        for resource in [self.__stream, self.__connection]:
+            if resource is not None:
+                try:
+                    resource.close()
+                except OSError:
+                    pass
+        self.__stream = None
+        self.__connection = None
+        if self.process is not None:
+            try:
+                self.process.wait(timeout=5.0)  # the script ends when the connection is closed
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+            self.process = None
+
+    def close(self) -> None:
+        self.__stop()
+        for script_path in [self.server_script_path, self.dynamic_script_path]:
+            if os.path.exists(script_path):
+                os.remove(script_path)
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+
+class RenderService:
+    """
+    Renders static samples and dynamic gestures on request. Static samples are rendered by blender processes that
+    stay running between requests (see _Renderer). Identical requests that arrive while a render is running wait for
+    that render instead of starting their own, and finished results are served from a cache.
+    """
+
+    def __init__(self,
+                 cache_dir: str = os.path.join(viz.PARENT_DIR, R"../cache"),
+                 pool_size: int = 2,
+                 max_cache_entries: int = 1000,
+                 pose_cache: PoseCache = None) -> None:
+        """
+        :param cache_dir: Folder for cached results (and the working folders of the renderers).
+        :param pool_size: Number of renderers, i.e. blender processes that may run at the same time.
+        :param max_cache_entries: Number of cached results after which the least recently used are removed.
+        :param pose_cache: If set, static samples are looked up by their quantized pose, first in this in-memory
+        cache and then in the cache folder, so that near-identical poses are rendered only once.
+        """
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.max_cache_entries = max_cache_entries
+        self.pose_cache = pose_cache
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.coalesced = 0
+        self.__lock = threading.Lock()
+        self.__in_flight = {}  # cache key -> Future of the running render
+        self.__renderers = queue.Queue()
+
+        self.results_dir = os.path.join(self.cache_dir, 'results')
+        os.makedirs(self.results_dir, exist_ok=True)
+        for i in range(pool_size):
+            self.__renderers.put(_Renderer(os.path.join(self.cache_dir, f"renderer_{i}")))
+        self.pool_size = pool_size
+        metrics.REGISTRY.add_collector(self.collect_metrics)
+
+    def collect_metrics(self, registry: metrics.MetricsRegistry) -> None:
+        """
+        Sets the cache hit ratio in the metrics (see MetricsRegistry.add_collector).
+        :param registry: Metrics registry.
+        :return: None
+        """
+        with self.__lock:
+            requests = self.cache_hits + self.cache_misses + self.coalesced
+            if requests:
+                registry.set(metrics.SERVICE_CACHE_HIT_RATIO, (self.cache_hits + self.coalesced) / requests)
+
+    def render_static(self, label: str, hand: str, sample_values: list, file_format: str) -> tuple[bytes, str]:
+        """
+        Renders a single sample in WACH format.
+        :param label: Name of the performed gesture (only used in error messages).
+        :param hand: 'Left' or 'Right' hand.
+        :param sample_values: Data sample in WACH format.
+        :param file_format: One of SUPPORTED_STATIC_FORMATS.
+        :return: Content of the result file and 'hit', 'miss' or 'coalesced'.
+        """
+        if not LABEL_PATTERN.match(label):
+            raise ValueError("Label may only contain letters, digits, '_' and '-'!")
+        if hand not in HANDS:
+            raise ValueError("Hand must be 'Left' or 'Right'!")
+        if file_format not in SUPPORTED_STATIC_FORMATS:
+            raise ValueError(f"Format must be one of {SUPPORTED_STATIC_FORMATS}!")
+        report = validation.validate_wach_samples([sample_values], hand, label)
+        if not report.ok:  # rejected before it takes a renderer from the pool
+            raise ValueError(str(report))
+        values = [float(v) for v in sample_values]
+
+        # The label does not change the result, so it is not part of the key
+        if self.pose_cache is not None:
+            pose_key = self.pose_cache.get_key(hand, values, file_format)
+            data = self.pose_cache.get(pose_key)
+            if data is not None:
+                with self.__lock:
+                    self.cache_hits += 1
+                metrics.REGISTRY.inc(metrics.SERVICE_REQUESTS_TOTAL, labels={'status': 'hit'})
+                return data, 'hit'
+            key = self.__key({'kind': 'static', 'pose': pose_key, 'grid': self.pose_cache.grid_degrees})
+        else:
+            key = self.__key({'kind': 'static', 'hand': hand, 'values': values, 'format': file_format})
+
+        def render(renderer: _Renderer) -> str:
+            return renderer.render_static(hand, values, file_format)
+
+        data, status = self.__get_or_render(key, file_format, render)
+        if self.pose_cache is not None:
+            self.pose_cache.put(pose_key, data)
+        return data, status
+
+    def render_dynamic(self, gesture: dict, file_format: str = 'blend') -> tuple[bytes, str]:
+        """
+        Exports a single dynamic gesture (one entry of a processed json file).
+        :param gesture: Gesture with 'letter', 'hand', 'startToHold' and 'holdToEnd'.
+        :param file_format: One of SUPPORTED_DYNAMIC_FORMATS.
+        :return: Content of the result file and 'hit', 'miss' or 'coalesced'.
+        """
+        if not LABEL_PATTERN.match(str(gesture.get('letter', ''))):
+            raise ValueError("Letter may only contain letters, digits, '_' and '-'!")
+        if gesture.get('hand') not in HANDS:
+            raise ValueError("Hand must be 'Left' or 'Right'!")
+        if file_format not in SUPPORTED_DYNAMIC_FORMATS:
+            raise ValueError(f"Format must be one of {SUPPORTED_DYNAMIC_FORMATS}!")
+        report = validation.validate_dynamic_gestures([gesture], gesture['letter'])
+        if not report.ok:  # rejected before it takes a renderer from the pool
+            raise ValueError(str(report))
+
+        key = self.__key({'kind': 'dynamic', 'hand': gesture['hand'], 'format': file_format,
+                          'startToHold': gesture['startToHold'], 'holdToEnd': gesture['holdToEnd']})
+
+        def render(renderer: _Renderer) -> str:
+            json_path = os.path.join(renderer.work_dir, 'request.json')
+            with open(json_path, 'w') as f:
+                json.dump([gesture], f)
+            renderer.dynamic_viz.generate_dynamic_gesture(json_path, export=True)
+            return renderer.dynamic_viz.get_output_file_path(gesture['letter'], gesture['hand'], 0, file_format)
+
+        return self.__get_or_render(key, file_format, render)
+
+    def serve(self, host: str = '127.0.0.1', port: int = 8080) -> None:
+        """
+        Serves the renderer over HTTP until interrupted.
+            POST /static  with {"label": ..., "hand": ..., "values": [...20 values], "format": "stl"}
+            POST /dynamic with one gesture object of a processed json file (optional query ?format=blend)
+        :param host: Interface to listen on. Keep the default unless the port is protected otherwise.
+        :param port: Port to listen on.
+        :return: None
+        """
+        server = ThreadingHTTPServer((host, port), _RequestHandler)
+        server.render_service = self
+        print(f"Render service listening on http://{host}:{port} ...")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.close()
+
+    def close(self) -> None:
+        """
+        Stops the renderers' blender processes and removes their private blender scripts and working folders.
+        :return: None
+        """
+        metrics.REGISTRY.remove_collector(self.collect_metrics)
+        for _ in range(self.pool_size):
+            self.__renderers.get().close()
+        self.pool_size = 0
+
+    @staticmethod
+    def __key(request: dict) -> str:
+        return hashlib.sha256(json.dumps(request, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def __get_or_render(self, key: str, file_format: str, render: Callable[[_Renderer], str]) -> tuple[bytes, str]:
+        cache_path = os.path.join(self.results_dir, f"{key}.{file_format}")
+
+        with self.__lock:
+            if os.path.exists(cache_path):
+                self.cache_hits += 1
+                os.utime(cache_path)  # mark as recently used
+                with open(cache_path, 'rb') as f:  # read under the lock, so that __evict cannot remove it meanwhile
+                    data = f.read()
+                status = 'hit'
+                future = None
+            elif key in self.__in_flight:
+                self.coalesced += 1
+                status = 'coalesced'
+                future = self.__in_flight[key]
+            else:
+                self.cache_misses += 1
+                status = 'miss'
+                future = Future()
+                self.__in_flight[key] = future
+        metrics.REGISTRY.inc(metrics.SERVICE_REQUESTS_TOTAL, labels={'status': status})
+
+        if status == 'hit':
+            return data, status
+        if status == 'coalesced':
+            return future.result(), status
+
+        try:
+            renderer = self.__renderers.get()  # wait for a free renderer
+            try:
+                with metrics.REGISTRY.track(metrics.SERVICE_RENDERS_IN_FLIGHT, metrics.SERVICE_RENDER_SECONDS):
+                    output_path = render(renderer)
+                if not os.path.exists(output_path):
+                    raise RuntimeError("Blender did not write a result!")
+                with open(output_path, 'rb') as f:
+                    data = f.read()
+                os.replace(output_path, cache_path)
+            finally:
+                self.__renderers.put(renderer)
+            future.set_result(data)
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self.__lock:
+                del self.__in_flight[key]
+
+        self.__evict()
+        return data, status
+
+    def __evict(self) -> None:
+        with self.__lock:
+            entries = [os.path.join(self.results_dir, name) for name in os.listdir(self.results_dir)]
+            if len(entries) <= self.max_cache_entries:
+                return
+            entries.sort(key=os.path.getmtime)
+            for path in entries[:len(entries) - self.max_cache_entries]:
+                os.remove(path)
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+
+    def do_POST(self) -> None:
+        service = self.server.render_service
+        url = urlparse(self.path)
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+            if url.path == '/static':
+                file_format = body.get('format', 'stl')
+                data, status = service.render_static(str(body.get('label', 'sample')), body.get('hand'),
+                                                     body.get('values', []), file_format)
+            elif url.path == '/dynamic':
+                file_format = parse_qs(url.query).get('format', ['blend'])[0]
+                data, status = service.render_dynamic(body, file_format)
+            else:
+                self.__send_error(404, "Unknown endpoint!")
+                return
+        except (ValueError, TypeError, AttributeError) as e:  # json.JSONDecodeError is a ValueError
+            self.__send_error(400, str(e))
+            return
+        except Exception as e:
+            self.__send_error(500, str(e))
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPES[file_format])
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('X-Cache', status)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def __send_error(self, code: int, message: str) -> None:
+        body = json.dumps({'error': message}).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
@@ -0,0 +1,161 @@
+import io
+import json
+import os
+import tarfile
+import time
+
+INDEX_FILE_NAME = 'index.jsonl'
+TAR_BLOCK_SIZE = tarfile.BLOCKSIZE
+
+
+def get_key(input_file_name: str, hand: str, sample_number: int, kind: str) -> str:
+    """
+    Key of a result in the shards.
+    :param input_file_name: Name of the input file without extension (or the label for single samples).
+    :param hand: 'Left' or 'Right' hand.
+    :param sample_number: Index of the sample in the input file.
+    :param kind: Output file type, e.g. 'stl' or 'png'.
+    :return: Key.
+    """
+    return f"{input_file_name}/{hand}/{sample_number}/{kind}"
+
+
+class ShardWriter:
+    """
+    Appends results to tar archives of bounded size instead of writing one file per result.
+    An index file (one json line per result) stores shard, offset and size, so single results can be read
+    without extracting the archive. The archives are regular tar files and can also be unpacked with tar.
+    """
+
+    def __init__(self, output_dir: str, max_shard_bytes: int = 1 << 30, prefix: str = 'shard') -> None:
+        """
+        :param output_dir: Folder for the shards and the index file.
+        :param max_shard_bytes: Size after which a new shard is started.
+        :param prefix: File name prefix of the shards.
+        """
+        self.output_dir = os.path.abspath(output_dir)
+        self.max_shard_bytes = max_shard_bytes
+        self.prefix = prefix
+        os.makedirs(self.output_dir, exist_ok=True)
+
+        # Never append to shards of an earlier run or of another writer, continue with the next number.
+        # The listing is only a starting point, the number is claimed when the shard is created.
+        self.shard_number = len([name for name in os.listdir(self.output_dir)
+                                 if name.startswith(prefix) and name.endswith('.tar')])
+        self.shard_name = None
+        self.__file = None
+        self.__tar = None
+        self.__index = open(os.path.join(self.output_dir, INDEX_FILE_NAME), 'a')
+
+    def __open_next_shard(self) -> None:
+        self.__close_shard()
+        while True:
+            self.shard_name = f"{self.prefix}-{self.shard_number:05d}.tar"
+            self.shard_number += 1
+            try:
+                # Exclusive create, two writers on the same folder never get the same shard
+                self.__file = open(os.path.join(self.output_dir, self.shard_name), 'xb')
+                break
+            except FileExistsError:
+                continue
+        self.__tar = tarfile.open(fileobj=self.__file, mode='w', format=tarfile.GNU_FORMAT)
+
+    def __close_shard(self) -> None:
+        if self.__tar is not None:
+            self.__tar.close()
+            self.__file.close()
+            self.__tar = None
+            self.__file = None
+
+    def add(self, input_file_name: str, hand: str, sample_number: int, kind: str, data: bytes,
+            member_name: str = None) -> None:
+        """
+        Appends a result to the current shard.
+        :param input_file_name: Name of the input file without extension (or the label for single samples).
+        :param hand: 'Left' or 'Right' hand.
+        :param sample_number: Index of the sample in the input file.
+        :param kind: Output file type, e.g. 'stl' or 'png'.
+        :param data: Content of the result.
+        :param member_name: File name inside the archive (defaults to the key).
+        :return: None
+        """
+        if self.__tar is None or (self.__tar.offset > 0 and
+                                  self.__tar.offset + len(data) + 2 * TAR_BLOCK_SIZE > self.max_shard_bytes):
+            self.__open_next_shard()
+
+        key = get_key(input_file_name, hand, sample_number, kind)
+        info = tarfile.TarInfo(member_name if member_name else key)
+        info.size = len(data)
+        info.mtime = int(time.time())
+        self.__tar.addfile(info, io.BytesIO(data))
+        self.__file.flush()  # data must be on disk before the index points to it
+
+        # The data ends at the current offset, rounded up to whole tar blocks
+        padded_size = -(-len(data) // TAR_BLOCK_SIZE) * TAR_BLOCK_SIZE
+        offset = self.__tar.offset - padded_size
+        self.__index.write(json.dumps({'key': key, 'shard': self.shard_name, 'offset': offset,
+                                       'size': len(data)}) + '\n')
+        self.__index.flush()
+
+    def add_file(self, file_path: str, input_file_name: str, hand: str, sample_number: int, kind: str,
+                 remove: bool = True) -> None:
+        """
+        Appends a result file to the current shard.
+        :param file_path: Path of the result file.
+        :param input_file_name: Name of the input file without extension (or the label for single samples).
+        :param hand: 'Left' or 'Right' hand.
+        :param sample_number: Index of the sample in the input file.
+        :param kind: Output file type, e.g. 'stl' or 'png'.
+        :param remove: Delete the file afterwards.
+        :return: None
+        """
+        with open(file_path, 'rb') as f:
+            self.add(input_file_name, hand, sample_number, kind, f.read(), os.path.basename(file_path))
+        if remove:
+            os.remove(file_path)
+
+    def close(self) -> None:
+        self.__close_shard()
+        self.__index.close()
+
+    def __enter__(self) -> 'ShardWriter':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+class ShardReader:
+    """
+    Reads single results from shards written by ShardWriter.
+    """
+
+    def __init__(self, output_dir: str) -> None:
+        self.output_dir = os.path.abspath(output_dir)
+        self.entries = {}  # key -> (shard, offset, size); later entries replace earlier ones
+        with open(os.path.join(self.output_dir, INDEX_FILE_NAME), 'r') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                self.entries[entry['key']] = (entry['shard'], entry['offset'], entry['size'])
+
+    def keys(self) -> list[str]:
+        return list(self.entries.keys())
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.entries
+
+    def read(self, input_file_name: str, hand: str, sample_number: int, kind: str) -> bytes:
+        """
+        Returns the content of a single result.
+        :param input_file_name: Name of the input file without extension (or the label for single samples).
+        :param hand: 'Left' or 'Right' hand.
+        :param sample_number: Index of the sample in the input file.
+        :param kind: Output file type, e.g. 'stl' or 'png'.
+        :return: Content of the result.
+        """
+        shard, offset, size = self.entries[get_key(input_file_name, hand, sample_number, kind)]
+        with open(os.path.join(self.output_dir, shard), 'rb') as f:
+            f.seek(offset)
+            return f.read(size)
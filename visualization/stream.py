@@ -0,0 +1,217 @@
+import json
+import os
+import socket
+import time
+from typing import Optional
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 9763
+MAX_DATAGRAM_SIZE = 65507
+LATENCY_WINDOW = 1000  # number of latest latencies kept for the metrics
+NUMBER_OF_ROTATION_VALUES = 8  # wrist and hand quaternion (w, x, y, z) at the start of 'rotations'
+NUMBER_OF_FINGERS = 5
+NUMBER_OF_JOINTS = 3
+SEQUENCE_RESET_GAP = 100  # a sequence number this far below the last one means the sender restarted
+
+
+def get_frame_times(samples: list[dict]) -> list[float]:
+    """
+    Returns a playback time (in seconds since the first frame) for each frame of a recording.
+    The glove timestamps only have a resolution of one second, so frames sharing a timestamp are spread evenly
+    over the time until the next timestamp.
+    :param samples: Frames of a dynamic gesture (e.g. 'startToHold' followed by 'holdToEnd').
+    :return: Time of each frame.
+    """
+    if not samples:
+        return []
+    timestamps = [float(s['timestamp']) for s in samples]
+    times = []
+    start_idx = 0
+    frame_interval = None
+    while start_idx < len(timestamps):
+        end_idx = start_idx
+        while end_idx < len(timestamps) and timestamps[end_idx] == timestamps[start_idx]:
+            end_idx += 1
+        if end_idx < len(timestamps):
+            frame_interval = (timestamps[end_idx] - timestamps[start_idx]) / (end_idx - start_idx)
+        elif frame_interval is None:  # a single timestamp in the whole recording
+            frame_interval = 1.0 / (end_idx - start_idx)
+        times += [timestamps[start_idx] - timestamps[0] + k * frame_interval for k in range(end_idx - start_idx)]
+        start_idx = end_idx
+    return times
+
+
+def encode_frame(sample: dict, seq: int, session: str = None) -> bytes:
+    """
+    Encodes a frame in the dynamic json shape ('rotations', 'spread', 'stretch') as datagram.
+    :param sample: Frame of a dynamic gesture.
+    :param seq: Increasing sequence number of the frame.
+    :param session: Id of the sender run, a new id tells the receiver that the sequence numbers start again.
+    :return: Datagram.
+    """
+    frame = {'seq': seq,
+             'sent_at': time.time(),
+             'rotations': sample['rotations'],
+             'spread': sample['spread'],
+             'stretch': sample['stretch']}
+    if session is not None:
+        frame['session'] = session
+    return json.dumps(frame).encode('utf-8')
+
+
+def _is_number_list(values, length: int) -> bool:
+    return isinstance(values, list) and len(values) == length and \
+        all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in values)
+
+
+def is_valid_frame(frame) -> bool:
+    """
+    Checks that a received frame can be applied to the hand: sequence number, send time and the shapes of
+    'rotations' (at least 8 numbers), 'spread' (5) and 'stretch' (5 x 3).
+    :param frame: Decoded datagram.
+    :return: True if the frame is complete.
+    """
+    if not isinstance(frame, dict):
+        return False
+    if not isinstance(frame.get('seq'), int) or not isinstance(frame.get('sent_at'), (int, float)):
+        return False
+    rotations, stretch = frame.get('rotations'), frame.get('stretch')
+    if not isinstance(rotations, list) or len(rotations) < NUMBER_OF_ROTATION_VALUES or \
+            not _is_number_list(rotations, len(rotations)):
+        return False
+    if not isinstance(stretch, list) or len(stretch) != NUMBER_OF_FINGERS:
+        return False
+    return _is_number_list(frame.get('spread'), NUMBER_OF_FINGERS) and \
+        all(_is_number_list(joints, NUMBER_OF_JOINTS) for joints in stretch)
+
+
+class LatestFrameReceiver:
+    """
+    Receives glove frames over UDP and only keeps the newest one. Frames that were overtaken before they could
+    be displayed (back-pressure) or that arrive out of order are dropped, malformed datagrams are ignored.
+    A restarted sender (new session id, or sequence numbers more than SEQUENCE_RESET_GAP below the last one)
+    starts a new stream.
+    """
+
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> None:
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind((host, port))
+        self.sock.setblocking(False)
+        self.last_seq = -1
+        self.session = None
+        self.restarts = 0
+        self.received = 0
+        self.dropped = 0
+        self.malformed = 0
+        self.displayed = 0
+        self.latencies = []  # end-to-end latencies in seconds (sent -> displayed)
+
+    def poll(self) -> Optional[dict]:
+        """
+        Reads all pending frames without blocking.
+        :return: The newest frame or None if no new frame arrived since the last call.
+        """
+        newest = None
+        while True:
+            try:
+                datagram = self.sock.recv(MAX_DATAGRAM_SIZE)
+            except (BlockingIOError, InterruptedError):
+                break
+            try:
+                frame = json.loads(datagram)
+            except ValueError:  # UnicodeDecodeError and json.JSONDecodeError are ValueErrors
+                frame = None
+            if not is_valid_frame(frame):  # would fail when applied to the hand
+                self.malformed += 1
+                continue
+            seq = frame['seq']
+            self.received += 1
+
+            if frame.get('session') != self.session or seq < self.last_seq - SEQUENCE_RESET_GAP:
+                if self.last_seq >= 0:  # not the first frame: the sender restarted
+                    self.restarts += 1
+                self.session = frame.get('session')
+                self.last_seq = -1
+            if seq <= self.last_seq:  # late frame, a newer one was already shown
+                self.dropped += 1
+                continue
+            if newest is not None:  # overtaken by this frame
+                self.dropped += 1
+            newest = frame
+            self.last_seq = seq
+        return newest
+
+    def mark_displayed(self, frame: dict) -> None:
+        """
+        Records the end-to-end latency of a frame once its pose is applied.
+        Sender and receiver must share a clock (same host), otherwise the latency includes the clock offset.
+        :param frame: Frame returned by poll().
+        :return: None
+        """
+        self.displayed += 1
+        self.latencies.append(time.time() - float(frame['sent_at']))
+        if len(self.latencies) > LATENCY_WINDOW:
+            del self.latencies[:len(self.latencies) - LATENCY_WINDOW]
+
+    def get_latency_metrics(self) -> dict:
+        """
+        Frame counters and latency percentiles (in milliseconds) of the latest frames.
+        :return: Dict with the metrics.
+        """
+        metrics = {'received': self.received, 'dropped': self.dropped, 'malformed': self.malformed,
+                   'restarts': self.restarts, 'displayed': self.displayed}
+        if self.latencies:
+            ordered = sorted(self.latencies)
+            for name, q in [('p50', 0.5), ('p95', 0.95), ('max', 1.0)]:
+                metrics[f"latency_{name}_ms"] = 1000.0 * ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+        return metrics
+
+    def close(self) -> None:
+        self.sock.close()
+
+
+class GloveStreamReplayer:
+    """
+    Plays the frames of a processed json file at recording speed over UDP. Stands in for the glove.
+    """
+
+    def __init__(self, json_path: str, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                 speed: float = 1.0) -> None:
+        """
+        :param json_path: Processed json file (e.g. example_dynamic.json).
+        :param host: Host of the receiver.
+        :param port: Port of the receiver.
+        :param speed: Playback speed factor.
+        """
+        with open(json_path, 'r') as f:
+            self.gesture_data = json.load(f)
+        self.address = (host, port)
+        self.speed = speed
+
+    def replay(self, loop: bool = False) -> int:
+        """
+        Sends the frames of all gestures (start to hold, then hold to end) with their original timing.
+        :param loop: Start again after the last gesture until interrupted.
+        :return: Number of sent frames.
+        """
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        session = f"{os.getpid()}-{time.time()}"  # a replay started again is a new stream for the receiver
+        seq = 0
+        try:
+            while True:
+                for gesture in self.gesture_data:
+                    samples = gesture['startToHold'] + gesture['holdToEnd']
+                    start = time.perf_counter()
+                    for sample, t in zip(samples, get_frame_times(samples)):
+                        delay = start + t / self.speed - time.perf_counter()
+                        if delay > 0:
+                            time.sleep(delay)
+                        sock.sendto(encode_frame(sample, seq, session), self.address)
+                        seq += 1
+                if not loop:
+                    break
+        except KeyboardInterrupt:
+            pass
+        finally:
+            sock.close()
+        return seq
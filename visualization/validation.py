@@ -0,0 +1,310 @@
+from dataclasses import dataclass, field
+
+import numpy as np
+
+import visualization.constraints as cnstr
+from visualization import readers
+
+NUMBER_OF_FEATURES = readers.NUMBER_OF_FEATURES
+HANDS = ['Left', 'Right']
+NUMBER_OF_FINGERS = 5
+NUMBER_OF_JOINTS = 3
+NUMBER_OF_ROTATION_VALUES = 8  # wrist and hand quaternion (w, x, y, z) at the start of 'rotations'
+
+# Normalized range of each index of a sample in WACH format (thumb spread is mapped from CONSTRAINT_NORM)
+WACH_LOWER_BOUNDS = np.array([cnstr.CONSTRAINT_NORM[0]] + [cnstr.SPREAD_FINGER_CONSTRAINT_NORM[0]] * 4 +
+                             [cnstr.CONSTRAINT_NORM[0]] * 15)
+WACH_UPPER_BOUNDS = np.array([cnstr.CONSTRAINT_NORM[1]] + [cnstr.SPREAD_FINGER_CONSTRAINT_NORM[1]] * 4 +
+                             [cnstr.CONSTRAINT_NORM[1]] * 15)
+
+# Glove data slightly exceeds the normalized ranges (e.g. stretch -0.14, spread -1.2 in the examples)
+DEFAULT_RANGE_TOLERANCE = 0.25
+
+
+@dataclass
+class ValidationIssue:
+    sample: int  # index of the sample or gesture (-1 if the issue concerns the whole input)
+    field: str
+    message: str
+
+
+@dataclass
+class ValidationReport:
+    source: str
+    number_of_samples: int = 0
+    issues: list[ValidationIssue] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.issues
+
+    def add(self, sample: int, field_name: str, message: str) -> None:
+        self.issues.append(ValidationIssue(sample, field_name, message))
+
+    def __str__(self) -> str:
+        if self.ok:
+            return f"{self.source}: {self.number_of_samples} sample(s) valid"
+        lines = [f"{self.source}: {len(self.issues)} issue(s) in {self.number_of_samples} sample(s)"]
+        lines += [f"  sample {issue.sample}, {issue.field}: {issue.message}" if issue.sample >= 0
+                  else f"  {issue.field}: {issue.message}" for issue in self.issues]
+        return '\n'.join(lines)
+
+
+def _format_index(index: tuple) -> str:
+    return ', '.join(str(int(i)) for i in index)
+
+
+def _describe_value(index: tuple) -> str:
+    return f"value [{_format_index(index)}]" if index else "value"  # scalar rows (e.g. timestamps) have no index
+
+
+def _get_shape(row) -> tuple | None:
+    """
+    Shape of a nested list of values or None if it is not a list or its rows differ in length.
+    """
+    if not isinstance(row, list):
+        return None
+    try:
+        return np.shape(np.asarray(row, dtype=object))
+    except ValueError:
+        return None
+
+
+def _report_value(report: ValidationReport, row_number: int, gesture_number: int | None, field_name: str,
+                  message: str) -> None:
+    """
+    Adds an issue of a row, which is a sample or (if gesture_number is given) a frame of a gesture.
+    """
+    if gesture_number is None:
+        report.add(row_number, field_name, message)
+    else:
+        report.add(gesture_number, field_name, f"frame {row_number}, {message}")
+
+
+def _get_value(row, index: tuple):
+    """
+    Value of a nested list of values at an index, as in numpy.
+    """
+    value = row
+    for i in index:
+        value = value[i]
+    return value
+
+
+def _to_float_array(rows: list, row_shape: tuple, row_numbers: list[int], report: ValidationReport, field_name: str,
+                    gesture_number: int = None) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Converts rows of values with the given shape into one float array. Values that are not single numbers are
+    reported and set to NaN, so that the remaining checks can still run on the whole array.
+    Rows are samples (reported by their number) or, if gesture_number is given, frames of that gesture.
+    :return: The array and a mask of the values that are not numbers.
+    """
+    shape = (len(rows),) + tuple(row_shape)
+    try:
+        values = np.asarray(rows, dtype=np.float64)
+        if values.shape == shape:
+            return values, np.zeros(shape, dtype=bool)
+    except (ValueError, TypeError):
+        pass
+
+    # Slow path only for broken input: find the values that are not single numbers
+    values = np.full(shape, np.nan)
+    not_a_number = np.zeros(shape, dtype=bool)
+    for row_idx, row in enumerate(rows):
+        for value_idx in np.ndindex(*row_shape):
+            try:
+                value = _get_value(row, value_idx)
+            except (IndexError, KeyError, TypeError):
+                value = None
+            if isinstance(value, (list, tuple, dict, set, np.ndarray)):
+                message = f"{_describe_value(value_idx)} is not a single number: {value!r}"
+            else:
+                try:
+                    values[(row_idx,) + value_idx] = float(value)
+                    continue
+                except (ValueError, TypeError):
+                    message = f"{_describe_value(value_idx)} is not a number: {value!r}"
+            not_a_number[(row_idx,) + value_idx] = True
+            _report_value(report, row_numbers[row_idx], gesture_number, field_name, message)
+    return values, not_a_number
+
+
+def _check_values(values: np.ndarray, not_a_number: np.ndarray, lower: np.ndarray, upper: np.ndarray,
+                  row_numbers: list[int], report: ValidationReport, field_name: str,
+                  range_tolerance: float, gesture_number: int = None) -> None:
+    """
+    Reports NaN/infinite values and values outside [lower - tolerance, upper + tolerance] for all rows at once.
+    """
+    lower = np.broadcast_to(lower, values.shape)
+    upper = np.broadcast_to(upper, values.shape)
+    finite = np.isfinite(values)
+    for idx in zip(*np.nonzero(~finite & ~not_a_number)):
+        _report_value(report, row_numbers[idx[0]], gesture_number, field_name,
+                      f"{_describe_value(idx[1:])} is NaN or infinite")
+    out_of_range = finite & ((values < lower - range_tolerance) | (values > upper + range_tolerance))
+    for idx in zip(*np.nonzero(out_of_range)):
+        _report_value(report, row_numbers[idx[0]], gesture_number, field_name,
+                      f"{_describe_value(idx[1:])} = {values[idx]} is outside [{lower[idx]}, {upper[idx]}]")
+
+
+def _check_timestamps(timestamps: list, report: ValidationReport, gesture_number: int) -> None:
+    """
+    Reports missing, non-numeric (e.g. lists), NaN/infinite and decreasing timestamps of the frames of a gesture.
+    Frames may share a timestamp (the glove timestamps have a resolution of one second, see stream.get_frame_times).
+    """
+    missing = [frame for frame, timestamp in enumerate(timestamps) if timestamp is None]
+    if missing:
+        report.add(gesture_number, 'timestamp', f"missing in {len(missing)} frame(s), first in frame {missing[0]}")
+        return
+    values, not_a_number = _to_float_array(timestamps, (), list(range(len(timestamps))), report, 'timestamp',
+                                           gesture_number)
+    _check_values(values, not_a_number, -np.inf, np.inf, list(range(len(timestamps))), report, 'timestamp', 0.0,
+                  gesture_number)
+    if not np.isfinite(values).all():
+        return
+    for frame in np.nonzero(np.diff(values) < 0)[0] + 1:
+        _report_value(report, int(frame), gesture_number, 'timestamp',
+                      f"{values[frame]} is earlier than {values[frame - 1]} of the frame before")
+
+
+def validate_wach_samples(data_samples: list[list], hand: str, source: str = 'samples',
+                          range_tolerance: float = DEFAULT_RANGE_TOLERANCE) -> ValidationReport:
+    """
+    Checks samples in WACH format before they are visualized: hand type, number of values, numbers only,
+    no NaN and values within the normalized ranges of constraints.py.
+    :param data_samples: Data samples in WACH format.
+    :param hand: 'Left' or 'Right' hand.
+    :param source: Name of the input used in the report.
+    :param range_tolerance: Allowed distance of a value to its normalized range.
+    :return: Report with all issues found.
+    """
+    report = ValidationReport(source, len(data_samples))
+    if hand not in HANDS:
+        report.add(-1, 'hand', f"must be 'Left' or 'Right', not {hand!r}")
+    if not data_samples:
+        report.add(-1, 'samples', "no samples")
+        return report
+
+    # Only flat lists with the right number of values can be checked as one array
+    complete = []
+    for idx, sample in enumerate(data_samples):
+        shape = _get_shape(list(sample)) if isinstance(sample, (list, tuple, np.ndarray)) else None
+        if shape is None or len(shape) != 1:
+            report.add(idx, 'values', f"must be a list of {NUMBER_OF_FEATURES} values, not {type(sample).__name__}")
+        elif shape[0] != NUMBER_OF_FEATURES:
+            report.add(idx, 'values', f"has {shape[0]} values instead of {NUMBER_OF_FEATURES}")
+        else:
+            complete.append(idx)
+    if complete:
+        values, not_a_number = _to_float_array([data_samples[idx] for idx in complete], (NUMBER_OF_FEATURES,),
+                                               complete, report, 'values')
+        _check_values(values, not_a_number, WACH_LOWER_BOUNDS, WACH_UPPER_BOUNDS, complete, report, 'values',
+                      range_tolerance)
+    return report
+
+
+def validate_wach_file(file_path: str, range_tolerance: float = DEFAULT_RANGE_TOLERANCE) -> ValidationReport:
+    """
+    Checks the layout of a WACH file (label, hand, empty line, then blocks of 20 values separated by one
+    empty line) and all its samples.
+    :param file_path: Path of the WACH file.
+    :param range_tolerance: Allowed distance of a value to its normalized range.
+    :return: Report with all issues found.
+    """
+    report = ValidationReport(file_path)
+    try:
+        with open(file_path, 'r') as f:
+            lines = [line.strip() for line in f.readlines()]
+    except (IOError, UnicodeDecodeError) as e:
+        report.add(-1, 'file', str(e))
+        return report
+    while lines and lines[-1] == '':  # Remove trailing new lines
+        del lines[-1]
+    if len(lines) < 3 or lines[0] == '' or lines[2] != '':
+        report.add(-1, 'file', "must start with label, hand type and an empty line")
+        return report
+
+    # Split samples at empty lines (a short sample or a stray line shows up as a block of the wrong size)
+    data_samples = [[]]
+    for line in lines[3:]:
+        if line == '':
+            data_samples.append([])
+        else:
+            data_samples[-1].append(line)
+    sample_report = validate_wach_samples(data_samples, lines[1], file_path, range_tolerance)
+    report.number_of_samples = sample_report.number_of_samples
+    report.issues += sample_report.issues
+    return report
+
+
+def validate_dynamic_gestures(gesture_data: list[dict], source: str = 'gestures',
+                              range_tolerance: float = DEFAULT_RANGE_TOLERANCE,
+                              require_timestamps: bool = False) -> ValidationReport:
+    """
+    Checks dynamic gestures before they are visualized: letter, hand type, frame lists and the shape, type and
+    range of 'rotations', 'spread' (5) and 'stretch' (5 x 3) of all frames. Timestamps are checked (present in
+    every frame, numbers, not decreasing) if a frame has one or if they are required.
+    :param gesture_data: Gestures as in processed json files.
+    :param source: Name of the input used in the report.
+    :param range_tolerance: Allowed distance of a value to its normalized range.
+    :param require_timestamps: Report frames without 'timestamp' (needed for resampling and real-time replay).
+    :return: Report with all issues found (sample is the index of the gesture).
+    """
+    report = ValidationReport(source, len(gesture_data) if isinstance(gesture_data, list) else 0)
+    if not isinstance(gesture_data, list) or not gesture_data:
+        report.add(-1, 'gestures', "must be a non-empty list of gestures")
+        return report
+
+    spread_lower = np.array([cnstr.CONSTRAINT_NORM[0]] + [cnstr.SPREAD_FINGER_CONSTRAINT_NORM[0]] * 4)
+    spread_upper = np.array([cnstr.CONSTRAINT_NORM[1]] + [cnstr.SPREAD_FINGER_CONSTRAINT_NORM[1]] * 4)
+    for idx, gesture in enumerate(gesture_data):
+        if not isinstance(gesture, dict):
+            report.add(idx, 'gesture', "must be an object")
+            continue
+        if not str(gesture.get('letter', '')):
+            report.add(idx, 'letter', "missing")
+        if gesture.get('hand') not in HANDS:
+            report.add(idx, 'hand', f"must be 'Left' or 'Right', not {gesture.get('hand')!r}")
+        frames = []
+        for phase in ['startToHold', 'holdToEnd']:
+            if not isinstance(gesture.get(phase), list):
+                report.add(idx, phase, "missing frame list")
+            else:
+                frames += gesture[phase]
+        if not frames:
+            report.add(idx, 'frames', "no frames")
+            continue
+        if not all(isinstance(frame, dict) for frame in frames):
+            report.add(idx, 'frames', "every frame must be an object")
+            continue
+        timestamps = [frame.get('timestamp') for frame in frames]
+        if require_timestamps or any(timestamp is not None for timestamp in timestamps):
+            _check_timestamps(timestamps, report, idx)
+
+        # Check each field of all frames of the gesture as one array
+        for field_name, shape, lower, upper in [
+                ('rotations', None, -np.inf, np.inf),
+                ('spread', (NUMBER_OF_FINGERS,), spread_lower, spread_upper),
+                ('stretch', (NUMBER_OF_FINGERS, NUMBER_OF_JOINTS), cnstr.CONSTRAINT_NORM[0], cnstr.CONSTRAINT_NORM[1])]:
+            rows = [frame.get(field_name) for frame in frames]
+            frame_numbers = list(range(len(rows)))
+            try:  # fast path: all frames are numbers of the same shape
+                values = np.asarray(rows, dtype=np.float64)
+                not_a_number = np.zeros(values.shape, dtype=bool)
+                shapes = {values.shape[1:]}
+            except (ValueError, TypeError):
+                values = None
+                shapes = {_get_shape(row) for row in rows}
+            if field_name == 'rotations':
+                shape = next(iter(shapes)) if len(shapes) == 1 else None
+                if shape is None or len(shape) != 1 or shape[0] < NUMBER_OF_ROTATION_VALUES:
+                    report.add(idx, field_name, f"must be lists of at least {NUMBER_OF_ROTATION_VALUES} values "
+                                                f"of the same length in every frame")
+                    continue
+            elif shapes != {shape}:
+                report.add(idx, field_name, f"must have shape {shape} in every frame, found {sorted(map(str, shapes))}")
+                continue
+            if values is None:
+                values, not_a_number = _to_float_array(rows, shape, frame_numbers, report, field_name, idx)
+            _check_values(values, not_a_number, lower, upper, frame_numbers, report, field_name, range_tolerance, idx)
+    return report
@@ -5,38 +5,112 @@ import os
 import json
 from pathlib import Path
 import platform
+import tempfile
+import hashlib
+import time
 from PIL import Image
+from visualization import readers
+from visualization import pose
+from visualization import gltf_export
+from visualization import metrics
+from visualization import resampling
+from visualization import validation
+from visualization import frame_transfer
+from visualization.pose_index import collapse_near_duplicates
+from visualization.pose_cache import PoseCache
+from visualization.shards import ShardWriter
 
 PARENT_DIR = Path(__file__).parent.resolve()
+PNG_CROP_BOX = (400, 50, 1350, 1050)  # part of a rendered image that shows the hand
+
+
+def create_private_blender_script(blender_script_path: str) -> str:
+    """
+    Copies a blender script next to the original one. The visualizers rewrite their blender script in place, so
+    visualizers that run in parallel (several workers on one host) each need their own copy.
+    The copy stays in the same folder because the scripts resolve the hand models relative to their own location.
+    :param blender_script_path: Path of the blender script that should be copied.
+    :return: Path of the private copy. The caller removes it when it is not needed anymore.
+    """
+    script_dir, script_name = os.path.split(os.path.abspath(blender_script_path))
+    fd, private_script_path = tempfile.mkstemp(prefix=f"_{script_name[:-3]}_", suffix=".py", dir=script_dir)
+    os.close(fd)
+    shutil.copyfile(blender_script_path, private_script_path)
+    return private_script_path
+
+
+def run_blender(args: list[str], kind: str) -> subprocess.CompletedProcess:
+    """
+    Runs a blender process and records it in the metrics (processes in flight and run time).
+    :param args: Command line arguments, starting with the blender path.
+    :param kind: Metrics label, e.g. 'static' or 'dynamic'.
+    :return: The finished process.
+    """
+    with metrics.REGISTRY.track(metrics.BLENDER_PROCESSES, metrics.BLENDER_SECONDS, {'kind': kind}):
+        return subprocess.run(args)
+
+
+def record_sample(kind: str, completed: bool) -> None:
+    """
+    Counts a sample or gesture as completed or failed in the metrics.
+    :param kind: Metrics label, e.g. 'static' or 'dynamic'.
+    :param completed: If the output was written.
+    :return: None
+    """
+    metrics.REGISTRY.inc(metrics.SAMPLES_TOTAL, labels={'kind': kind, 'result': 'completed' if completed else 'failed'})
+    if completed:
+        metrics.REGISTRY.mark(metrics.SAMPLES_PER_SECOND, {'kind': kind})
 
 
 class DynamicDataVisualizer:
     SUPPORTED_OUT_FILE_TYPES = ['blend']
 
-    def __init__(self, output_dir: str = os.path.join(PARENT_DIR, R"../dynamic")) -> None:
+    def __init__(self,
+                 output_dir: str = os.path.join(PARENT_DIR, R"../dynamic"),
+                 blender_script_path: str = os.path.join(PARENT_DIR, R"./blender_script_dynamic.py")) -> None:
         self.label = ""
         self.hand = ""
         self.gesture_data = {}  # json data of interval for dynamic gesture
+        self.fps = 0  # frame rate the gestures were resampled to (0 if not resampled)
         self.blender_path = R"/Applications/Blender.app/Contents/MacOS/Blender" if \
             platform.system() == 'Darwin' else shutil.which('blender')  # check if mac
-        self.blender_script_path = os.path.join(PARENT_DIR, R"./blender_script_dynamic.py")
+        self.blender_script_path = blender_script_path
         self.output_dir = os.path.abspath(output_dir)
 
         Path(output_dir).mkdir(parents=True, exist_ok=True)
 
+    def get_output_file_path(self, label: str, hand: str, iteration: int, file_type: str = 'blend') -> str:
+        """
+        Returns the path under which the gesture with the given index of a json file is saved.
+        :param label: Label of the gesture.
+        :param hand: 'Left' or 'Right' hand.
+        :param iteration: Index of the gesture in the json file.
+        :param file_type: Output file type.
+        :return: Output file path.
+        """
+        return os.path.join(self.output_dir, f"dynamic_{label}_{hand}_{iteration}.{file_type}")
+
     @staticmethod
     def __check_input_file_type(json_path: str) -> bool:
         return True if json_path.endswith('.json') else False
 
-    def generate_dynamic_gesture(self, json_path: str, export: bool) -> None:
+    def generate_dynamic_gesture(self,
+                                 json_path: str,
+                                 export: bool,
+                                 target_fps: float = None,
+                                 gesture_indices: list[int] = None) -> None:
         """
         Generates the dynamic gesture from the json data and the given label. Either save the result
         as file or open it directly in blender.
         :param json_path:
         :param export:
+        :param target_fps: If set, the frames are resampled to this frame rate using their timestamps (see
+        resampling.py). Otherwise each sample becomes one frame.
+        :param gesture_indices: Indices of the gestures in the json file to generate (default: all).
         :return:
         """
         print("Generating dynamic gesture ...")
+        self.__reset()  # nothing of an earlier call is left if this input is rejected
 
         # Assert input
         if self.blender_path is None:
@@ -47,29 +121,235 @@ class DynamicDataVisualizer:
             print("Json file needed as input!")
             return
 
-        with open(json_path, 'r') as f:
-            gesture_data = json.load(f)
+        gesture_data = readers.read_dynamic_file(json_path)
         if not gesture_data:
             print("This label is not present in the json data!")
             return
 
+        report = validation.validate_dynamic_gestures(gesture_data, json_path, require_timestamps=bool(target_fps))
+        if not report.ok:  # fail before any blender process is started
+            print(report)
+            return
+
         # Set attributes
-        self.__reset()
-        self.gesture_data = gesture_data
+        self.gesture_data = self.__resample(gesture_data, target_fps)
         self.label = gesture_data[0]["letter"]
         self.hand = gesture_data[0]["hand"]
+        self.fps = target_fps if target_fps else 0
 
         # Build and run dynamic blender script for each gesture
         for i, d in enumerate(self.gesture_data):
-            print('hey', i)
+            if gesture_indices is not None and i not in gesture_indices:
+                continue
+            print(f"Gesture {i + 1} of {len(self.gesture_data)} ...")
             self.iteration = i
-            self.__create_dynamic_blender_script(d, export)
-            self.__run_dynamic_blender_script(export)
-            self.__reset_dynamic_blender_script(d, export)
+            frames_descriptor = frame_transfer.write_frame_arrays(d)
+            try:
+                self.__create_dynamic_blender_script(frames_descriptor, export)
+                self.__run_dynamic_blender_script(export)
+                self.__reset_dynamic_blender_script(frames_descriptor, export)
+            finally:
+                frame_transfer.remove_frame_arrays(frames_descriptor)
+            if export:
+                record_sample('dynamic', os.path.exists(self.get_output_file_path(self.label, self.hand, i)))
 
         print("Finished generating dynamic gesture(s)!")
 
-    def __create_dynamic_blender_script(self, gesture_data: dict, export: bool) -> None:
+    def generate_dynamic_gesture_gltf(self,
+                                      json_path: str,
+                                      base_asset_path: str = None,
+                                      fps: float = 24,
+                                      target_fps: float = None) -> None:
+        """
+        Generates the dynamic gestures from the json data as glTF animation (GLB) without blender.
+        :param json_path: Processed json file.
+        :param base_asset_path: Skinned hand model to include (see StaticDataVisualizer.get_base_asset_path).
+        Without it only the animated skeleton is written.
+        :param fps: Frame rate of the animation (one frame per sample).
+        :param target_fps: If set, the frames are resampled to this frame rate using their timestamps and played
+        at it (fps is ignored).
+        :return: None
+        """
+        print("Generating dynamic gesture(s) as glTF ...")
+        self.__reset()  # nothing of an earlier call is left if this input is rejected
+
+        if not self.__check_input_file_type(json_path):
+            print("Json file needed as input!")
+            return
+
+        gesture_data = readers.read_dynamic_file(json_path)
+        if not gesture_data:
+            print("This label is not present in the json data!")
+            return
+
+        report = validation.validate_dynamic_gestures(gesture_data, json_path, require_timestamps=bool(target_fps))
+        if not report.ok:  # fail before any blender process is started
+            print(report)
+            return
+
+        # Set attributes
+        self.gesture_data = self.__resample(gesture_data, target_fps)
+        self.label = gesture_data[0]["letter"]
+        self.hand = gesture_data[0]["hand"]
+        fps = target_fps if target_fps else fps
+
+        for i, d in enumerate(self.gesture_data):
+            gltf_export.export_gesture_animation(d['startToHold'] + d['holdToEnd'], self.hand,
+                                                 self.get_output_file_path(self.label, self.hand, i, 'glb'),
+                                                 name=f"{self.label}_{i}", fps=fps, base_asset_path=base_asset_path)
+
+        print("Finished generating dynamic gesture(s)!")
+
+    def render_dynamic_gesture(self,
+                               json_path: str,
+                               output_format: str = 'gif',
+                               processes: int = None,
+                               fps: int = 24,
+                               target_fps: int = None) -> None:
+        """
+        Renders the dynamic gestures from the json data as image sequence and assembles them into a GIF or MP4.
+        The frames of a gesture are split into ranges that are rendered by several blender processes at once.
+        :param json_path: Processed json file.
+        :param output_format: 'gif' or 'mp4' (needs ffmpeg in path).
+        :param processes: Number of blender processes (default: number of cores).
+        :param fps: Frame rate of the assembled animation (one frame per sample).
+        :param target_fps: If set, the frames are resampled to this frame rate using their timestamps and the
+        animation is assembled at it (fps is ignored).
+        :return: None
+        """
+        print("Rendering dynamic gesture(s) ...")
+        self.__reset()  # nothing of an earlier call is left if this input is rejected
+
+        # Assert input
+        if self.blender_path is None:
+            print("Blender must be installed and in path!")
+            return
+
+        if not self.__check_input_file_type(json_path):
+            print("Json file needed as input!")
+            return
+
+        if output_format not in ['gif', 'mp4']:
+            print("Output format not supported!")
+            return
+
+        gesture_data = readers.read_dynamic_file(json_path)
+        if not gesture_data:
+            print("This label is not present in the json data!")
+            return
+
+        report = validation.validate_dynamic_gestures(gesture_data, json_path, require_timestamps=bool(target_fps))
+        if not report.ok:  # fail before any blender process is started
+            print(report)
+            return
+
+        # Set attributes
+        self.gesture_data = self.__resample(gesture_data, target_fps)
+        self.label = gesture_data[0]["letter"]
+        self.hand = gesture_data[0]["hand"]
+        self.fps = target_fps if target_fps else 0
+        fps = target_fps if target_fps else fps
+        processes = processes if processes else os.cpu_count()
+
+        for i, d in enumerate(self.gesture_data):
+            number_of_frames = len(d['startToHold']) + len(d['holdToEnd'])
+            if number_of_frames == 0:
+                print(f"Gesture {i} has no frames!")
+                record_sample('render', False)
+                continue
+            frame_dir = os.path.join(self.output_dir, 'frames', f"dynamic_{self.label}_{self.hand}_{i}")
+            Path(frame_dir).mkdir(parents=True, exist_ok=True)
+            frame_paths = [os.path.join(frame_dir, f"frame_{frame:04d}.png")
+                           for frame in range(1, number_of_frames + 1)]
+            for path in frame_paths:  # frames of an earlier render must not be assembled if blender fails
+                if os.path.exists(path):
+                    os.remove(path)
+
+            # Split frames 1..n into one contiguous range per process
+            slices = min(processes, number_of_frames)
+            bounds = [1 + (number_of_frames * k) // slices for k in range(slices + 1)]
+            script_paths = []
+            running = []
+            labels = {'kind': 'render'}
+            frames_descriptor = frame_transfer.write_frame_arrays(d)  # written once, mapped by all processes
+            try:
+                for k in range(slices):
+                    script_path = create_private_blender_script(self.blender_script_path)
+                    script_paths.append(script_path)
+                    self.__create_render_blender_script(script_path, frames_descriptor, bounds[k], bounds[k + 1] - 1,
+                                                        frame_dir)
+                    running.append((subprocess.Popen([self.blender_path, "--background", "--python", script_path],
+                                                     stdout=subprocess.DEVNULL), time.perf_counter()))
+                    metrics.REGISTRY.add(metrics.BLENDER_PROCESSES, 1, labels)
+                while running:  # poll, so that each process is timed when it ends and not when it is waited for
+                    for process, start in [entry for entry in running if entry[0].poll() is not None]:
+                        running.remove((process, start))
+                        metrics.REGISTRY.add(metrics.BLENDER_PROCESSES, -1, labels)
+                        metrics.REGISTRY.observe(metrics.BLENDER_SECONDS, time.perf_counter() - start, labels)
+                    if running:
+                        time.sleep(0.05)
+            finally:
+                metrics.REGISTRY.add(metrics.BLENDER_PROCESSES, -len(running), labels)  # if waiting was interrupted
+                for script_path in script_paths:
+                    os.remove(script_path)
+                frame_transfer.remove_frame_arrays(frames_descriptor)
+
+            output_path = self.get_output_file_path(self.label, self.hand, i, output_format)
+            self.__assemble_animation(frame_paths, output_path, output_format, fps)
+            record_sample('render', os.path.exists(output_path))
+
+        print("Finished rendering dynamic gesture(s)!")
+
+    def __create_render_blender_script(self,
+                                       script_path: str,
+                                       frames_descriptor: dict,
+                                       frame_start: int,
+                                       frame_end: int,
+                                       frame_dir: str) -> None:
+        # Replace variables in a private copy of blender_script_dynamic.py (no reset needed)
+        values = {"LABEL = ''": f"LABEL = '{self.label}'",
+                  "HAND = ''": f"HAND = '{self.hand}'",
+                  "frames_descriptor = {}": f"frames_descriptor = {str(frames_descriptor)}",
+                  "FPS = 0": f"FPS = {self.fps}",
+                  "RENDER_FRAME_START = 0": f"RENDER_FRAME_START = {frame_start}",
+                  "RENDER_FRAME_END = 0": f"RENDER_FRAME_END = {frame_end}",
+                  "RENDER_PNG_DIR_STR = ''": f"RENDER_PNG_DIR_STR = R'{frame_dir}'"}
+        for old, new in values.items():
+            for line in fileinput.input(script_path, inplace=True):
+                print(line.replace(old, new).rstrip())
+
+    @staticmethod
+    def __assemble_animation(frame_paths: list[str], output_path: str, output_format: str, fps: int) -> None:
+        if not frame_paths:
+            print("No frames to assemble!")
+            return
+        missing = [path for path in frame_paths if not os.path.exists(path)]
+        if missing:
+            print(f"Could not render {len(missing)} frame(s)!")
+            return
+
+        # Crop copies like the static PNG export, the rendered frames are kept unchanged
+        frames = []
+        for path in frame_paths:
+            with Image.open(path) as img:
+                frames.append(img.crop(PNG_CROP_BOX).convert('RGBA'))
+
+        if output_format == 'gif':
+            frames[0].save(output_path, save_all=True, append_images=frames[1:], duration=int(1000 / fps), loop=0,
+                           disposal=2)
+        else:
+            ffmpeg_path = shutil.which('ffmpeg')
+            if ffmpeg_path is None:
+                print("ffmpeg must be installed and in path for MP4 export!")
+                return
+            with tempfile.TemporaryDirectory(prefix='cropped_') as cropped_dir:
+                for idx, frame in enumerate(frames):
+                    frame.save(os.path.join(cropped_dir, f"frame_{idx + 1:04d}.png"))
+                subprocess.run([ffmpeg_path, "-y", "-framerate", str(fps), "-start_number", "1",
+                                "-i", os.path.join(cropped_dir, "frame_%04d.png"),
+                                "-pix_fmt", "yuv420p", output_path])
+
+    def __create_dynamic_blender_script(self, frames_descriptor: dict, export: bool) -> None:
         # Replace export variable in blender_script_dynamic.py
         for line in fileinput.input(self.blender_script_path, inplace=True):
             print(line.replace("EXPORT = None", f"EXPORT = '{str(export)}'").rstrip())
@@ -82,9 +362,13 @@ class DynamicDataVisualizer:
         for line in fileinput.input(self.blender_script_path, inplace=True):
             print(line.replace("HAND = ''", f"HAND = '{self.hand}'").rstrip())
 
-        # Replace gesture_data variable in blender_script_dynamic.py
+        # Replace frames_descriptor variable in blender_script_dynamic.py (the frames are read from the arrays)
+        for line in fileinput.input(self.blender_script_path, inplace=True):
+            print(line.replace("frames_descriptor = {}", f"frames_descriptor = {str(frames_descriptor)}").rstrip())
+
+        # Replace fps variable in blender_script_dynamic.py
         for line in fileinput.input(self.blender_script_path, inplace=True):
-            print(line.replace("gesture_data = {}", f"gesture_data = {str(gesture_data)}").rstrip())
+            print(line.replace("FPS = 0", f"FPS = {self.fps}").rstrip())
 
         # Replace export_file_type variable in blender_script_dynamic.py
         for line in fileinput.input(self.blender_script_path, inplace=True):
@@ -95,12 +379,12 @@ class DynamicDataVisualizer:
         for output_file_type in self.SUPPORTED_OUT_FILE_TYPES:
             out_str = f"{output_file_type.upper()}_PATH_STR"
             old_output_path = f"{out_str} = ''"
-            new_value = os.path.join(self.output_dir, f"dynamic_{self.label}_{self.hand}_{self.iteration}.{output_file_type}")
+            new_value = self.get_output_file_path(self.label, self.hand, self.iteration, output_file_type)
             new_output_path = f"{out_str} = R'{new_value}'"
             for line in fileinput.input(self.blender_script_path, inplace=True):
                 print(line.replace(old_output_path, new_output_path).rstrip())
 
-    def __reset_dynamic_blender_script(self, gesture_data: dict, export: bool) -> None:
+    def __reset_dynamic_blender_script(self, frames_descriptor: dict, export: bool) -> None:
         # Reset each change done in __create_dynamic_blender_script()
         for line in fileinput.input(self.blender_script_path, inplace=True):
             print(line.replace(f"EXPORT = '{str(export)}'", "EXPORT = None").rstrip())
@@ -109,7 +393,9 @@ class DynamicDataVisualizer:
         for line in fileinput.input(self.blender_script_path, inplace=True):
             print(line.replace(f"HAND = '{self.hand}'", "HAND = ''").rstrip())
         for line in fileinput.input(self.blender_script_path, inplace=True):
-            print(line.replace(f"gesture_data = {str(gesture_data)}", "gesture_data = {}").rstrip())
+            print(line.replace(f"frames_descriptor = {str(frames_descriptor)}", "frames_descriptor = {}").rstrip())
+        for line in fileinput.input(self.blender_script_path, inplace=True):
+            print(line.replace(f"FPS = {self.fps}", "FPS = 0").rstrip())
         for line in fileinput.input(self.blender_script_path, inplace=True):
             print(line.replace(
                 f"EXPORT_FILE_TYPE = 'blend'", "EXPORT_FILE_TYPE = ''").rstrip())
@@ -117,7 +403,7 @@ class DynamicDataVisualizer:
         for output_file_type in self.SUPPORTED_OUT_FILE_TYPES:
             out_str = f"{output_file_type.upper()}_PATH_STR"
             old_output_path = f"{out_str} = ''"
-            new_value = os.path.join(self.output_dir, f"dynamic_{self.label}_{self.hand}_{self.iteration}.{output_file_type}")
+            new_value = self.get_output_file_path(self.label, self.hand, self.iteration, output_file_type)
             new_output_path = f"{out_str} = R'{new_value}'"
             for line in fileinput.input(self.blender_script_path, inplace=True):
                 print(line.replace(new_output_path, old_output_path).rstrip())
@@ -126,55 +412,151 @@ class DynamicDataVisualizer:
         self.label = ""
         self.hand = ""
         self.gesture_data = {}
+        self.fps = 0
+
+    @staticmethod
+    def __resample(gesture_data: list[dict], target_fps: float = None) -> list[dict]:
+        if not target_fps:
+            return gesture_data
+        return [resampling.resample_gesture(gesture, target_fps) for gesture in gesture_data]
 
     def __run_dynamic_blender_script(self, export: bool):
         args = [self.blender_path, "--background", "--python", self.blender_script_path]  # Build cmd line arguments
         if not export:
             args.remove("--background")
-        subprocess.run(args)  # Run blender process with script
+        run_blender(args, 'dynamic')  # Run blender process with script
 
 
 class StaticDataVisualizer:
     SUPPORTED_IN_FILE_TYPES = ['txt']
     SUPPORTED_OUT_FILE_TYPES = ['stl', 'blend', 'obj']
+    POSE_ONLY_FILE_TYPE = 'pose'  # bone rotations per sample plus one shared base asset per hand
+    LOD_FILE_TYPES = ['stl', 'obj']  # file types that decimated meshes can be exported as
 
     def __init__(self,
                  blender_script_path: str = os.path.join(PARENT_DIR, R"./blender_script_static.py"),
-                 output_dir: str = os.path.join(PARENT_DIR, R"../static")) -> None:
+                 output_dir: str = os.path.join(PARENT_DIR, R"../static"),
+                 output_sink: ShardWriter = None,
+                 pose_cache: PoseCache = None) -> None:
         self.label = ""
         self.hand = ""
         self.data_samples = []  # List of lists (multiple samples)
+        self.sample_numbers = []  # Index of each sample in its input file (used in output file names)
         self.input_file_name = R""
         self.blender_path = R"/Applications/Blender.app/Contents/MacOS/Blender" if \
             platform.system() == 'Darwin' else shutil.which('blender')  # check if mac
         self.blender_script_path = blender_script_path
         self.output_dir = output_dir
         self.output_dir_png = os.path.join(output_dir, 'png')
+        self.output_sink = output_sink  # if set, results are moved into shard archives
+        self.pose_cache = pose_cache  # if set, results of poses in the same grid cell are reused
 
         Path(output_dir).mkdir(parents=True, exist_ok=True)
         Path(self.output_dir_png).mkdir(parents=True, exist_ok=True)  # create folder for PNG images
 
-    def generate_static_gesture_from_file(self, file_path: str, file_type: str, export_png: bool = False) -> None:
+    def get_output_file_path(self, input_file_name: str, hand: str, sample_number: int, file_type: str) -> str:
+        """
+        Returns the path under which a sample is exported.
+        :param input_file_name: Name of the input file without extension (or the label for single samples).
+        :param hand: 'Left' or 'Right' hand.
+        :param sample_number: Index of the sample in the input file.
+        :param file_type: Output file type.
+        :return: Output file path.
+        """
+        return os.path.join(self.output_dir, f"{input_file_name}_{hand}_{sample_number}_{file_type}.{file_type}")
+
+    def get_output_lod_path(self, input_file_name: str, hand: str, sample_number: int, triangle_budget: int,
+                            file_type: str) -> str:
+        """
+        Returns the path under which the decimated mesh of a sample for a triangle budget is exported.
+        :param input_file_name: Name of the input file without extension (or the label for single samples).
+        :param hand: 'Left' or 'Right' hand.
+        :param sample_number: Index of the sample in the input file.
+        :param triangle_budget: Maximum number of triangles.
+        :param file_type: Output file type ('stl' or 'obj').
+        :return: Output file path.
+        """
+        return os.path.join(self.output_dir, 'lod',
+                            f"{input_file_name}_{hand}_{sample_number}_lod{triangle_budget}_{file_type}.{file_type}")
+
+    def get_output_pose_path(self, input_file_name: str, hand: str) -> str:
+        """
+        Returns the path of the pose records (one json line per sample) of an input file.
+        :param input_file_name: Name of the input file without extension (or the label for single samples).
+        :param hand: 'Left' or 'Right' hand.
+        :return: Output file path.
+        """
+        return os.path.join(self.output_dir, f"{input_file_name}_{hand}_pose.jsonl")
+
+    def get_result_path(self, input_file_name: str, hand: str, sample_number: int, file_type: str) -> str:
+        """
+        Returns the path of the main result of a sample: the pose records for the pose-only export, otherwise the
+        exported file.
+        :param input_file_name: Name of the input file without extension (or the label for single samples).
+        :param hand: 'Left' or 'Right' hand.
+        :param sample_number: Index of the sample in the input file.
+        :param file_type: Output file type (see SUPPORTED_OUT_FILE_TYPES and POSE_ONLY_FILE_TYPE).
+        :return: Output file path.
+        """
+        if file_type == self.POSE_ONLY_FILE_TYPE:
+            return self.get_output_pose_path(input_file_name, hand)
+        return self.get_output_file_path(input_file_name, hand, sample_number, file_type)
+
+    def get_base_asset_path(self, hand: str) -> str:
+        """
+        Returns the path of the skinned hand model that the pose records refer to.
+        :param hand: 'Left' or 'Right' hand.
+        :return: Path of the GLB file.
+        """
+        return os.path.join(self.output_dir, 'base', f"Manus-Hand-{hand}.glb")
+
+    def get_output_png_path(self, input_file_name: str, hand: str, sample_number: int) -> str:
+        """
+        Returns the path under which the rendered image of a sample is exported.
+        :param input_file_name: Name of the input file without extension (or the label for single samples).
+        :param hand: 'Left' or 'Right' hand.
+        :param sample_number: Index of the sample in the input file.
+        :return: Output PNG path.
+        """
+        return os.path.join(self.output_dir_png, f"{input_file_name}_{hand}_{sample_number}_PNG.png")
+
+    def generate_static_gesture_from_file(self,
+                                          file_path: str,
+                                          file_type: str,
+                                          export_png: bool = False,
+                                          dedup_tolerance: float = None,
+                                          lod_triangle_budgets: list[int] = None) -> None:
         """
         Generates three static gestures from the file with data in WACH format. The files must contain
         data for three gestures.
         :param file_path:
         :param file_type:
         :param export_png:
+        :param dedup_tolerance: If set, samples at most this far (euclidean distance of the normalized values) from
+        an earlier sample of the file are not rendered; the result of the earlier sample is copied instead.
+        :param lod_triangle_budgets: If set, decimated meshes with at most these numbers of triangles are exported
+        additionally (stl and obj only, see get_output_lod_path).
         :return:
         """
         print("Generating static gesture ...")
+        self.__reset()  # nothing of an earlier call is left if this input is rejected
 
         # Assert arguments
         if self.blender_path is None:
             print("Blender must be installed and in path!")
             return
 
-        if file_type not in self.SUPPORTED_OUT_FILE_TYPES:
+        if file_type not in self.SUPPORTED_OUT_FILE_TYPES + [self.POSE_ONLY_FILE_TYPE]:
             print("File type for export not supported!")
+            return
+
+        report = validation.validate_wach_file(file_path)
+        if not report.ok:  # fail before any blender process is started
+            print(report)
+            return
 
         self.__read_from_file(file_path)
-        self.__export_as(file_type, export_png)
+        self.__export_as(file_type, export_png, dedup_tolerance, lod_triangle_budgets)
 
         print("Finished generating static gesture!")
 
@@ -183,7 +565,10 @@ class StaticDataVisualizer:
                                             hand: str,
                                             sample_values: list[str],
                                             file_type: str,
-                                            export_png: bool = False) -> None:
+                                            export_png: bool = False,
+                                            lod_triangle_budgets: list[int] = None,
+                                            sample_number: int = 0,
+                                            input_file_name: str = None) -> None:
         """
         Generates a static gesture from the given data in WACH format as list.
         :param label:
@@ -191,20 +576,103 @@ class StaticDataVisualizer:
         :param sample_values:
         :param file_type:
         :param export_png:
+        :param lod_triangle_budgets: If set, decimated meshes with at most these numbers of triangles are exported
+        additionally (stl and obj only, see get_output_lod_path).
+        :param sample_number: Index of the sample in its input file (used in the output file names).
+        :param input_file_name: Name of the input file without extension, so that the outputs replace those of
+        generate_static_gesture_from_file for this sample (defaults to the label).
         :return:
         """
         print("Generating static gesture ...")
+        self.__reset()  # nothing of an earlier call is left if this input is rejected
 
         # Assert arguments
         if self.blender_path is None:
             print("Blender must be installed and in path!")
             return
 
-        self.__read_sample(label, hand, sample_values)
-        self.__export_as(file_type, export_png)
+        report = validation.validate_wach_samples([sample_values], hand, label)
+        if not report.ok:  # fail before any blender process is started
+            print(report)
+            return
+
+        self.__read_sample(label, hand, sample_values, sample_number, input_file_name)
+        self.__export_as(file_type, export_png, lod_triangle_budgets=lod_triangle_budgets)
 
         print("Finished generating static gesture!")
 
+    def generate_static_atlas_from_files(self,
+                                         file_paths: list[str],
+                                         atlas_name: str = 'atlas',
+                                         columns: int = 8,
+                                         cell_pixels: int = 256) -> None:
+        """
+        Renders all samples of the given WACH files into one image per hand (contact sheet). All hands of an image
+        are posed in one blender scene and rendered at once. Besides the image, a json file lists the pixel
+        rectangle, source file and sample number of each cell.
+        :param file_paths: WACH files.
+        :param atlas_name: Name of the output files ({atlas_name}_{hand}_atlas.png/.json in the png folder).
+        :param columns: Number of hands per row.
+        :param cell_pixels: Width and height of a cell in pixels.
+        :return: None
+        """
+        print("Generating static gesture atlas ...")
+
+        # Assert arguments
+        if self.blender_path is None:
+            print("Blender must be installed and in path!")
+            return
+
+        # Collect samples per hand
+        cells_per_hand = {}
+        for file_path in file_paths:
+            report = validation.validate_wach_file(file_path)
+            if not report.ok:  # skip the file instead of failing the whole atlas in blender
+                print(report)
+                continue
+            label, hand, data_samples = readers.read_wach_file(file_path)
+            for idx, sample in enumerate(data_samples):
+                cells_per_hand.setdefault(hand, []).append(({'source': os.path.abspath(file_path), 'label': label,
+                                                             'sample': idx}, sample))
+
+        for hand, cells in cells_per_hand.items():
+            atlas_png_path = os.path.join(self.output_dir_png, f"{atlas_name}_{hand}_atlas.png")
+            atlas_cells_path = os.path.join(self.output_dir_png, f"{atlas_name}_{hand}_atlas.json")
+            if os.path.exists(atlas_cells_path):  # written by blender, must not be left over from an earlier run
+                os.remove(atlas_cells_path)
+
+            # Replace variables in a private copy of blender_script_atlas.py (no reset needed)
+            script_path = create_private_blender_script(os.path.join(PARENT_DIR, R"./blender_script_atlas.py"))
+            try:
+                values = {"HAND = ''": f"HAND = '{hand}'",
+                          "samples = []": f"samples = {str([sample for _, sample in cells])}",
+                          "COLUMNS = 0": f"COLUMNS = {int(columns)}",
+                          "CELL_PIXELS = 0": f"CELL_PIXELS = {int(cell_pixels)}",
+                          "ATLAS_PNG_STR = ''": f"ATLAS_PNG_STR = R'{atlas_png_path}'",
+                          "ATLAS_CELLS_STR = ''": f"ATLAS_CELLS_STR = R'{atlas_cells_path}'"}
+                for old, new in values.items():
+                    for line in fileinput.input(script_path, inplace=True):
+                        print(line.replace(old, new).rstrip())
+                run_blender([self.blender_path, "--background", "--python", script_path], 'atlas')
+            finally:
+                os.remove(script_path)
+
+            # Add source file and sample number to the cell rectangles
+            try:
+                with open(atlas_cells_path, 'r') as f:
+                    rectangles = json.load(f)
+            except IOError:
+                print("Could not render atlas!")
+                for _ in cells:
+                    record_sample('atlas', False)
+                continue
+            with open(atlas_cells_path, 'w') as f:
+                json.dump([dict(meta, **rectangle) for (meta, _), rectangle in zip(cells, rectangles)], f, indent=2)
+            for _ in cells:
+                record_sample('atlas', True)
+
+        print("Finished generating static gesture atlas!")
+
     def __read_from_file(self, file_path: str) -> None:
         """
         Reads a file that contains one or more samples in WACH format for a gesture.
@@ -224,30 +692,23 @@ class StaticDataVisualizer:
         self.input_file_name = norm_input_file_path[norm_input_file_path.rfind(os.sep) + 1:(-1 * (
                 len(input_file_type) + 1))]
 
-        # Get samples from file
-        with open(norm_input_file_path, 'r') as f:
-            content = f.readlines()
-            while content[-1] == '\n':  # Remove trailing new lines
-                del content[-1]
-
-        # Extract label and hand type from file
-        self.label = content[0].rstrip('\n')
-        self.hand = content[1].rstrip('\n')
-
-        # Extract all data samples from file
-        start_idx = 3  # skip label, hand type and first newline
-        number_of_features = 20  # length of a data sample in WACH format
-        while start_idx < len(content):
-            end_idx = start_idx + number_of_features
-            self.data_samples.append([line.rstrip('\n') for line in content[start_idx:end_idx]])
-            start_idx = end_idx + 1
+        # Get label, hand type and all data samples from file
+        self.label, self.hand, self.data_samples = readers.read_wach_file(norm_input_file_path)
+        self.sample_numbers = list(range(len(self.data_samples)))
 
-    def __read_sample(self, label: str, hand: str, sample_values: list[str]) -> None:
+    def __read_sample(self,
+                      label: str,
+                      hand: str,
+                      sample_values: list[str],
+                      sample_number: int = 0,
+                      input_file_name: str = None) -> None:
         """
         Reads data sample in WACH format.
         :param label: Name of the performed gesture.
         :param hand: 'Left' or 'Right' hand.
         :param sample_values: Data sample in WACH format.
+        :param sample_number: Index of the sample in its input file.
+        :param input_file_name: Name of the input file without extension (defaults to the label).
         :return: None
         """
         # Reset attributes
@@ -256,28 +717,211 @@ class StaticDataVisualizer:
         self.label = label
         self.hand = hand
         self.data_samples.append(sample_values)
-        self.input_file_name = label
+        self.sample_numbers.append(sample_number)
+        self.input_file_name = input_file_name if input_file_name else label
 
-    def __export_as(self, export_file_type: str, export_png: bool) -> None:
+    def __export_as(self,
+                    export_file_type: str,
+                    export_png: bool,
+                    dedup_tolerance: float = None,
+                    lod_triangle_budgets: list[int] = None) -> None:
         """
         Runs the blender script and exports result as file.
         :param export_file_type: Desired output file type.
         :param export_png: If file should also be saved as png.
+        :param dedup_tolerance: Distance under which samples are rendered only once (None renders all).
+        :param lod_triangle_budgets: Triangle budgets of additional decimated meshes (None for no decimated meshes).
         :return: None
         """
+        lod_triangle_budgets = lod_triangle_budgets if lod_triangle_budgets else []
+        if lod_triangle_budgets and export_file_type not in self.LOD_FILE_TYPES:
+            print("Decimated meshes can only be exported as stl or obj!")
+            lod_triangle_budgets = []
+        if export_file_type == self.POSE_ONLY_FILE_TYPE:
+            self.__export_pose_only(export_png)
+            return
+
+        representatives = list(range(len(self.data_samples)))
+        if dedup_tolerance is not None:
+            representatives = collapse_near_duplicates(self.data_samples, dedup_tolerance)
+
         # Run script for each sample
         for idx, sample in enumerate(self.data_samples):
-            export_png_path = self.__create_blender_script_with_values(export_file_type, sample, idx, export_png)
+            sample_number = self.sample_numbers[idx]
+            if representatives[idx] != idx:  # near duplicate of an earlier sample, reuse its result
+                self.__copy_results(self.sample_numbers[representatives[idx]], sample_number, export_file_type,
+                                    export_png, lod_triangle_budgets)
+                continue
+
+            # Reuse the results of an earlier pose in the same grid cell (within grid_degrees per joint)
+            pose_cache_entries = self.__get_pose_cache_entries(sample, sample_number, export_file_type, export_png,
+                                                               lod_triangle_budgets)
+            if self.__restore_from_pose_cache(pose_cache_entries):
+                record_sample('static', True)
+                continue
+
+            # Decimated meshes are cached per budget, only missing ones are exported by blender
+            lod_cache_paths = {budget: self.__get_lod_cache_path(sample, budget, export_file_type)
+                               for budget in lod_triangle_budgets}
+            missing_lods = [(budget, path) for budget, path in lod_cache_paths.items() if not os.path.exists(path)]
+            for _, path in missing_lods:
+                Path(os.path.dirname(path)).mkdir(parents=True, exist_ok=True)
+            for _, path in pose_cache_entries:  # a failed export must not leave an older result to be cached
+                if os.path.exists(path):
+                    os.remove(path)
+
+            export_png_path = self.__create_blender_script_with_values(export_file_type, sample, sample_number,
+                                                                       export_png, missing_lods)
             self.__run_blender_script()
-            self.__reset_blender_script_for_values(export_file_type, sample, idx, export_png)
+            self.__reset_blender_script_for_values(export_file_type, sample, sample_number, export_png, missing_lods)
+            output_path = self.get_output_png_path(self.input_file_name, self.hand, sample_number) \
+                if export_file_type == 'png' else \
+                self.get_output_file_path(self.input_file_name, self.hand, sample_number, export_file_type)
+            record_sample('static', os.path.exists(output_path))
+
+            for budget, cache_path in lod_cache_paths.items():
+                if os.path.exists(cache_path):
+                    shutil.copyfile(cache_path, self.get_output_lod_path(self.input_file_name, self.hand, sample_number,
+                                                                         budget, export_file_type))
 
             # Crop image
-            try:
-                png_path = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), export_png_path))
-                img = Image.open(png_path)
-                img.crop((400, 50, 1350, 1050)).save(png_path)  # Crop and save new image
-            except IOError:
-                print("Could not crop image!")
+            png_cropped = False
+            if export_png:
+                try:
+                    png_path = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)),
+                                                            export_png_path))
+                    img = Image.open(png_path)
+                    img.crop(PNG_CROP_BOX).save(png_path)  # Crop and save new image
+                    png_cropped = True
+                except IOError:
+                    print("Could not crop image!")
+
+            # Only complete results of this run are cached
+            if pose_cache_entries and (png_cropped or not export_png) and \
+                    all(os.path.exists(path) for _, path in pose_cache_entries):
+                for key, path in pose_cache_entries:
+                    with open(path, 'rb') as f:
+                        self.pose_cache.put(key, f.read())
+
+        # Move results into the shard archives
+        if self.output_sink is not None:
+            for idx in self.sample_numbers:
+                results = [(export_file_type,
+                            self.get_output_file_path(self.input_file_name, self.hand, idx, export_file_type))]
+                if export_png:
+                    results.append(('png', self.get_output_png_path(self.input_file_name, self.hand, idx)))
+                results += [(f"lod{budget}_{export_file_type}",
+                             self.get_output_lod_path(self.input_file_name, self.hand, idx, budget, export_file_type))
+                            for budget in lod_triangle_budgets]
+                for kind, path in results:
+                    if os.path.exists(path):
+                        self.output_sink.add_file(path, self.input_file_name, self.hand, idx, kind)
+
+    def __export_pose_only(self, export_png: bool) -> None:
+        """
+        Writes the bone rotations of each sample as json line, without running blender per sample.
+        The mesh is exported once per hand as skinned GLB (base asset); viewers apply the rotations on top of the
+        rest pose of the bones.
+        :param export_png: Not supported, images need a render.
+        :return: None
+        :raises RuntimeError: If blender did not export the base asset.
+        """
+        if export_png:
+            print("PNG export is not possible for pose-only export!")
+
+        base_asset_path = self.get_base_asset_path(self.hand)
+        if not os.path.exists(base_asset_path):  # exported once, later inputs reuse it
+            self.__export_base_asset(self.hand, base_asset_path)
+
+        records = []
+        for idx, sample in zip(self.sample_numbers, self.data_samples):
+            rotations = pose.get_bone_rotations(sample, self.hand)
+            records.append((idx, json.dumps({'label': self.label,
+                                             'hand': self.hand,
+                                             'sample': idx,
+                                             'base': os.path.relpath(base_asset_path, self.output_dir),
+                                             'rotations': {bone: [round(v, 6) for v in q]
+                                                           for bone, q in rotations.items()}})))
+
+        # Move results into the shard archives (one record per sample), the shared base asset stays a file
+        if self.output_sink is not None:
+            for idx, record in records:
+                self.output_sink.add(self.input_file_name, self.hand, idx, self.POSE_ONLY_FILE_TYPE,
+                                     record.encode('utf-8'), f"{self.input_file_name}_{self.hand}_{idx}_pose.json")
+            return
+
+        with open(self.get_output_pose_path(self.input_file_name, self.hand), 'w') as f:
+            for _, record in records:
+                f.write(record + '\n')
+
+    def __export_base_asset(self, hand: str, base_asset_path: str) -> None:
+        Path(os.path.dirname(base_asset_path)).mkdir(parents=True, exist_ok=True)
+        script_path = create_private_blender_script(os.path.join(PARENT_DIR, R"./blender_script_base_asset.py"))
+        try:
+            for old, new in {"HAND = ''": f"HAND = '{hand}'",
+                             "GLB_PATH_STR = ''": f"GLB_PATH_STR = R'{base_asset_path}'"}.items():
+                for line in fileinput.input(script_path, inplace=True):
+                    print(line.replace(old, new).rstrip())
+            run_blender([self.blender_path, "--background", "--python", script_path], 'base_asset')
+        finally:
+            os.remove(script_path)
+        if not os.path.exists(base_asset_path):  # the pose records would refer to a missing model
+            raise RuntimeError(f"Blender did not export the base asset {base_asset_path}!")
+
+    def __get_lod_cache_path(self, sample_values: list[str], triangle_budget: int, file_type: str) -> str:
+        key = hashlib.sha1(f"{self.hand}{[float(v) for v in sample_values]}".encode('utf-8')).hexdigest()
+        return os.path.join(self.output_dir, 'lod', 'cache', str(triangle_budget), f"{key}.{file_type}")
+
+    def __get_pose_cache_entries(self,
+                                 sample_values: list[str],
+                                 sample_number: int,
+                                 export_file_type: str,
+                                 export_png: bool,
+                                 lod_triangle_budgets: list[int]) -> list[tuple[str, str]]:
+        if self.pose_cache is None:
+            return []
+        entries = []
+        if export_file_type != 'png':  # the png format has no file besides the image
+            entries.append((self.pose_cache.get_key(self.hand, sample_values, export_file_type),
+                            self.get_output_file_path(self.input_file_name, self.hand, sample_number,
+                                                      export_file_type)))
+        entries += [(self.pose_cache.get_key(self.hand, sample_values, f"lod{budget}_{export_file_type}"),
+                     self.get_output_lod_path(self.input_file_name, self.hand, sample_number, budget, export_file_type))
+                    for budget in lod_triangle_budgets]
+        if export_png:
+            entries.append((self.pose_cache.get_key(self.hand, sample_values, 'png'),
+                            self.get_output_png_path(self.input_file_name, self.hand, sample_number)))
+        return entries
+
+    def __restore_from_pose_cache(self, pose_cache_entries: list[tuple[str, str]]) -> bool:
+        if not pose_cache_entries:
+            return False
+        contents = self.pose_cache.get_all([key for key, _ in pose_cache_entries])
+        if contents is None:  # all results are rendered again if one is missing
+            return False
+        for (_, path), data in zip(pose_cache_entries, contents):
+            Path(os.path.dirname(path)).mkdir(parents=True, exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(data)
+        return True
+
+    def __copy_results(self,
+                       from_number: int,
+                       to_number: int,
+                       export_file_type: str,
+                       export_png: bool,
+                       lod_triangle_budgets: list[int]) -> None:
+        paths = [(self.get_output_file_path(self.input_file_name, self.hand, from_number, export_file_type),
+                  self.get_output_file_path(self.input_file_name, self.hand, to_number, export_file_type))]
+        paths += [(self.get_output_lod_path(self.input_file_name, self.hand, from_number, budget, export_file_type),
+                   self.get_output_lod_path(self.input_file_name, self.hand, to_number, budget, export_file_type))
+                  for budget in lod_triangle_budgets]
+        if export_png:
+            paths.append((self.get_output_png_path(self.input_file_name, self.hand, from_number),
+                          self.get_output_png_path(self.input_file_name, self.hand, to_number)))
+        for from_path, to_path in paths:
+            if os.path.exists(from_path):
+                shutil.copyfile(from_path, to_path)
 
     def __reset(self) -> None:
         """
@@ -287,13 +931,16 @@ class StaticDataVisualizer:
         self.label = ""
         self.hand = ""
         self.data_samples = []
+        self.sample_numbers = []
         self.input_file_name = R""
 
     def __create_blender_script_with_values(self,
                                             export_file_type: str,
                                             sample_values: list[str],
                                             sample_number: int,
-                                            export_png: bool) -> str:
+                                            export_png: bool,
+                                            lods: list[tuple[int, str]] = None) -> str:
+        lods = lods if lods else []
 
         # Replace label variable in blender_script_static.py
         for line in fileinput.input(self.blender_script_path, inplace=True):
@@ -317,17 +964,22 @@ class StaticDataVisualizer:
             print(line.replace("EXPORT_PNG = False", f"EXPORT_PNG = {str(export_png)}").rstrip())
 
         # Replace export_png_path variable in blender_script_static.py
-        export_png_path = os.path.join(self.output_dir_png, f"{self.input_file_name}_{self.hand}"
-                                                            f"_{sample_number}_PNG.png")
+        export_png_path = self.get_output_png_path(self.input_file_name, self.hand, sample_number)
         for line in fileinput.input(self.blender_script_path, inplace=True):
             print(line.replace("EXPORT_PNG_STR = ''", f"EXPORT_PNG_STR = R'{export_png_path}'").rstrip())
 
+        # Replace triangle budgets and paths of decimated meshes in blender_script_static.py
+        for line in fileinput.input(self.blender_script_path, inplace=True):
+            print(line.replace("LOD_TRIANGLE_BUDGETS = []",
+                               f"LOD_TRIANGLE_BUDGETS = {str([budget for budget, _ in lods])}").rstrip())
+        for line in fileinput.input(self.blender_script_path, inplace=True):
+            print(line.replace("LOD_PATHS_STR = []", f"LOD_PATHS_STR = {str([path for _, path in lods])}").rstrip())
+
         # Replace output path
         for output_file_type in self.SUPPORTED_OUT_FILE_TYPES:
             out_str = f"{output_file_type.upper()}_PATH_STR"
             old_output_path = f"{out_str} = ''"
-            new_value = os.path.join(self.output_dir,
-                                     f"{self.input_file_name}_{self.hand}_{sample_number}_{output_file_type}.{output_file_type}")
+            new_value = self.get_output_file_path(self.input_file_name, self.hand, sample_number, output_file_type)
             new_output_path = f"{out_str} = R'{new_value}'"
             for line in fileinput.input(self.blender_script_path, inplace=True):
                 print(line.replace(old_output_path, new_output_path).rstrip())
@@ -338,7 +990,9 @@ class StaticDataVisualizer:
                                           export_file_type: str,
                                           sample_values: list[str],
                                           sample_number: int,
-                                          export_png: bool) -> None:
+                                          export_png: bool,
+                                          lods: list[tuple[int, str]] = None) -> None:
+        lods = lods if lods else []
 
         # Reset each change done in __create_blender_script_with_values()
         for line in fileinput.input(self.blender_script_path, inplace=True):
@@ -353,15 +1007,18 @@ class StaticDataVisualizer:
         for line in fileinput.input(self.blender_script_path, inplace=True):
             print(line.replace(f"EXPORT_PNG = {str(export_png)}", "EXPORT_PNG = False").rstrip())
         for line in fileinput.input(self.blender_script_path, inplace=True):
-            new_value = os.path.join(self.output_dir_png,
-                                     f"{self.input_file_name}_{self.hand}_{sample_number}_PNG.png")
+            new_value = self.get_output_png_path(self.input_file_name, self.hand, sample_number)
             print(line.replace(f"EXPORT_PNG_STR = R'{new_value}'", "EXPORT_PNG_STR = ''").rstrip())
+        for line in fileinput.input(self.blender_script_path, inplace=True):
+            print(line.replace(f"LOD_TRIANGLE_BUDGETS = {str([budget for budget, _ in lods])}",
+                               "LOD_TRIANGLE_BUDGETS = []").rstrip())
+        for line in fileinput.input(self.blender_script_path, inplace=True):
+            print(line.replace(f"LOD_PATHS_STR = {str([path for _, path in lods])}", "LOD_PATHS_STR = []").rstrip())
 
         for output_file_type in self.SUPPORTED_OUT_FILE_TYPES:
             out_str = f"{output_file_type.upper()}_PATH_STR"
             old_output_path = f"{out_str} = ''"
-            new_value = os.path.join(self.output_dir,
-                                     f"{self.input_file_name}_{self.hand}_{sample_number}_{output_file_type}.{output_file_type}")
+            new_value = self.get_output_file_path(self.input_file_name, self.hand, sample_number, output_file_type)
             new_output_path = f"{out_str} = R'{new_value}'"
             for line in fileinput.input(self.blender_script_path, inplace=True):
                 print(line.replace(new_output_path, old_output_path).rstrip())
@@ -371,4 +1028,45 @@ class StaticDataVisualizer:
         args = [self.blender_path, "--background", "--python", self.blender_script_path]
 
         # Run blender process with script
-        subprocess.run(args)
+        run_blender(args, 'static')
+
+
+class StreamDataVisualizer:
+    def __init__(self,
+                 blender_script_path: str = os.path.join(PARENT_DIR, R"./blender_script_stream.py")) -> None:
+        self.blender_path = R"/Applications/Blender.app/Contents/MacOS/Blender" if \
+            platform.system() == 'Darwin' else shutil.which('blender')  # check if mac
+        self.blender_script_path = blender_script_path
+
+    def show_stream(self, hand: str, host: str = '127.0.0.1', port: int = 9763, display_rate: int = 60) -> None:
+        """
+        Opens blender with a hand that follows the frames received over UDP (see visualization/stream.py).
+        Only the newest frame is shown at each display update, frames that arrive faster are dropped.
+        :param hand: 'Left' or 'Right' hand.
+        :param host: Interface to receive frames on.
+        :param port: Port to receive frames on.
+        :param display_rate: Pose updates per second.
+        :return: None
+        """
+        # Assert input
+        if self.blender_path is None:
+            print("Blender must be installed and in path!")
+            return
+
+        values = {"HAND = ''": f"HAND = '{hand}'",
+                  "HOST = ''": f"HOST = '{host}'",
+                  "PORT = 0": f"PORT = {int(port)}",
+                  "DISPLAY_RATE = 0": f"DISPLAY_RATE = {int(display_rate)}"}
+
+        # Replace variables in blender_script_stream.py
+        for old, new in values.items():
+            for line in fileinput.input(self.blender_script_path, inplace=True):
+                print(line.replace(old, new).rstrip())
+
+        try:
+            subprocess.run([self.blender_path, "--python", self.blender_script_path])  # Run blender with UI
+        finally:
+            # Reset each change
+            for old, new in values.items():
+                for line in fileinput.input(self.blender_script_path, inplace=True):
+                    print(line.replace(new, old).rstrip())
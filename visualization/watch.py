@@ -0,0 +1,214 @@
+import hashlib
+import json
+import os
+import time
+from typing import Optional
+
+from visualization import readers
+from visualization import validation
+from visualization import viz
+from visualization.work_queue import RenderQueue
+
+STATIC_INPUT_EXTENSION = '.txt'
+DYNAMIC_INPUT_EXTENSION = '.json'
+STATE_SAVE_INTERVAL = 100  # changed input files between two saves of the state during a scan
+
+
+def get_sample_hash(content, output_paths: list[str]) -> str:
+    """
+    Hash of a sample (or dynamic gesture) together with the paths it is rendered to, so that a sample also counts as
+    changed when its output names change (e.g. a new hand type).
+    :param content: Json serializable content of the sample.
+    :param output_paths: Output files of the sample.
+    :return: Hex digest.
+    """
+    return hashlib.sha1(json.dumps([content, output_paths], sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class InputWatcher:
+    """
+    Watches input folders for WACH files (.txt) and processed json files (.json) and keeps the rendered outputs
+    up to date: only new or changed samples are added to a RenderQueue, outputs of changed or deleted samples are
+    removed. The hash of each sample is kept in a state file, so the watcher can be restarted at any time.
+    """
+
+    def __init__(self,
+                 queue: RenderQueue,
+                 input_dirs: list[str],
+                 state_path: str,
+                 file_type: str = 'stl',
+                 export_png: bool = False,
+                 static_output_dir: str = os.path.join(viz.PARENT_DIR, R"../static"),
+                 dynamic_output_dir: str = os.path.join(viz.PARENT_DIR, R"../dynamic"),
+                 settle_seconds: float = 2.0) -> None:
+        """
+        :param queue: Queue the render jobs are added to.
+        :param input_dirs: Folders to watch (including sub folders).
+        :param state_path: Json file with the hashes of the samples that were enqueued.
+        :param file_type: Output file type of static samples.
+        :param export_png: If static samples should also be saved as png.
+        :param static_output_dir: Output folder of the workers for static samples.
+        :param dynamic_output_dir: Output folder of the workers for dynamic gestures.
+        :param settle_seconds: Files modified more recently are skipped, as they may still be written.
+        """
+        self.queue = queue
+        self.input_dirs = [os.path.abspath(input_dir) for input_dir in input_dirs]
+        self.state_path = os.path.abspath(state_path)
+        self.file_type = file_type
+        self.export_png = export_png
+        self.settle_seconds = settle_seconds
+        self.static_viz = viz.StaticDataVisualizer(output_dir=static_output_dir)  # only used for output paths
+        self.dynamic_viz = viz.DynamicDataVisualizer(output_dir=dynamic_output_dir)
+
+        # file path -> {'mtime', 'size', 'samples': [{'hash', 'outputs'}]}
+        self.state = {}
+        if os.path.exists(state_path):
+            with open(state_path, 'r') as f:
+                self.state = json.load(f)
+
+    def __save_state(self) -> None:
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.state, f)
+        os.replace(tmp_path, self.state_path)  # never leave a half written state file
+
+    def __list_input_files(self) -> list[str]:
+        own_files = {self.state_path, f"{self.state_path}.tmp"}  # the state file may lie in a watched folder
+        file_paths = []
+        for input_dir in self.input_dirs:
+            for root, _, file_names in os.walk(input_dir):
+                file_paths += [os.path.join(root, name) for name in file_names
+                               if name.endswith(STATIC_INPUT_EXTENSION) or name.endswith(DYNAMIC_INPUT_EXTENSION)]
+        return sorted(path for path in file_paths if path not in own_files)
+
+    def __read_static_samples(self, file_path: str) -> Optional[list[dict]]:
+        report = validation.validate_wach_file(file_path)
+        if not report.ok:
+            print(report)
+            return None
+        label, hand, data_samples = readers.read_wach_file(file_path)
+        input_file_name = os.path.splitext(os.path.basename(file_path))[0]
+        samples = []
+        for idx, sample in enumerate(data_samples):
+            outputs = [self.static_viz.get_result_path(input_file_name, hand, idx, self.file_type)]
+            if self.export_png:
+                outputs.append(self.static_viz.get_output_png_path(input_file_name, hand, idx))
+            samples.append({'hash': get_sample_hash([label, [float(v) for v in sample]], outputs),
+                            'outputs': outputs,
+                            'job': (label, hand, sample, input_file_name)})
+        return samples
+
+    def __read_dynamic_samples(self, json_path: str) -> Optional[list[dict]]:
+        try:
+            gesture_data = readers.read_dynamic_file(json_path)
+        except ValueError as e:  # e.g. a file that is still being copied
+            print(f"{json_path}: {e}")
+            return None
+        report = validation.validate_dynamic_gestures(gesture_data, json_path)
+        if not report.ok:
+            print(report)
+            return None
+
+        # All gestures of a file are named after the first one (see DynamicDataVisualizer)
+        label, hand = gesture_data[0]['letter'], gesture_data[0]['hand']
+        samples = []
+        for idx, gesture in enumerate(gesture_data):
+            outputs = [self.dynamic_viz.get_output_file_path(label, hand, idx)]
+            samples.append({'hash': get_sample_hash(gesture, outputs), 'outputs': outputs, 'job': None})
+        return samples
+
+    @staticmethod
+    def __remove_outputs(sample: dict) -> int:
+        removed = 0
+        for path in sample['outputs']:
+            if os.path.exists(path):
+                os.remove(path)
+                removed += 1
+        return removed
+
+    def scan(self) -> dict[str, int]:
+        """
+        Compares all input files with the state, enqueues new and changed samples and removes stale outputs.
+        :return: Number of 'changed_files', 'enqueued' samples and 'removed' output files.
+        """
+        summary = {'changed_files': 0, 'enqueued': 0, 'removed': 0}
+        file_paths = self.__list_input_files()
+        now = time.time()
+        unsaved = 0  # the state is written once per scan (and every STATE_SAVE_INTERVAL files to resume after a crash)
+
+        for file_path in file_paths:
+            try:
+                stat = os.stat(file_path)
+            except FileNotFoundError:  # deleted since listing
+                continue
+            entry = self.state.get(file_path)
+            if entry is not None and entry['mtime'] == stat.st_mtime and entry['size'] == stat.st_size:
+                continue  # unchanged, the file is not read at all
+            if now - stat.st_mtime < self.settle_seconds:
+                continue
+
+            is_static = file_path.endswith(STATIC_INPUT_EXTENSION)
+            samples = self.__read_static_samples(file_path) if is_static else self.__read_dynamic_samples(file_path)
+            old_samples = entry['samples'] if entry is not None else []
+            if samples is None:  # invalid: keep the last rendered state until the file is fixed
+                self.state[file_path] = {'mtime': stat.st_mtime, 'size': stat.st_size, 'samples': old_samples}
+            else:
+                self.__update_file(file_path, is_static, samples, old_samples, summary)
+                self.state[file_path] = {'mtime': stat.st_mtime, 'size': stat.st_size,
+                                         'samples': [{'hash': s['hash'], 'outputs': s['outputs']} for s in samples]}
+            unsaved += 1
+            if unsaved >= STATE_SAVE_INTERVAL:
+                self.__save_state()
+                unsaved = 0
+
+        # Deleted input files
+        existing = set(file_paths)
+        for file_path in [path for path in self.state if path not in existing]:
+            for old_sample in self.state[file_path]['samples']:
+                summary['removed'] += self.__remove_outputs(old_sample)
+            summary['changed_files'] += 1
+            del self.state[file_path]
+            unsaved += 1
+
+        if unsaved:
+            self.__save_state()
+        return summary
+
+    def __update_file(self, file_path: str, is_static: bool, samples: list[dict], old_samples: list[dict],
+                      summary: dict[str, int]) -> None:
+        # Removes the outputs of changed and deleted samples and enqueues the changed ones
+        changed = [idx for idx, sample in enumerate(samples)
+                   if idx >= len(old_samples) or old_samples[idx]['hash'] != sample['hash']]
+        for idx, old_sample in enumerate(old_samples):
+            if idx >= len(samples) or idx in changed:
+                summary['removed'] += self.__remove_outputs(old_sample)
+
+        if is_static and self.file_type == viz.StaticDataVisualizer.POSE_ONLY_FILE_TYPE:
+            if changed or len(samples) != len(old_samples):  # all samples share one pose file, rewrite it at once
+                self.queue.enqueue_static_file(file_path, self.file_type, self.export_png)
+        elif changed and is_static:
+            for idx in changed:
+                label, hand, sample_values, input_file_name = samples[idx]['job']
+                self.queue.enqueue_static_sample(label, hand, sample_values, self.file_type, self.export_png,
+                                                 sample_number=idx, input_file_name=input_file_name)
+        elif changed:
+            self.queue.enqueue_dynamic_file(file_path, gesture_indices=changed)
+        summary['enqueued'] += len(changed)
+        summary['changed_files'] += 1 if changed or len(samples) != len(old_samples) else 0
+
+    def run(self, poll_interval: float = 5.0, max_scans: int = None) -> None:
+        """
+        Scans the input folders repeatedly.
+        :param poll_interval: Seconds between two scans.
+        :param max_scans: Number of scans before returning (None for no limit).
+        :return: None
+        """
+        scans = 0
+        while max_scans is None or scans < max_scans:
+            summary = self.scan()
+            if summary['changed_files']:
+                print(f"Watcher: {summary['changed_files']} file(s) changed, {summary['enqueued']} sample(s) "
+                      f"enqueued, {summary['removed']} stale output(s) removed")
+            scans += 1
+            if max_scans is None or scans < max_scans:
+                time.sleep(poll_interval)
@@ -0,0 +1,385 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from typing import Optional
+
+from visualization import metrics
+from visualization import readers
+from visualization import validation
+from visualization import viz
+
+JOB_STATIC_FILE = 'static_file'
+JOB_STATIC_SAMPLE = 'static_sample'
+JOB_DYNAMIC_FILE = 'dynamic_file'
+
+STATE_PENDING = 'pending'
+STATE_LEASED = 'leased'
+STATE_DONE = 'done'
+STATE_FAILED = 'failed'
+
+MIN_HEARTBEAT_SECONDS = 0.1  # lower bound of the lease renewal interval (short leases would busy-loop)
+STATIC_FILE_TYPES = viz.StaticDataVisualizer.SUPPORTED_OUT_FILE_TYPES + [viz.StaticDataVisualizer.POSE_ONLY_FILE_TYPE]
+
+
+def _check_file_type(file_type: str) -> None:
+    if file_type not in STATIC_FILE_TYPES:  # the worker would only print it and the job would fail every attempt
+        raise ValueError(f"File type for export not supported: {file_type!r} (one of {STATIC_FILE_TYPES})")
+
+
+class RenderQueue:
+    """
+    Work queue for visualization jobs stored in a single SQLite file. The file can be placed on storage
+    that is shared between hosts, so that producers on one machine enqueue jobs and workers on any machine
+    lease, render and complete them. No service besides the file system is needed.
+    """
+
+    def __init__(self, db_path: str, lease_seconds: float = 600.0, max_attempts: int = 3) -> None:
+        """
+        :param db_path: Path of the SQLite queue file (created if missing).
+        :param lease_seconds: Time a worker may hold a job without renewing its lease before it is handed out again
+        (workers renew it while a job is processed, see RenderWorker).
+        :param max_attempts: Number of leases after which a job is marked as failed.
+        """
+        self.db_path = os.path.abspath(db_path)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+
+        # The rollback journal is kept on purpose: WAL needs shared memory and does not work across hosts.
+        with closing(self.__connect()) as con:
+            con.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    kind TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    state TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    worker TEXT,
+                    lease_expires REAL,
+                    error TEXT,
+                    created REAL NOT NULL,
+                    finished REAL
+                )""")
+            con.execute("CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, lease_expires)")
+
+    def __connect(self) -> sqlite3.Connection:
+        con = sqlite3.connect(self.db_path, timeout=60.0, isolation_level=None)
+        con.row_factory = sqlite3.Row
+        return con
+
+    def __enqueue(self, kind: str, payload: dict) -> int:
+        with closing(self.__connect()) as con:
+            cur = con.execute("INSERT INTO jobs (kind, payload, state, created) VALUES (?, ?, ?, ?)",
+                              (kind, json.dumps(payload), STATE_PENDING, time.time()))
+            return cur.lastrowid
+
+    def enqueue_static_file(self, file_path: str, file_type: str, export_png: bool = False) -> int:
+        """
+        Adds a job that visualizes all samples of a WACH file.
+        :param file_path: Path of the WACH file (must be reachable by the workers).
+        :param file_type: Desired output file type.
+        :param export_png: If the samples should also be saved as png.
+        :return: Id of the job.
+        :raises ValueError: If the file type is not supported or the file is not valid (see validation.py).
+        """
+        _check_file_type(file_type)
+        report = validation.validate_wach_file(file_path)
+        if not report.ok:  # never hand out a job that fails in every worker
+            raise ValueError(str(report))
+        return self.__enqueue(JOB_STATIC_FILE, {'file_path': os.path.abspath(file_path),
+                                                'file_type': file_type,
+                                                'export_png': export_png})
+
+    def enqueue_static_sample(self,
+                              label: str,
+                              hand: str,
+                              sample_values: list[str],
+                              file_type: str,
+                              export_png: bool = False,
+                              sample_number: int = 0,
+                              input_file_name: str = None) -> int:
+        """
+        Adds a job that visualizes a single sample in WACH format.
+        :param label: Name of the performed gesture.
+        :param hand: 'Left' or 'Right' hand.
+        :param sample_values: Data sample in WACH format.
+        :param file_type: Desired output file type.
+        :param export_png: If the sample should also be saved as png.
+        :param sample_number: Index of the sample in its input file (used in the output file names).
+        :param input_file_name: Name of the input file without extension (defaults to the label).
+        :return: Id of the job.
+        :raises ValueError: If the file type is not supported or the sample is not valid (see validation.py).
+        """
+        _check_file_type(file_type)
+        report = validation.validate_wach_samples([sample_values], hand, label)
+        if not report.ok:
+            raise ValueError(str(report))
+        return self.__enqueue(JOB_STATIC_SAMPLE, {'label': label,
+                                                  'hand': hand,
+                                                  'sample_values': [str(v) for v in sample_values],
+                                                  'file_type': file_type,
+                                                  'export_png': export_png,
+                                                  'sample_number': sample_number,
+                                                  'input_file_name': input_file_name})
+
+    def enqueue_dynamic_file(self, json_path: str, gesture_indices: list[int] = None) -> int:
+        """
+        Adds a job that exports the dynamic gestures of a processed json file.
+        :param json_path: Path of the json file (must be reachable by the workers).
+        :param gesture_indices: Indices of the gestures to export (default: all).
+        :return: Id of the job.
+        :raises ValueError: If the file is not valid (see validation.py).
+        """
+        report = validation.validate_dynamic_gestures(readers.read_dynamic_file(json_path), json_path)
+        if not report.ok:
+            raise ValueError(str(report))
+        return self.__enqueue(JOB_DYNAMIC_FILE, {'json_path': os.path.abspath(json_path),
+                                                 'gesture_indices': gesture_indices})
+
+    def lease(self, worker_id: str) -> Optional[dict]:
+        """
+        Hands out the oldest pending job, or a job whose lease has expired, to the given worker.
+        Jobs that already used up all attempts are marked as failed instead.
+        :param worker_id: Name of the leasing worker.
+        :return: Job as dict with 'id', 'kind', 'payload' and 'attempts' or None if there is no job.
+        """
+        now = time.time()
+        con = self.__connect()
+        try:
+            con.execute("BEGIN IMMEDIATE")  # take the write lock so two workers never lease the same job
+            con.execute("UPDATE jobs SET state = ?, error = 'lease expired', finished = ? "
+                        "WHERE state = ? AND lease_expires < ? AND attempts >= ?",
+                        (STATE_FAILED, now, STATE_LEASED, now, self.max_attempts))
+            row = con.execute("SELECT id, kind, payload, attempts FROM jobs "
+                              "WHERE state = ? OR (state = ? AND lease_expires < ?) ORDER BY id LIMIT 1",
+                              (STATE_PENDING, STATE_LEASED, now)).fetchone()
+            if row is None:
+                con.execute("COMMIT")
+                return None
+            con.execute("UPDATE jobs SET state = ?, worker = ?, lease_expires = ?, attempts = attempts + 1 "
+                        "WHERE id = ?", (STATE_LEASED, worker_id, now + self.lease_seconds, row['id']))
+            con.execute("COMMIT")
+        except sqlite3.Error:
+            if con.in_transaction:  # BEGIN itself may have failed (e.g. database locked)
+                con.execute("ROLLBACK")
+            raise
+        finally:
+            con.close()
+
+        return {'id': row['id'], 'kind': row['kind'], 'payload': json.loads(row['payload']),
+                'attempts': row['attempts'] + 1}
+
+    def renew(self, job_id: int, worker_id: str) -> bool:
+        """
+        Extends the lease of a job by lease_seconds, so that a long render is not handed out a second time.
+        :param job_id: Id of the job.
+        :param worker_id: Name of the worker that holds the lease.
+        :return: False if the lease was lost in the meantime.
+        """
+        with closing(self.__connect()) as con:
+            cur = con.execute("UPDATE jobs SET lease_expires = ? WHERE id = ? AND state = ? AND worker = ?",
+                              (time.time() + self.lease_seconds, job_id, STATE_LEASED, worker_id))
+            return cur.rowcount == 1
+
+    def complete(self, job_id: int, worker_id: str) -> bool:
+        """
+        Marks a leased job as done.
+        :param job_id: Id of the job.
+        :param worker_id: Name of the worker that holds the lease.
+        :return: False if the lease was lost in the meantime (e.g. expired and leased by another worker).
+        """
+        with closing(self.__connect()) as con:
+            cur = con.execute("UPDATE jobs SET state = ?, finished = ?, error = NULL "
+                              "WHERE id = ? AND state = ? AND worker = ?",
+                              (STATE_DONE, time.time(), job_id, STATE_LEASED, worker_id))
+            return cur.rowcount == 1
+
+    def fail(self, job_id: int, worker_id: str, error: str) -> bool:
+        """
+        Returns a leased job to the queue, or marks it as failed once all attempts are used up.
+        :param job_id: Id of the job.
+        :param worker_id: Name of the worker that holds the lease.
+        :param error: Description of the error.
+        :return: False if the lease was lost in the meantime.
+        """
+        with closing(self.__connect()) as con:
+            cur = con.execute("UPDATE jobs SET state = CASE WHEN attempts >= ? THEN ? ELSE ? END, "
+                              "error = ?, finished = ?, lease_expires = NULL "
+                              "WHERE id = ? AND state = ? AND worker = ?",
+                              (self.max_attempts, STATE_FAILED, STATE_PENDING, error, time.time(),
+                               job_id, STATE_LEASED, worker_id))
+            return cur.rowcount == 1
+
+    def counts(self) -> dict[str, int]:
+        """
+        Number of jobs per state.
+        :return: Dict with state as key and number of jobs as value.
+        """
+        with closing(self.__connect()) as con:
+            rows = con.execute("SELECT state, COUNT(*) AS n FROM jobs GROUP BY state").fetchall()
+        counts = {state: 0 for state in [STATE_PENDING, STATE_LEASED, STATE_DONE, STATE_FAILED]}
+        counts.update({row['state']: row['n'] for row in rows})
+        return counts
+
+    def collect_metrics(self, registry: metrics.MetricsRegistry) -> None:
+        """
+        Sets the queue depth per state in the metrics (see MetricsRegistry.add_collector).
+        :param registry: Metrics registry.
+        :return: None
+        """
+        for state, n in self.counts().items():
+            registry.set(metrics.QUEUE_JOBS, n, {'state': state})
+
+
+class RenderWorker:
+    """
+    Leases jobs from a RenderQueue and renders them with blender. Start one worker per core and host; each
+    worker uses its own copy of the blender scripts, so several workers can share one checkout.
+    """
+
+    def __init__(self,
+                 queue: RenderQueue,
+                 static_output_dir: str = os.path.join(viz.PARENT_DIR, R"../static"),
+                 dynamic_output_dir: str = os.path.join(viz.PARENT_DIR, R"../dynamic"),
+                 worker_id: str = None,
+                 poll_interval: float = 2.0) -> None:
+        self.queue = queue
+        self.worker_id = worker_id if worker_id else f"{socket.gethostname()}-{os.getpid()}"
+        self.poll_interval = poll_interval
+        self.static_script_path = viz.create_private_blender_script(
+            os.path.join(viz.PARENT_DIR, R"./blender_script_static.py"))
+        self.dynamic_script_path = viz.create_private_blender_script(
+            os.path.join(viz.PARENT_DIR, R"./blender_script_dynamic.py"))
+        self.static_viz = viz.StaticDataVisualizer(self.static_script_path, static_output_dir)
+        self.dynamic_viz = viz.DynamicDataVisualizer(dynamic_output_dir, self.dynamic_script_path)
+        metrics.REGISTRY.add_collector(self.queue.collect_metrics)  # queue depth is read when metrics are exported
+
+    def run(self, max_jobs: int = None, stop_when_empty: bool = False) -> int:
+        """
+        Processes jobs until the queue is empty (if stop_when_empty) or max_jobs jobs were processed.
+        :param max_jobs: Maximum number of jobs to process (None for no limit).
+        :param stop_when_empty: Return as soon as no job is available instead of polling.
+        :return: Number of processed jobs.
+        """
+        processed = 0
+        try:
+            while max_jobs is None or processed < max_jobs:
+                job = self.queue.lease(self.worker_id)
+                if job is None:
+                    if stop_when_empty:
+                        break
+                    time.sleep(self.poll_interval)
+                    continue
+
+                print(f"Worker {self.worker_id} processing job {job['id']} ({job['kind']}) ...")
+                labels = {'kind': job['kind']}
+                stop_heartbeat = self.__start_heartbeat(job['id'])
+                try:
+                    with metrics.REGISTRY.track(metrics.JOBS_IN_FLIGHT, metrics.JOB_SECONDS, labels):
+                        self.__process(job)
+                except Exception as e:  # the job must go back to the queue whatever went wrong
+                    self.queue.fail(job['id'], self.worker_id, repr(e))
+                    metrics.REGISTRY.inc(metrics.JOBS_TOTAL, labels=dict(labels, result='failed'))
+                else:
+                    self.queue.complete(job['id'], self.worker_id)
+                    metrics.REGISTRY.inc(metrics.JOBS_TOTAL, labels=dict(labels, result='completed'))
+                    metrics.REGISTRY.mark(metrics.JOBS_PER_SECOND, labels)
+                finally:
+                    stop_heartbeat.set()
+                processed += 1
+        finally:
+            self.close()
+        return processed
+
+    def close(self) -> None:
+        """
+        Removes the private copies of the blender scripts.
+        :return: None
+        """
+        metrics.REGISTRY.remove_collector(self.queue.collect_metrics)
+        for script_path in [self.static_script_path, self.dynamic_script_path]:
+            if os.path.exists(script_path):
+                os.remove(script_path)
+
+    def __start_heartbeat(self, job_id: int) -> threading.Event:
+        # Renews the lease three times per lease period while the job is processed
+        stop = threading.Event()
+        interval = max(self.queue.lease_seconds / 3, MIN_HEARTBEAT_SECONDS)
+
+        def heartbeat() -> None:
+            while not stop.wait(interval):
+                try:
+                    if not self.queue.renew(job_id, self.worker_id):
+                        print(f"Worker {self.worker_id} lost the lease of job {job_id}!")
+                        return
+                except sqlite3.Error as e:  # try again at the next beat, the lease is still valid
+                    print(f"Worker {self.worker_id} could not renew the lease of job {job_id}: {e}")
+
+        threading.Thread(target=heartbeat, name=f"lease-heartbeat-{job_id}", daemon=True).start()
+        return stop
+
+    @staticmethod
+    def __check(report: validation.ValidationReport) -> None:
+        # The visualizers only print rejected inputs, so they are checked here to fail the job
+        if not report.ok:
+            raise ValueError(str(report))
+
+    def __process(self, job: dict) -> None:
+        payload = job['payload']
+
+        # Expected outputs are derived from the payload, never from the visualizers' state of an earlier job.
+        # They are removed before rendering, so that results of an earlier run never count as success.
+        if job['kind'] == JOB_STATIC_FILE:
+            self.__check(validation.validate_wach_file(payload['file_path']))
+            _check_file_type(payload['file_type'])
+            _, hand, data_samples = readers.read_wach_file(payload['file_path'])
+            input_file_name = os.path.splitext(os.path.basename(payload['file_path']))[0]
+            expected = sorted({self.static_viz.get_result_path(input_file_name, hand, idx, payload['file_type'])
+                               for idx in range(len(data_samples))})  # pose records are one file for all samples
+            self.__remove_outputs(expected)
+            self.static_viz.generate_static_gesture_from_file(payload['file_path'], payload['file_type'],
+                                                              export_png=payload['export_png'])
+        elif job['kind'] == JOB_STATIC_SAMPLE:
+            self.__check(validation.validate_wach_samples([payload['sample_values']], payload['hand'],
+                                                          payload['label']))
+            _check_file_type(payload['file_type'])
+            # Jobs enqueued before sample_number and input_file_name existed do not have them
+            sample_number = payload.get('sample_number', 0)
+            input_file_name = payload.get('input_file_name') or payload['label']
+            expected = [self.static_viz.get_result_path(input_file_name, payload['hand'], sample_number,
+                                                        payload['file_type'])]
+            self.__remove_outputs(expected)
+            self.static_viz.generate_static_gesture_from_sample(payload['label'], payload['hand'],
+                                                                payload['sample_values'], payload['file_type'],
+                                                                export_png=payload['export_png'],
+                                                                sample_number=sample_number,
+                                                                input_file_name=input_file_name)
+        elif job['kind'] == JOB_DYNAMIC_FILE:
+            if not payload['json_path'].endswith('.json'):
+                raise ValueError(f"Json file needed as input: {payload['json_path']}")
+            gesture_data = readers.read_dynamic_file(payload['json_path'])
+            if not gesture_data:
+                raise ValueError(f"No gestures in {payload['json_path']}")
+            self.__check(validation.validate_dynamic_gestures(gesture_data, payload['json_path']))
+            gesture_indices = payload.get('gesture_indices')
+            expected = [self.dynamic_viz.get_output_file_path(gesture_data[0]['letter'], gesture_data[0]['hand'], idx)
+                        for idx in (range(len(gesture_data)) if gesture_indices is None else gesture_indices)]
+            self.__remove_outputs(expected)
+            self.dynamic_viz.generate_dynamic_gesture(payload['json_path'], export=True,
+                                                      gesture_indices=gesture_indices)
+        else:
+            raise ValueError(f"Unknown job kind '{job['kind']}'")
+
+        # The visualizers only print errors, so check that blender actually wrote the results
+        missing = [path for path in expected if not os.path.exists(path)]
+        if not expected or missing:
+            raise RuntimeError(f"No output written for {missing if missing else 'job'}")
+
+    @staticmethod
+    def __remove_outputs(paths: list[str]) -> None:
+        for path in paths:
+            if os.path.exists(path):
+                os.remove(path)